@@ -0,0 +1,1016 @@
+#!/usr/bin/env python3
+"""
+FitHome Pro - Benchmarks de Rendimiento
+Mide el rendimiento de las rutas críticas sobre bases de datos sintéticas
+
+Uso:
+    python benchmark.py completions [--users 50] [--completions 2000] [--threads 16]
+    python benchmark.py progress [--sessions 1000000] [--weeks 8] [--months 6]
+    python benchmark.py catalog [--reruns 2000] [--threads 8]
+    python benchmark.py nutrition [--plans 200] [--meals 25] [--repeat 20]
+    python benchmark.py nutrition-batch [--users 20] [--days 90] [--entries 3]
+    python benchmark.py kids [--activities 100000] [--repeat 20]
+    python benchmark.py async-page [--users 1000] [--workouts 500] [--pages 30]
+    python benchmark.py startup [--repeat 20]
+    python benchmark.py fragments [--clicks 20]
+    python benchmark.py css [--reruns 50] [--theme-changes 2]
+    python benchmark.py write-behind [--users 20] [--events 2000]
+    python benchmark.py imports [--repeat 5] [--top 15] [--check]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+# Permitir importar los módulos de src/ igual que main.py
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'fithome_pro_sqlite.sql')
+
+# =============================================================================
+# UTILIDADES
+# =============================================================================
+
+def create_benchmark_database(path, users=50):
+    """Crear una base de datos de pruebas con el esquema completo y N usuarios"""
+    from src.app_logic import apply_migrations
+    
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        conn.executescript(f.read())
+    apply_migrations(conn)
+    
+    conn.executemany(
+        "INSERT INTO usuarios (nombre, email, password_hash) VALUES (?, ?, ?)",
+        [(f"Usuario {i}", f"usuario{i}@bench.local", "x") for i in range(users)]
+    )
+    conn.commit()
+    user_ids = [row[0] for row in conn.execute("SELECT id FROM usuarios ORDER BY id")]
+    workout_ids = [row[0] for row in conn.execute("SELECT id FROM entrenamientos ORDER BY id")]
+    conn.close()
+    return user_ids, workout_ids
+
+def run_concurrently(func, jobs, threads):
+    """Ejecutar func(*job) para cada trabajo con N threads y devolver los segundos empleados"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda job: func(*job), jobs))
+    return time.perf_counter() - start
+
+def print_result(label, operations, seconds):
+    """Imprimir operaciones por segundo"""
+    print(f"  {label:<32} {operations:>8} ops  {seconds:8.3f}s  {operations / seconds:10.1f} ops/s")
+
+# =============================================================================
+# FINALIZACIÓN DE SESIONES DE ENTRENAMIENTO
+# =============================================================================
+
+def _legacy_execute(db_path, query, params=(), write=False):
+    """Ruta anterior: una conexión nueva (y un commit) por sentencia"""
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+    try:
+        cursor = conn.execute(query, params)
+        if write:
+            conn.commit()
+            return True
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+def legacy_complete_workout_session(db_path, user_id, workout_id, duration_minutes, calories_burned, rating):
+    """Reproducción de complete_workout_session antes de hacerlo transaccional"""
+    _legacy_execute(db_path, """
+        UPDATE sesiones_entrenamiento
+        SET fecha_fin = datetime('now'), duracion_real_minutos = ?, calorias_quemadas = ?,
+            completado = 1, rating_usuario = ?
+        WHERE usuario_id = ? AND entrenamiento_id = ? AND completado = 0
+    """, (duration_minutes, calories_burned, rating, user_id, workout_id), write=True)
+    _legacy_execute(db_path, "UPDATE entrenamientos SET total_completados = total_completados + 1 WHERE id = ?",
+                    (workout_id,), write=True)
+    _legacy_execute(db_path, """
+        INSERT INTO estadisticas_usuario
+        (usuario_id, fecha, entrenamientos_completados, minutos_entrenamiento, calorias_quemadas)
+        VALUES (?, date('now'), 1, ?, ?)
+        ON CONFLICT(usuario_id, fecha) DO UPDATE SET
+            entrenamientos_completados = entrenamientos_completados + 1,
+            minutos_entrenamiento = minutos_entrenamiento + ?,
+            calorias_quemadas = calorias_quemadas + ?
+    """, (user_id, duration_minutes, calories_burned, duration_minutes, calories_burned), write=True)
+    
+    total_workouts, total_calories = _legacy_execute(db_path, """
+        SELECT COUNT(*), COALESCE(SUM(calorias_quemadas), 0)
+        FROM sesiones_entrenamiento WHERE usuario_id = ? AND completado = 1
+    """, (user_id,))[0]
+    for threshold, name in [(1, 'Primer Paso'), (10, 'Consistencia'), (50, 'Maratonista'), (1000, 'Quemador')]:
+        value = total_calories if threshold == 1000 else total_workouts
+        if value >= threshold:
+            existing = _legacy_execute(db_path, """
+                SELECT lu.id FROM logros_usuario lu JOIN logros l ON lu.logro_id = l.id
+                WHERE lu.usuario_id = ? AND l.nombre = ?
+            """, (user_id, name))
+            if not existing:
+                logro = _legacy_execute(db_path, "SELECT id FROM logros WHERE nombre = ?", (name,))
+                if logro:
+                    try:
+                        _legacy_execute(db_path, "INSERT INTO logros_usuario (usuario_id, logro_id) VALUES (?, ?)",
+                                        (user_id, logro[0][0]), write=True)
+                    except sqlite3.IntegrityError:
+                        # Carrera entre threads del mismo usuario (antes se registraba y se ignoraba)
+                        pass
+
+def _open_sessions(db_path, jobs):
+    """Crear las sesiones abiertas que completarán los trabajos del benchmark"""
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO sesiones_entrenamiento (usuario_id, entrenamiento_id, fecha_inicio) VALUES (?, ?, datetime('now'))",
+        [(job[0], job[1]) for job in jobs]
+    )
+    conn.commit()
+    conn.close()
+
+def benchmark_completions(users=50, completions=2000, threads=16):
+    """Completaciones por segundo con muchos usuarios concurrentes: antes y después"""
+    from src.app_logic import SQLiteDatabase, WorkoutService
+    
+    print(f"🏋️ Finalización de sesiones: {completions} completaciones, {users} usuarios, {threads} threads")
+    rng = random.Random(42)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'legacy.db')
+        pooled_path = os.path.join(tmp, 'pooled.db')
+        user_ids, workout_ids = create_benchmark_database(legacy_path, users)
+        create_benchmark_database(pooled_path, users)
+        
+        # Misma base de datos en WAL para comparar solo la ruta de escritura
+        for path in (legacy_path, pooled_path):
+            conn = sqlite3.connect(path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.close()
+        
+        jobs = [(rng.choice(user_ids), rng.choice(workout_ids), rng.randint(15, 45),
+                 rng.randint(100, 400), rng.randint(1, 5)) for _ in range(completions)]
+        _open_sessions(legacy_path, jobs)
+        _open_sessions(pooled_path, jobs)
+        
+        legacy_seconds = run_concurrently(
+            lambda *job: legacy_complete_workout_session(legacy_path, *job), jobs, threads)
+        
+        database = SQLiteDatabase(pooled_path, pool_size=threads, pool_timeout=60)
+        database.connect()
+        service = WorkoutService(database)
+        pooled_seconds = run_concurrently(service.complete_workout_session, jobs, threads)
+        metrics = database.get_pool_metrics()
+        database.close()
+    
+    print_result("Antes (conexión por sentencia)", completions, legacy_seconds)
+    print_result("Después (una transacción)", completions, pooled_seconds)
+    print(f"  Mejora: x{legacy_seconds / pooled_seconds:.1f}  |  espera media en el pool: {metrics.average_wait_ms} ms")
+
+def _percentile_ms(samples, percentile):
+    """Percentil de una lista de duraciones en segundos, en milisegundos"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+    return ordered[index] * 1000
+
+def benchmark_write_behind(users=20, events=2000):
+    """Latencia vista por el script de Streamlit al iniciar y completar sesiones"""
+    from src.app_logic import SQLiteDatabase, WorkoutService, WriteBehindQueue
+    
+    print(f"✍️ Escritura diferida: {events} inicios + {events} finalizaciones, {users} usuarios")
+    rng = random.Random(42)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        sync_path = os.path.join(tmp, 'sync.db')
+        deferred_path = os.path.join(tmp, 'deferred.db')
+        user_ids, workout_ids = create_benchmark_database(sync_path, users)
+        create_benchmark_database(deferred_path, users)
+        jobs = [(rng.choice(user_ids), rng.choice(workout_ids), rng.randint(15, 45),
+                 rng.randint(100, 400), rng.randint(1, 5)) for _ in range(events)]
+        
+        totals = []
+        for label, path, deferred in (("Antes (síncrono)", sync_path, False),
+                                      ("Después (cola)", deferred_path, True)):
+            database = SQLiteDatabase(path)
+            database.connect()
+            writer = WriteBehindQueue(database) if deferred else None
+            service = WorkoutService(database, writer=writer)
+            
+            latencies = []
+            start = time.perf_counter()
+            for user_id, workout_id, minutes, calories, rating in jobs:
+                call_start = time.perf_counter()
+                service.start_workout_session(user_id, workout_id)
+                service.complete_workout_session(user_id, workout_id, minutes, calories, rating)
+                latencies.append(time.perf_counter() - call_start)
+            caller_seconds = time.perf_counter() - start
+            if writer is not None:
+                writer.flush()
+            total_seconds = time.perf_counter() - start
+            
+            totals.append(database.execute_query(
+                "SELECT usuario_id, total_entrenamientos, total_calorias, total_minutos "
+                "FROM estadisticas_usuario_totales ORDER BY usuario_id"))
+            print_result(label, events, caller_seconds)
+            print(f"    p50 {_percentile_ms(latencies, 50):.3f} ms  p99 {_percentile_ms(latencies, 99):.3f} ms "
+                  f"por clic  |  escrito en {total_seconds:.2f}s")
+            if writer is not None:
+                metrics = writer.metrics()
+                print(f"    {metrics.batches} transacciones, {metrics.average_batch_size} eventos por lote, "
+                      f"retraso máximo en cola {metrics.max_queue_delay_ms:.0f} ms")
+                writer.close()
+            database.close()
+        
+        # Las dos rutas deben dejar exactamente los mismos acumulados
+        assert totals[0] == totals[1] and totals[0]
+
+# =============================================================================
+# PROGRESO SEMANAL Y MENSUAL
+# =============================================================================
+
+def create_session_history(sessions, reference_date, days=730, seed=42):
+    """Historial sintético de sesiones con las columnas de FitnessDataAnalyzer.get_user_data"""
+    import numpy as np
+    import pandas as pd
+    
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(reference_date) - pd.Timedelta(days=days)
+    seconds = rng.integers(0, (days + 1) * 86400, sessions)
+    df = pd.DataFrame({
+        'fecha_inicio': start + pd.to_timedelta(np.sort(seconds), unit='s'),
+        'duracion_real_minutos': rng.integers(10, 60, sessions),
+        'calorias_quemadas': rng.integers(80, 500, sessions),
+        'rating_usuario': rng.integers(1, 6, sessions),
+        'categoria': rng.choice(['cardio', 'fuerza', 'yoga', 'hiit', 'pilates'], sessions)
+    })
+    df['date'] = df['fecha_inicio'].dt.date
+    return df
+
+def legacy_weekly_progress(df, weeks, today):
+    """Reproducción de generate_weekly_progress antes de agrupar en una pasada"""
+    weekly_data = []
+    for i in range(weeks):
+        week_start = today - timedelta(weeks=i+1)
+        week_end = today - timedelta(weeks=i)
+        week_df = df[(df['date'] >= week_start) & (df['date'] < week_end)]
+        if not week_df.empty:
+            weekly_data.append((week_start, len(week_df), int(week_df['calorias_quemadas'].sum()),
+                                int(week_df['duracion_real_minutos'].sum()),
+                                round(week_df['rating_usuario'].mean(), 1)))
+    return weekly_data
+
+def legacy_monthly_report(df, months, today):
+    """Reproducción de generate_monthly_report antes de agrupar en una pasada"""
+    from src.data_analysis import FitnessDataAnalyzer
+    
+    monthly_reports = []
+    for i in range(months):
+        month_start = (today - timedelta(days=30*i)).replace(day=1)
+        if i == 0:
+            month_end = today
+        else:
+            month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        month_df = df[(df['date'] >= month_start) & (df['date'] <= month_end)]
+        if not month_df.empty:
+            favorite_category = month_df['categoria'].mode().iloc[0]
+            improvement_areas = FitnessDataAnalyzer._improvement_areas_from_totals(
+                month_df['duracion_real_minutos'].mean(), len(month_df), month_df['categoria'].nunique(),
+                month_df['calorias_quemadas'].sum(), month_df['duracion_real_minutos'].sum())
+            monthly_reports.append((month_start, len(month_df), int(month_df['calorias_quemadas'].sum()),
+                                    favorite_category, improvement_areas))
+    return monthly_reports
+
+def benchmark_progress(sessions=1_000_000, weeks=8, months=6, repeat=3):
+    """Progreso semanal y reporte mensual sobre un historial grande: bucle de máscaras frente a groupby"""
+    from src.data_analysis import FitnessDataAnalyzer
+    
+    reference_date = date.today()
+    print(f"📈 Progreso semanal/mensual: {sessions} sesiones, {weeks} semanas, {months} meses")
+    df = create_session_history(sessions, reference_date)
+    
+    def timed(func):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = func()
+        return (time.perf_counter() - start) / repeat, result
+    
+    legacy_weekly_seconds, _ = timed(lambda: legacy_weekly_progress(df, weeks, reference_date))
+    weekly_seconds, weekly = timed(
+        lambda: FitnessDataAnalyzer.weekly_progress_from_frame(df, weeks, reference_date))
+    legacy_monthly_seconds, _ = timed(lambda: legacy_monthly_report(df, months, reference_date))
+    monthly_seconds, monthly = timed(
+        lambda: FitnessDataAnalyzer.monthly_report_from_frame(df, months, reference_date))
+    
+    print_result("Semanal antes (máscaras)", repeat, legacy_weekly_seconds * repeat)
+    print_result("Semanal después (una pasada)", repeat, weekly_seconds * repeat)
+    print_result("Mensual antes (máscaras)", repeat, legacy_monthly_seconds * repeat)
+    print_result("Mensual después (una pasada)", repeat, monthly_seconds * repeat)
+    print(f"  Mejora: semanal x{legacy_weekly_seconds / weekly_seconds:.1f}, "
+          f"mensual x{legacy_monthly_seconds / monthly_seconds:.1f}  |  "
+          f"{len(weekly)} semanas y {len(monthly)} meses con datos")
+
+# =============================================================================
+# CACHÉ DE CATÁLOGOS
+# =============================================================================
+
+def _catalog_rerun(workout_service, nutrition_service, kids_service, media_service):
+    """Consultas de catálogo de un rerun típico de la aplicación"""
+    workout_service.get_workouts(include_exercises=False)
+    workout_service.get_workouts(category='cardio', include_exercises=False)
+    nutrition_service.get_nutrition_plans(include_meals=False)
+    kids_service.get_kids_activities()
+    media_service.get_movies()
+
+def benchmark_catalog(reruns=2000, threads=8):
+    """Reruns por segundo consultando los catálogos con y sin caché compartida"""
+    from src.app_logic import (SQLiteDatabase, CatalogCache, WorkoutService, NutritionService,
+                               KidsActivityService, MediaService)
+    
+    print(f"📚 Catálogos: {reruns} reruns, {threads} threads")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'catalog.db')
+        create_benchmark_database(path, users=1)
+        database = SQLiteDatabase(path, pool_size=threads)
+        database.connect()
+        
+        def services(catalog):
+            return (WorkoutService(database, catalog), NutritionService(database, catalog),
+                    KidsActivityService(database, catalog), MediaService(database, catalog))
+        
+        # Sin caché efectiva: versiones comprobadas y catálogo recargado en cada llamada
+        uncached = services(CatalogCache(database, check_interval=0, max_age=0))
+        uncached_seconds = run_concurrently(_catalog_rerun, [uncached] * reruns, threads)
+        
+        catalog = CatalogCache(database)
+        cached_seconds = run_concurrently(_catalog_rerun, [services(catalog)] * reruns, threads)
+        stats = catalog.stats()
+        database.close()
+    
+    print_result("Sin caché (consulta por rerun)", reruns, uncached_seconds)
+    print_result("Caché de catálogos", reruns, cached_seconds)
+    print(f"  Mejora: x{uncached_seconds / cached_seconds:.1f}  |  "
+          f"aciertos: {stats.hit_ratio:.1%} ({stats.hits} de {stats.hits + stats.misses})")
+
+# =============================================================================
+# PLANES NUTRICIONALES
+# =============================================================================
+
+def legacy_nutrition_plans(database):
+    """Reproducción de get_nutrition_plans con GROUP_CONCAT antes de cargar las comidas por filas"""
+    rows = database.execute_query("""
+        SELECT p.*, GROUP_CONCAT(m.nombre || '|' || m.calorias || '|' || m.tipo) as meals_data
+        FROM planes_nutricionales p
+        LEFT JOIN comidas m ON p.id = m.plan_nutricional_id
+        WHERE p.activo = 1
+        GROUP BY p.id
+    """)
+    plans = {}
+    for plan_data in rows:
+        meals = []
+        if plan_data['meals_data']:
+            for meal_str in plan_data['meals_data'].split(','):
+                meal_parts = meal_str.split('|')
+                if len(meal_parts) >= 3:
+                    meals.append({'name': meal_parts[0], 'calories': int(meal_parts[1]),
+                                  'type': meal_parts[2]})
+        plans[plan_data['id']] = meals
+    return plans
+
+# Textos de receta de tamaño realista: la carga de planes no debe leerlos
+MEAL_INGREDIENTS = ", ".join(f"{g} g de ingrediente {i}" for i, g in enumerate(range(50, 500, 30)))
+MEAL_INSTRUCTIONS = "\n".join(f"{i}. Preparar y cocinar el ingrediente {i} durante {i + 2} minutos"
+                              for i in range(1, 16))
+
+def benchmark_nutrition(plans=200, meals=25, repeat=20):
+    """Carga de planes nutricionales: GROUP_CONCAT frente a comidas por filas y a solo planes"""
+    from src.app_logic import SQLiteDatabase, NutritionService
+    
+    print(f"🥗 Planes nutricionales: {plans} planes x {meals} comidas, {repeat} repeticiones")
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'nutrition.db')
+        create_benchmark_database(path, users=1)
+        conn = sqlite3.connect(path)
+        for p in range(plans):
+            plan_id = conn.execute(
+                "INSERT INTO planes_nutricionales (nombre, calorias_diarias, carbohidratos_porcentaje, "
+                "proteinas_porcentaje, grasas_porcentaje) VALUES (?, 2000, 50, 25, 25)", (f"Plan {p}",)
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO comidas (plan_nutricional_id, nombre, tipo, calorias, carbohidratos_g, "
+                "proteinas_g, grasas_g, ingredientes, instrucciones, tiempo_preparacion_minutos) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(plan_id, f"Pollo, arroz y verduras {m}" if m % 5 == 0 else f"Comida {m}",
+                  rng.choice(['desayuno', 'almuerzo', 'cena', 'snack']), rng.randint(100, 800),
+                  rng.uniform(5, 80), rng.uniform(5, 50), rng.uniform(2, 30),
+                  MEAL_INGREDIENTS, MEAL_INSTRUCTIONS, rng.randint(5, 45)) for m in range(meals)]
+            )
+        conn.commit()
+        conn.close()
+        
+        database = SQLiteDatabase(path)
+        database.connect()
+        service = NutritionService(database)
+        
+        start = time.perf_counter()
+        for _ in range(repeat):
+            legacy = legacy_nutrition_plans(database)
+        legacy_seconds = time.perf_counter() - start
+        
+        # Cada repetición invalida la caché de catálogos: se mide la carga desde SQLite
+        start = time.perf_counter()
+        for _ in range(repeat):
+            service.catalog.invalidate()
+            loaded = service.get_nutrition_plans()
+        structured_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for _ in range(repeat):
+            service.catalog.invalidate()
+            headers = service.get_nutrition_plans(include_meals=False)
+        headers_seconds = time.perf_counter() - start
+        database.close()
+    
+    names = {meal['name'] for plan in loaded for meal in plan.meals}
+    corrupted = sum(1 for plan_meals in legacy.values() for meal in plan_meals if meal['name'] not in names)
+    total_meals = sum(len(plan.meals) for plan in loaded)
+    fields = len(next((meal for plan in loaded for meal in plan.meals), {}))
+    print_result("Antes (GROUP_CONCAT)", repeat, legacy_seconds)
+    print_result("Después, con comidas (por filas)", repeat, structured_seconds)
+    print_result("Después, pestaña (solo planes)", repeat, headers_seconds)
+    print(f"  Mejora: pestaña x{legacy_seconds / headers_seconds:.1f}, "
+          f"con comidas x{legacy_seconds / structured_seconds:.1f}  |  "
+          f"{len(headers)} planes, {total_meals} comidas con {fields} campos (antes 3), "
+          f"{corrupted} nombres corruptos antes y 0 ahora")
+
+def benchmark_nutrition_batch(users=20, days=90, entries=3):
+    """Registro nutricional: una llamada por entrada frente a un lote en una transacción"""
+    from src.app_logic import SQLiteDatabase, NutritionService
+    
+    rng = random.Random(42)
+    first_day = date.today() - timedelta(days=days)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, name) for name in ('single.db', 'batch.db')]
+        user_ids, _ = create_benchmark_database(paths[0], users)
+        create_benchmark_database(paths[1], users)
+        
+        # Varias entradas por usuario y día, como un diario de comidas importado
+        records = [(user_id, first_day + timedelta(days=d), rng.randint(200, 900),
+                    rng.uniform(10, 90), rng.uniform(5, 50), rng.uniform(2, 35))
+                   for user_id in user_ids for d in range(days) for _ in range(entries)]
+        print(f"🍎 Registro nutricional: {len(records)} entradas, {len(user_ids)} usuarios, {days} días")
+        
+        database = SQLiteDatabase(paths[0])
+        database.connect()
+        service = NutritionService(database)
+        start = time.perf_counter()
+        for record in records:
+            service.track_daily_nutrition(*record)
+        single_seconds = time.perf_counter() - start
+        database.close()
+        
+        database = SQLiteDatabase(paths[1])
+        database.connect()
+        result = NutritionService(database).track_nutrition_batch(records)
+        database.close()
+    
+    print_result("Antes (upsert por entrada)", len(records), single_seconds)
+    print_result("Después (lote agregado)", len(records), result.seconds)
+    print(f"  Mejora: x{single_seconds / result.seconds:.1f}  |  {result.rows} filas escritas, "
+          f"{result.rows_per_second} filas/s")
+
+# =============================================================================
+# ACTIVIDADES INFANTILES
+# =============================================================================
+
+def legacy_kids_activities(database, activity_type=None, age_range=None):
+    """Reproducción de get_kids_activities antes de los filtros tipados y la caché"""
+    query = "SELECT * FROM actividades_infantiles WHERE activo = 1"
+    params = []
+    if activity_type:
+        query += " AND tipo = ?"
+        params.append(activity_type)
+    if age_range and '-' in age_range:
+        min_age, max_age = age_range.split('-')[0], age_range.split('-')[1].split()[0]
+        query += " AND edad_minima <= ? AND edad_maxima >= ?"
+        params.extend([max_age, min_age])
+    query += " ORDER BY dificultad, nombre"
+    
+    activities = []
+    for row in database.execute_query(query, tuple(params)):
+        activities.append((row['id'],
+                           row['materiales'].split(', ') if row['materiales'] else [],
+                           row['instrucciones'].split('\n') if row['instrucciones'] else [],
+                           row['beneficios'].split(', ') if row['beneficios'] else []))
+    return activities
+
+def benchmark_kids(activities=100_000, repeat=20):
+    """Latencia de los filtros de actividades infantiles sobre un catálogo grande"""
+    from src.app_logic import SQLiteDatabase, KidsActivityService
+    
+    print(f"👶 Actividades infantiles: {activities} actividades, {repeat} repeticiones por filtro")
+    rng = random.Random(42)
+    types = ['diy', 'ejercicio', 'manualidad', 'juego', 'educativo']
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'kids.db')
+        create_benchmark_database(path, users=1)
+        conn = sqlite3.connect(path)
+        rows = []
+        for i in range(activities):
+            min_age = rng.randint(2, 12)
+            rows.append((f"Actividad {i}", rng.choice(types), rng.randint(10, 60), min_age,
+                         min_age + rng.randint(1, 6), rng.choice(['facil', 'intermedio', 'dificil']),
+                         "Papel, Tijeras, Pegamento", "Paso 1\nPaso 2\nPaso 3", "Creatividad, Motricidad"))
+        conn.executemany(
+            "INSERT INTO actividades_infantiles (nombre, tipo, duracion_minutos, edad_minima, edad_maxima, "
+            "dificultad, materiales, instrucciones, beneficios) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+        conn.close()
+        
+        database = SQLiteDatabase(path)
+        database.connect()
+        service = KidsActivityService(database)
+        
+        start = time.perf_counter()
+        service.get_kids_activities()
+        print(f"  Carga inicial del catálogo: {time.perf_counter() - start:.2f}s")
+        
+        filters = [("Tipo", {'activity_type': 'diy'}),
+                   ("Edad", {'age_range': '3-4 años'}),
+                   ("Tipo + edad", {'activity_type': 'juego', 'age_range': '6-8 años'})]
+        for label, kwargs in filters:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                legacy = legacy_kids_activities(database, **kwargs)
+            legacy_seconds = time.perf_counter() - start
+            
+            # Primera llamada en frío (consulta por índice) y el resto desde la caché
+            start = time.perf_counter()
+            result = service.get_kids_activities(**kwargs)
+            cold_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            for _ in range(repeat):
+                result = service.get_kids_activities(**kwargs)
+            cached_seconds = time.perf_counter() - start
+            
+            assert [activity.id for activity in result] == [row[0] for row in legacy]
+            print_result(f"{label} antes", repeat, legacy_seconds)
+            print_result(f"{label} después", repeat, cached_seconds)
+            print(f"    {len(result)} resultados  |  en frío {cold_ms:.1f} ms, "
+                  f"después {cached_seconds / repeat * 1000:.2f} ms por filtro")
+        database.close()
+
+# =============================================================================
+# MONTAJE ASÍNCRONO DEL DASHBOARD
+# =============================================================================
+
+def benchmark_async_page(users=1000, workouts=500, pages=30):
+    """Latencia de montar el dashboard: consultas en serie frente a asyncio.gather"""
+    import asyncio
+    from src.app_logic import (SQLiteDatabase, CatalogCache, UserService, WorkoutService,
+                               NutritionService, KidsActivityService, MediaService, HydrationService)
+    from src.async_services import build_async_services, load_dashboard_page
+    
+    print(f"⚡ Dashboard asíncrono: {users} usuarios, {workouts} entrenamientos, {pages} páginas")
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'async.db')
+        user_ids, _ = create_benchmark_database(path, users)
+        conn = sqlite3.connect(path)
+        conn.executemany(
+            "INSERT INTO entrenamientos (nombre, duracion_minutos, nivel, categoria, calorias_estimadas, "
+            "rating_promedio, total_completados) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(f"Entrenamiento {i}", rng.randint(10, 60), rng.choice(['principiante', 'intermedio', 'avanzado']),
+              rng.choice(['cardio', 'fuerza', 'yoga']), rng.randint(100, 500),
+              round(rng.uniform(1, 5), 2), rng.randint(0, 1000)) for i in range(workouts)])
+        # Historial de peso y logros de todos los usuarios
+        conn.executemany(
+            "INSERT INTO progreso_peso (usuario_id, peso, fecha_registro) VALUES (?, ?, ?)",
+            [(user_id, round(rng.uniform(55, 95), 1),
+              f"{date(2024, 1, 1) + timedelta(days=day)} 08:00:00")
+             for user_id in user_ids for day in range(365)])
+        conn.execute("INSERT INTO logros_usuario (usuario_id, logro_id) "
+                     "SELECT u.id, l.id FROM usuarios u CROSS JOIN logros l")
+        conn.commit()
+        conn.close()
+        
+        database = SQLiteDatabase(path)
+        database.connect()
+        catalog = CatalogCache(database)
+        services = {
+            'database': database,
+            'user_service': UserService(database),
+            'workout_service': WorkoutService(database, catalog),
+            'nutrition_service': NutritionService(database, catalog),
+            'kids_service': KidsActivityService(database, catalog),
+            'media_service': MediaService(database, catalog),
+            'hydration_service': HydrationService(database)
+        }
+        async_services = build_async_services(services)
+        
+        def sync_page(user_id):
+            services['user_service'].get_user_stats(user_id)
+            services['user_service'].get_achievements(user_id)
+            services['workout_service'].get_workouts(include_exercises=False)[:2]
+            services['hydration_service'].get_daily_intake(user_id)
+        
+        async def async_pages(user_ids):
+            for user_id in user_ids:
+                await load_dashboard_page(async_services, user_id)
+        
+        for label, cold in (("catálogo en caché", False), ("catálogo en frío", True)):
+            sampled = [rng.choice(user_ids) for _ in range(pages)]
+            
+            start = time.perf_counter()
+            for user_id in sampled:
+                if cold:
+                    catalog.invalidate()
+                sync_page(user_id)
+            sync_seconds = time.perf_counter() - start
+            
+            async def timed_pages():
+                for user_id in sampled:
+                    if cold:
+                        catalog.invalidate()
+                    await load_dashboard_page(async_services, user_id)
+            start = time.perf_counter()
+            asyncio.run(timed_pages())
+            async_seconds = time.perf_counter() - start
+            
+            print(f"  {label.capitalize()}:")
+            print_result("Antes (en serie)", pages, sync_seconds)
+            print_result("Después (asyncio.gather)", pages, async_seconds)
+            print(f"    {sync_seconds / pages * 1000:.1f} ms -> {async_seconds / pages * 1000:.1f} ms por página "
+                  f"(x{sync_seconds / async_seconds:.1f})")
+        
+        # Mismo contenido por las dos rutas
+        user_id = user_ids[0]
+        page = asyncio.run(load_dashboard_page(async_services, user_id))
+        assert page.stats == services['user_service'].get_user_stats(user_id)
+        assert page.achievements == services['user_service'].get_achievements(user_id)
+        async_services['database'].close()
+        database.close()
+
+# =============================================================================
+# ARRANQUE DE SERVICIOS
+# =============================================================================
+
+# Servicios que usa la primera pantalla tras iniciar sesión (pestaña de inicio)
+HOME_SERVICES = ('user_service', 'workout_service', 'hydration_service', 'search_service')
+
+def legacy_initialize_services(db_path):
+    """Reproducción de initialize_services antes del registro perezoso"""
+    from src.app_logic import (SQLiteDatabase, CatalogCache, WriteBehindQueue, UserService,
+                               WorkoutService, NutritionService, HydrationService,
+                               KidsActivityService, MediaService, SearchService, DataAnalytics)
+    from src.data_analysis import FitnessDataAnalyzer, FitnessChartGenerator, ReportGenerator
+    from src.cache import figure_cache
+    
+    database = SQLiteDatabase(db_path)
+    database.connect()
+    data_analyzer = FitnessDataAnalyzer(db_path)
+    # El analizador abría su propia conexión en __init__
+    data_analyzer._connect()
+    catalog = CatalogCache(database)
+    write_queue = WriteBehindQueue(database)
+    return {
+        'database': database,
+        'catalog': catalog,
+        'write_queue': write_queue,
+        'user_service': UserService(database),
+        'workout_service': WorkoutService(database, catalog, write_queue),
+        'nutrition_service': NutritionService(database, catalog, write_queue),
+        'hydration_service': HydrationService(database, write_queue),
+        'kids_service': KidsActivityService(database, catalog),
+        'media_service': MediaService(database, catalog),
+        'search_service': SearchService(database),
+        'analytics': DataAnalytics(database, figure_cache=figure_cache),
+        'data_analyzer': data_analyzer,
+        'chart_generator': FitnessChartGenerator(data_analyzer, aggregate_in_sql=True,
+                                                 figure_cache=figure_cache),
+        'report_generator': ReportGenerator(data_analyzer)
+    }
+
+def benchmark_startup(repeat=20):
+    """Coste de inicializar los servicios hasta poder pintar la pestaña de inicio"""
+    import shutil
+    from src.app_logic import SQLiteDatabase
+    from src.main_app import build_service_registry
+    # Importar aquí el análisis (pandas, plotly): si no, la primera iteración
+    # de legacy_initialize_services pagaría el import dentro de la medición
+    import src.data_analysis
+    import src.cache
+    
+    print(f"🚀 Arranque de servicios: {repeat} arranques (imports ya cargados)")
+    source = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fithome_pro.db')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'startup.db')
+        shutil.copy(source, path)
+        
+        start = time.perf_counter()
+        for _ in range(repeat):
+            services = legacy_initialize_services(path)
+            services['data_analyzer'].connection.close()
+            services['database'].close()
+        legacy_seconds = time.perf_counter() - start
+        
+        timings = {}
+        start = time.perf_counter()
+        for _ in range(repeat):
+            database = SQLiteDatabase(path)
+            database.connect()
+            services = build_service_registry(database)
+            for name in HOME_SERVICES:
+                services[name]
+            for name, ms in services.timings().items():
+                timings[name] = timings.get(name, 0.0) + ms
+            database.close()
+        lazy_seconds = time.perf_counter() - start
+    
+    print_result("Antes (todos al arrancar)", repeat, legacy_seconds)
+    print_result("Después (perezoso, inicio)", repeat, lazy_seconds)
+    print(f"  {legacy_seconds / repeat * 1000:.1f} ms -> {lazy_seconds / repeat * 1000:.1f} ms por arranque")
+    print("  Construcción por servicio (media):")
+    for name, ms in timings.items():
+        print(f"    {name:<24} {ms / repeat:8.3f} ms")
+
+# =============================================================================
+# INTERACCIONES DEL DASHBOARD
+# =============================================================================
+
+def _fragment_interactions():
+    """(región, página, preparación, clic) de cada widget con fragmento propio"""
+    def click_key(key):
+        return lambda at: at.button(key=key).click().run()
+    
+    def click_label(label):
+        return lambda at: next(b for b in at.button if b.label == label).click().run()
+    
+    def navigate(page):
+        return lambda at: at.selectbox(key="nav_page").set_value(page).run()
+    
+    def start_workout(at):
+        navigate("💪 Entrenamientos")(at)
+        click_label("▶️ Iniciar")(at)
+        click_label("▶️ Comenzar Entrenamiento")(at)
+    
+    return [
+        ('hydration', navigate("🏠 Inicio"), click_label("+ Vaso")),
+        ('habits', navigate("🎯 Hábitos y Metas"), click_key("inc_0")),
+        ('community_post', navigate("👥 Comunidad"), click_key("like_0")),
+        ('exercise_timer', start_workout, click_label("+10s")),
+    ]
+
+def benchmark_fragments(clicks=20):
+    """Tiempo de servidor de cada interacción: página completa frente a su fragmento
+    
+    AppTest vuelve a ejecutar siempre el script entero, así que de cada clic se
+    toman los dos tiempos que registra la app: 'app' (lo que costaba el
+    st.rerun() de antes) y el de la región del fragmento (lo que cuesta ahora
+    en el navegador, donde solo se vuelve a ejecutar esa región).
+    """
+    import shutil
+    from streamlit.testing.v1 import AppTest
+    
+    print(f"🧩 Interacciones del dashboard: {clicks} clics por widget")
+    root = os.path.dirname(os.path.abspath(__file__))
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # La app abre fithome_pro.db relativo al directorio de trabajo
+        shutil.copy(os.path.join(root, 'fithome_pro.db'), os.path.join(tmp, 'fithome_pro.db'))
+        os.chdir(tmp)
+        try:
+            at = AppTest.from_file(os.path.join(root, 'src', 'main_app.py'), default_timeout=60)
+            at.run()
+            at.button(key="login_btn").click().run()
+            
+            for region, prepare, click in _fragment_interactions():
+                prepare(at)
+                app_samples, region_samples = [], []
+                for _ in range(clicks):
+                    click(at)
+                    timings = at.session_state.render_timings
+                    app_samples.append(timings['app'])
+                    region_samples.append(timings[region])
+                app_ms = statistics.median(app_samples)
+                region_ms = statistics.median(region_samples)
+                print(f"  {region:<16} página {app_ms:8.2f} ms -> fragmento {region_ms:8.2f} ms "
+                      f"({app_ms / max(region_ms, 0.001):.1f}x)")
+            
+            at.session_state.services['write_queue'].close()
+        finally:
+            os.chdir(cwd)
+
+# =============================================================================
+# ESTILOS DEL TEMA
+# =============================================================================
+
+def benchmark_css(reruns=50, theme_changes=2):
+    """Bytes de estilos enviados por ejecución: siempre (antes) frente a solo al cambiar de tema"""
+    import shutil
+    from streamlit.testing.v1 import AppTest
+    from src.app_logic import ThemeManager
+    
+    print(f"🎨 Estilos del tema: {reruns} ejecuciones, {theme_changes} cambios de tema")
+    root = os.path.dirname(os.path.abspath(__file__))
+    cwd = os.getcwd()
+    legacy_bytes = sent_bytes = saved_bytes = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        # La app abre fithome_pro.db relativo al directorio de trabajo
+        shutil.copy(os.path.join(root, 'fithome_pro.db'), os.path.join(tmp, 'fithome_pro.db'))
+        os.chdir(tmp)
+        try:
+            at = AppTest.from_file(os.path.join(root, 'src', 'main_app.py'), default_timeout=60)
+            at.run()
+            
+            change_every = max(1, reruns // (theme_changes + 1))
+            for i in range(1, reruns + 1):
+                if i % change_every == 0 and i // change_every <= theme_changes:
+                    at.session_state.dark_mode = not at.session_state.dark_mode
+                at.run()
+                # Antes se enviaba la hoja completa con st.markdown en cada ejecución
+                legacy_bytes += len(ThemeManager.build_theme_css(at.session_state.accent_color,
+                                                                 at.session_state.dark_mode).encode('utf-8'))
+                sent_bytes += at.session_state.css_bytes_sent
+                saved_bytes += at.session_state.css_bytes_saved
+        finally:
+            os.chdir(cwd)
+    
+    print(f"  Antes   {legacy_bytes / reruns:10.0f} bytes por ejecución ({legacy_bytes} en total)")
+    print(f"  Después {sent_bytes / reruns:10.0f} bytes por ejecución ({sent_bytes} en total)")
+    print(f"  Ahorro  {saved_bytes / reruns:10.0f} bytes por ejecución")
+    
+    base_css = ThemeManager.load_base_css.__wrapped__
+    start = time.perf_counter()
+    for _ in range(reruns):
+        base_css()
+    read_ms = (time.perf_counter() - start) / reruns * 1000
+    start = time.perf_counter()
+    for _ in range(reruns):
+        ThemeManager.build_theme_payload('#667eea', False)
+    cached_ms = (time.perf_counter() - start) / reruns * 1000
+    print(f"  Hoja de estilos: lectura {read_ms:.3f} ms -> plantilla cacheada {cached_ms:.4f} ms")
+
+# =============================================================================
+# TIEMPO DE IMPORT EN FRÍO
+# =============================================================================
+
+# Presupuesto de import en frío por módulo (ms). src.main_app incluye streamlit,
+# que por sí solo ronda los 600 ms; src.app_logic no debe cargar ninguna
+# librería pesada (pandas, plotly, streamlit)
+IMPORT_BUDGETS_MS = {
+    'src.app_logic': 250,
+    'src.main_app': 1500,
+}
+
+def parse_importtime(output, module):
+    """Tiempo acumulado de `module` y de sus imports directos en la salida de -X importtime"""
+    children = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        cumulative_us = int(fields[1])
+        raw_name = fields[2].rstrip()
+        level = (len(raw_name) - len(raw_name.lstrip())) // 2
+        name = raw_name.strip()
+        if level == 0:
+            # Los imports directos aparecen justo antes que el módulo que los importa
+            if name == module:
+                return cumulative_us / 1000, sorted(children, key=lambda c: -c[1])
+            children = []
+        elif level == 1:
+            children.append((name, cumulative_us / 1000))
+    return None, []
+
+def profile_import(module, repeat=5):
+    """Mediana del import en frío de `module`, cada vez en un proceso nuevo"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    breakdown = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                                cwd=root, capture_output=True, text=True)
+        total_ms, children = parse_importtime(result.stderr, module)
+        if total_ms is None:
+            raise RuntimeError(f"No se pudo importar {module}:\n{result.stderr[-2000:]}")
+        samples.append(total_ms)
+        breakdown = children
+    return statistics.median(samples), breakdown
+
+def benchmark_imports(repeat=5, top=15, check=False):
+    """Desglose del import en frío de los módulos de la aplicación y control de presupuesto"""
+    print(f"📦 Import en frío: mediana de {repeat} procesos por módulo")
+    over_budget = []
+    for module, budget_ms in IMPORT_BUDGETS_MS.items():
+        total_ms, breakdown = profile_import(module, repeat)
+        status = "✅" if total_ms <= budget_ms else "❌"
+        print(f"  {status} {module:<28} {total_ms:8.1f} ms  (presupuesto {budget_ms} ms)")
+        for name, ms in breakdown[:top]:
+            print(f"      {name:<36} {ms:8.1f} ms")
+        if total_ms > budget_ms:
+            over_budget.append(module)
+    
+    if check and over_budget:
+        print(f"❌ Import por encima del presupuesto: {', '.join(over_budget)}")
+        sys.exit(1)
+
+# =============================================================================
+# FUNCIÓN PRINCIPAL
+# =============================================================================
+
+def main():
+    """Función principal de benchmarks"""
+    parser = argparse.ArgumentParser(description="Benchmarks de rendimiento de FitHome Pro")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    
+    completions_parser = subparsers.add_parser('completions', help="Finalización de sesiones de entrenamiento")
+    completions_parser.add_argument('--users', type=int, default=50)
+    completions_parser.add_argument('--completions', type=int, default=2000)
+    completions_parser.add_argument('--threads', type=int, default=16)
+    
+    progress_parser = subparsers.add_parser('progress', help="Progreso semanal y reporte mensual")
+    progress_parser.add_argument('--sessions', type=int, default=1_000_000)
+    progress_parser.add_argument('--weeks', type=int, default=8)
+    progress_parser.add_argument('--months', type=int, default=6)
+    
+    catalog_parser = subparsers.add_parser('catalog', help="Caché de catálogos")
+    catalog_parser.add_argument('--reruns', type=int, default=2000)
+    catalog_parser.add_argument('--threads', type=int, default=8)
+    
+    nutrition_parser = subparsers.add_parser('nutrition', help="Carga de planes nutricionales")
+    nutrition_parser.add_argument('--plans', type=int, default=200)
+    nutrition_parser.add_argument('--meals', type=int, default=25)
+    nutrition_parser.add_argument('--repeat', type=int, default=20)
+    
+    nutrition_batch_parser = subparsers.add_parser('nutrition-batch', help="Registro nutricional por lotes")
+    nutrition_batch_parser.add_argument('--users', type=int, default=20)
+    nutrition_batch_parser.add_argument('--days', type=int, default=90)
+    nutrition_batch_parser.add_argument('--entries', type=int, default=3)
+    
+    write_behind_parser = subparsers.add_parser('write-behind', help="Latencia de escritura de sesiones")
+    write_behind_parser.add_argument('--users', type=int, default=20)
+    write_behind_parser.add_argument('--events', type=int, default=2000)
+    
+    async_page_parser = subparsers.add_parser('async-page', help="Montaje asíncrono del dashboard")
+    async_page_parser.add_argument('--users', type=int, default=1000)
+    async_page_parser.add_argument('--workouts', type=int, default=500)
+    async_page_parser.add_argument('--pages', type=int, default=30)
+    
+    startup_parser = subparsers.add_parser('startup', help="Arranque de servicios")
+    startup_parser.add_argument('--repeat', type=int, default=20)
+    
+    imports_parser = subparsers.add_parser('imports', help="Import en frío por módulo")
+    imports_parser.add_argument('--repeat', type=int, default=5)
+    imports_parser.add_argument('--top', type=int, default=15, help="Imports directos a mostrar")
+    imports_parser.add_argument('--check', action='store_true',
+                                help="Terminar con error si algún módulo supera su presupuesto")
+    
+    fragments_parser = subparsers.add_parser('fragments', help="Interacciones del dashboard por fragmento")
+    fragments_parser.add_argument('--clicks', type=int, default=20)
+    
+    css_parser = subparsers.add_parser('css', help="Envío de estilos del tema")
+    css_parser.add_argument('--reruns', type=int, default=50)
+    css_parser.add_argument('--theme-changes', type=int, default=2)
+    
+    kids_parser = subparsers.add_parser('kids', help="Filtros de actividades infantiles")
+    kids_parser.add_argument('--activities', type=int, default=100_000)
+    kids_parser.add_argument('--repeat', type=int, default=20)
+    
+    args = parser.parse_args()
+    
+    if args.benchmark == 'completions':
+        benchmark_completions(args.users, args.completions, args.threads)
+    elif args.benchmark == 'progress':
+        benchmark_progress(args.sessions, args.weeks, args.months)
+    elif args.benchmark == 'catalog':
+        benchmark_catalog(args.reruns, args.threads)
+    elif args.benchmark == 'nutrition':
+        benchmark_nutrition(args.plans, args.meals, args.repeat)
+    elif args.benchmark == 'nutrition-batch':
+        benchmark_nutrition_batch(args.users, args.days, args.entries)
+    elif args.benchmark == 'write-behind':
+        benchmark_write_behind(args.users, args.events)
+    elif args.benchmark == 'async-page':
+        benchmark_async_page(args.users, args.workouts, args.pages)
+    elif args.benchmark == 'startup':
+        benchmark_startup(args.repeat)
+    elif args.benchmark == 'imports':
+        benchmark_imports(args.repeat, args.top, args.check)
+    elif args.benchmark == 'fragments':
+        benchmark_fragments(args.clicks)
+    elif args.benchmark == 'css':
+        benchmark_css(args.reruns, args.theme_changes)
+    elif args.benchmark == 'kids':
+        benchmark_kids(args.activities, args.repeat)
+
+if __name__ == "__main__":
+    main()
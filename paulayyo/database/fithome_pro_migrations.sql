@@ -0,0 +1,358 @@
+-- Migraciones FitHome Pro - SQLite
+-- Cada bloque "-- migración N: ..." se aplica una sola vez, en orden y en su propia
+-- transacción; la última versión aplicada queda en PRAGMA user_version.
+-- Las migraciones ya publicadas no se editan: los cambios van en una migración nueva.
+
+-- migración 1: índices de carga por lotes
+
+-- Carga por lotes de ejercicios de varios entrenamientos
+CREATE INDEX IF NOT EXISTS idx_ejercicios_entrenamiento_orden ON ejercicios(entrenamiento_id, orden_ejercicio);
+
+-- Carga de las comidas de todos los planes en una consulta
+CREATE INDEX IF NOT EXISTS idx_comidas_plan ON comidas(plan_nutricional_id, id);
+
+-- Paginación por clave del contenido multimedia (rating, año, id)
+CREATE INDEX IF NOT EXISTS idx_contenido_activo_orden ON contenido_multimedia(activo, rating_promedio DESC, año_produccion DESC, id DESC);
+
+-- Filtros de actividades infantiles por tipo, dificultad y rango de edad
+CREATE INDEX IF NOT EXISTS idx_actividades_tipo_edad ON actividades_infantiles(activo, tipo, edad_minima, edad_maxima);
+CREATE INDEX IF NOT EXISTS idx_actividades_dificultad_edad ON actividades_infantiles(activo, dificultad, edad_minima, edad_maxima);
+CREATE INDEX IF NOT EXISTS idx_actividades_edad ON actividades_infantiles(activo, edad_minima, edad_maxima);
+
+-- Recálculo de los contadores de popularidad de cada entrenamiento
+CREATE INDEX IF NOT EXISTS idx_sesiones_entrenamiento_completado ON sesiones_entrenamiento(entrenamiento_id, completado, rating_usuario);
+
+-- migración 2: totales acumulados por usuario
+
+-- Totales acumulados por usuario mantenidos en la ruta de escritura
+CREATE TABLE IF NOT EXISTS estadisticas_usuario_totales (
+    usuario_id INTEGER PRIMARY KEY,
+    total_entrenamientos INTEGER DEFAULT 0,
+    total_calorias INTEGER DEFAULT 0,
+    total_minutos INTEGER DEFAULT 0,
+    fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+);
+
+-- Carga inicial de los totales para usuarios que aún no los tienen
+INSERT OR IGNORE INTO estadisticas_usuario_totales (usuario_id, total_entrenamientos, total_calorias, total_minutos)
+SELECT usuario_id, COUNT(*), COALESCE(SUM(calorias_quemadas), 0), COALESCE(SUM(duracion_real_minutos), 0)
+FROM sesiones_entrenamiento
+WHERE completado = 1 AND usuario_id IS NOT NULL
+GROUP BY usuario_id;
+
+-- migración 3: rachas por usuario
+
+-- Rachas por usuario: última racha, racha máxima y último día entrenado
+CREATE TABLE IF NOT EXISTS rachas_usuario (
+    usuario_id INTEGER PRIMARY KEY,
+    racha_actual INTEGER DEFAULT 0,
+    racha_maxima INTEGER DEFAULT 0,
+    ultima_fecha DATE,
+    FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+);
+
+-- Carga inicial de las rachas (islas de días consecutivos). Los días son locales
+-- (DATE(..., 'localtime')), igual que las estadísticas del día y el análisis en pandas
+INSERT OR IGNORE INTO rachas_usuario (usuario_id, racha_actual, racha_maxima, ultima_fecha)
+WITH dias AS (
+    SELECT DISTINCT usuario_id, DATE(COALESCE(fecha_fin, fecha_inicio), 'localtime') AS dia
+    FROM sesiones_entrenamiento
+    WHERE completado = 1 AND usuario_id IS NOT NULL
+),
+islas AS (
+    SELECT usuario_id, MAX(dia) AS fin, COUNT(*) AS longitud
+    FROM (
+        SELECT usuario_id, dia,
+               julianday(dia) - ROW_NUMBER() OVER (PARTITION BY usuario_id ORDER BY dia) AS grupo
+        FROM dias
+    )
+    GROUP BY usuario_id, grupo
+),
+ordenadas AS (
+    SELECT usuario_id, fin, longitud,
+           ROW_NUMBER() OVER (PARTITION BY usuario_id ORDER BY fin DESC) AS orden
+    FROM islas
+)
+SELECT usuario_id, MAX(CASE WHEN orden = 1 THEN longitud END), MAX(longitud), MAX(fin)
+FROM ordenadas
+GROUP BY usuario_id;
+
+-- migración 4: versiones de los catálogos
+
+-- Versión de cada tabla de catálogo para invalidar la caché de catálogos
+CREATE TABLE IF NOT EXISTS versiones_catalogo (
+    tabla TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO versiones_catalogo (tabla) VALUES
+    ('entrenamientos'), ('ejercicios'), ('planes_nutricionales'),
+    ('comidas'), ('actividades_infantiles'), ('contenido_multimedia');
+
+-- entrenamientos: solo las columnas de contenido; los contadores de popularidad no invalidan
+CREATE TRIGGER IF NOT EXISTS trg_entrenamientos_version_ins AFTER INSERT ON entrenamientos
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'entrenamientos';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_entrenamientos_version_upd AFTER UPDATE OF nombre, descripcion, duracion_minutos, nivel, categoria, calorias_estimadas, imagen_url, creado_por, activo ON entrenamientos
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'entrenamientos';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_entrenamientos_version_del AFTER DELETE ON entrenamientos
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'entrenamientos';
+END;
+
+-- ejercicios
+CREATE TRIGGER IF NOT EXISTS trg_ejercicios_version_ins AFTER INSERT ON ejercicios
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'ejercicios';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_ejercicios_version_upd AFTER UPDATE ON ejercicios
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'ejercicios';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_ejercicios_version_del AFTER DELETE ON ejercicios
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'ejercicios';
+END;
+
+-- planes_nutricionales
+CREATE TRIGGER IF NOT EXISTS trg_planes_nutricionales_version_ins AFTER INSERT ON planes_nutricionales
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'planes_nutricionales';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_planes_nutricionales_version_upd AFTER UPDATE ON planes_nutricionales
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'planes_nutricionales';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_planes_nutricionales_version_del AFTER DELETE ON planes_nutricionales
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'planes_nutricionales';
+END;
+
+-- comidas
+CREATE TRIGGER IF NOT EXISTS trg_comidas_version_ins AFTER INSERT ON comidas
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'comidas';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_comidas_version_upd AFTER UPDATE ON comidas
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'comidas';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_comidas_version_del AFTER DELETE ON comidas
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'comidas';
+END;
+
+-- actividades_infantiles
+CREATE TRIGGER IF NOT EXISTS trg_actividades_infantiles_version_ins AFTER INSERT ON actividades_infantiles
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'actividades_infantiles';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_actividades_infantiles_version_upd AFTER UPDATE ON actividades_infantiles
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'actividades_infantiles';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_actividades_infantiles_version_del AFTER DELETE ON actividades_infantiles
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'actividades_infantiles';
+END;
+
+-- contenido_multimedia
+CREATE TRIGGER IF NOT EXISTS trg_contenido_multimedia_version_ins AFTER INSERT ON contenido_multimedia
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'contenido_multimedia';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_contenido_multimedia_version_upd AFTER UPDATE ON contenido_multimedia
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'contenido_multimedia';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_contenido_multimedia_version_del AFTER DELETE ON contenido_multimedia
+BEGIN
+    UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'contenido_multimedia';
+END;
+
+-- migración 5: búsqueda de texto completo
+
+-- Índice de texto completo sobre los catálogos. El rowid codifica el origen:
+-- rowid = id * 8 + tipo (1 entrenamiento, 2 ejercicio, 3 comida, 4 actividad, 5 multimedia)
+CREATE VIRTUAL TABLE IF NOT EXISTS busqueda_fts USING fts5(
+    titulo,
+    contenido,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+-- entrenamientos
+CREATE TRIGGER IF NOT EXISTS trg_entrenamientos_fts_ins AFTER INSERT ON entrenamientos
+BEGIN
+    INSERT INTO busqueda_fts (rowid, titulo, contenido)
+    SELECT NEW.id * 8 + 1, NEW.nombre,
+           COALESCE(NEW.descripcion, '') || ' ' || COALESCE(NEW.categoria, '') || ' ' || COALESCE(NEW.nivel, '')
+    WHERE NEW.activo;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_entrenamientos_fts_upd AFTER UPDATE OF nombre, descripcion, categoria, nivel, activo ON entrenamientos
+BEGIN
+    DELETE FROM busqueda_fts WHERE rowid = OLD.id * 8 + 1;
+    INSERT INTO busqueda_fts (rowid, titulo, contenido)
+    SELECT NEW.id * 8 + 1, NEW.nombre,
+           COALESCE(NEW.descripcion, '') || ' ' || COALESCE(NEW.categoria, '') || ' ' || COALESCE(NEW.nivel, '')
+    WHERE NEW.activo;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_entrenamientos_fts_del AFTER DELETE ON entrenamientos
+BEGIN
+    DELETE FROM busqueda_fts WHERE rowid = OLD.id * 8 + 1;
+END;
+
+-- Carga inicial del índice
+INSERT INTO busqueda_fts (rowid, titulo, contenido)
+SELECT x.id * 8 + 1, x.nombre,
+       COALESCE(x.descripcion, '') || ' ' || COALESCE(x.categoria, '') || ' ' || COALESCE(x.nivel, '')
+FROM entrenamientos x
+WHERE x.activo AND NOT EXISTS (SELECT 1 FROM busqueda_fts WHERE rowid = x.id * 8 + 1);
+
+-- ejercicios
+CREATE TRIGGER IF NOT EXISTS trg_ejercicios_fts_ins AFTER INSERT ON ejercicios
+BEGIN
+    INSERT INTO busqueda_fts (rowid, titulo, contenido)
+    SELECT NEW.id * 8 + 2, NEW.nombre,
+           COALESCE(NEW.descripcion, '') || ' ' || COALESCE(NEW.instrucciones, '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_ejercicios_fts_upd AFTER UPDATE OF nombre, descripcion, instrucciones ON ejercicios
+BEGIN
+    DELETE FROM busqueda_fts WHERE rowid = OLD.id * 8 + 2;
+    INSERT INTO busqueda_fts (rowid, titulo, contenido)
+    SELECT NEW.id * 8 + 2, NEW.nombre,
+           COALESCE(NEW.descripcion, '') || ' ' || COALESCE(NEW.instrucciones, '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_ejercicios_fts_del AFTER DELETE ON ejercicios
+BEGIN
+    DELETE FROM busqueda_fts WHERE rowid = OLD.id * 8 + 2;
+END;
+
+-- Carga inicial del índice
+INSERT INTO busqueda_fts (rowid, titulo, contenido)
+SELECT x.id * 8 + 2, x.nombre,
+       COALESCE(x.descripcion, '') || ' ' || COALESCE(x.instrucciones, '')
+FROM ejercicios x
+WHERE NOT EXISTS (SELECT 1 FROM busqueda_fts WHERE rowid = x.id * 8 + 2);
+
+-- comidas
+CREATE TRIGGER IF NOT EXISTS trg_comidas_fts_ins AFTER INSERT ON comidas
+BEGIN
+    INSERT INTO busqueda_fts (rowid, titulo, contenido)
+    SELECT NEW.id * 8 + 3, NEW.nombre,
+           COALESCE(NEW.tipo, '') || ' ' || COALESCE(NEW.ingredientes, '') || ' ' || COALESCE(NEW.instrucciones, '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_comidas_fts_upd AFTER UPDATE OF nombre, tipo, ingredientes, instrucciones ON comidas
+BEGIN
+    DELETE FROM busqueda_fts WHERE rowid = OLD.id * 8 + 3;
+    INSERT INTO busqueda_fts (rowid, titulo, contenido)
+    SELECT NEW.id * 8 + 3, NEW.nombre,
+           COALESCE(NEW.tipo, '') || ' ' || COALESCE(NEW.ingredientes, '') || ' ' || COALESCE(NEW.instrucciones, '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_comidas_fts_del AFTER DELETE ON comidas
+BEGIN
+    DELETE FROM busqueda_fts WHERE rowid = OLD.id * 8 + 3;
+END;
+
+-- Carga inicial del índice
+INSERT INTO busqueda_fts (rowid, titulo, contenido)
+SELECT x.id * 8 + 3, x.nombre,
+       COALESCE(x.tipo, '') || ' ' || COALESCE(x.ingredientes, '') || ' ' || COALESCE(x.instrucciones, '')
+FROM comidas x
+WHERE NOT EXISTS (SELECT 1 FROM busqueda_fts WHERE rowid = x.id * 8 + 3);
+
+-- actividades_infantiles
+CREATE TRIGGER IF NOT EXISTS trg_actividades_infantiles_fts_ins AFTER INSERT ON actividades_infantiles
+BEGIN
+    INSERT INTO busqueda_fts (rowid, titulo, contenido)
+    SELECT NEW.id * 8 + 4, NEW.nombre,
+           COALESCE(NEW.tipo, '') || ' ' || COALESCE(NEW.materiales, '') || ' ' || COALESCE(NEW.beneficios, '') || ' ' || COALESCE(NEW.instrucciones, '')
+    WHERE NEW.activo;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_actividades_infantiles_fts_upd AFTER UPDATE OF nombre, tipo, materiales, beneficios, instrucciones, activo ON actividades_infantiles
+BEGIN
+    DELETE FROM busqueda_fts WHERE rowid = OLD.id * 8 + 4;
+    INSERT INTO busqueda_fts (rowid, titulo, contenido)
+    SELECT NEW.id * 8 + 4, NEW.nombre,
+           COALESCE(NEW.tipo, '') || ' ' || COALESCE(NEW.materiales, '') || ' ' || COALESCE(NEW.beneficios, '') || ' ' || COALESCE(NEW.instrucciones, '')
+    WHERE NEW.activo;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_actividades_infantiles_fts_del AFTER DELETE ON actividades_infantiles
+BEGIN
+    DELETE FROM busqueda_fts WHERE rowid = OLD.id * 8 + 4;
+END;
+
+-- Carga inicial del índice
+INSERT INTO busqueda_fts (rowid, titulo, contenido)
+SELECT x.id * 8 + 4, x.nombre,
+       COALESCE(x.tipo, '') || ' ' || COALESCE(x.materiales, '') || ' ' || COALESCE(x.beneficios, '') || ' ' || COALESCE(x.instrucciones, '')
+FROM actividades_infantiles x
+WHERE x.activo AND NOT EXISTS (SELECT 1 FROM busqueda_fts WHERE rowid = x.id * 8 + 4);
+
+-- contenido_multimedia
+CREATE TRIGGER IF NOT EXISTS trg_contenido_multimedia_fts_ins AFTER INSERT ON contenido_multimedia
+BEGIN
+    INSERT INTO busqueda_fts (rowid, titulo, contenido)
+    SELECT NEW.id * 8 + 5, NEW.titulo,
+           COALESCE(NEW.genero, '') || ' ' || COALESCE(NEW.descripcion, '') || ' ' || COALESCE(NEW.elenco, '') || ' ' || COALESCE(NEW.director, '')
+    WHERE NEW.activo;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_contenido_multimedia_fts_upd AFTER UPDATE OF titulo, genero, descripcion, elenco, director, activo ON contenido_multimedia
+BEGIN
+    DELETE FROM busqueda_fts WHERE rowid = OLD.id * 8 + 5;
+    INSERT INTO busqueda_fts (rowid, titulo, contenido)
+    SELECT NEW.id * 8 + 5, NEW.titulo,
+           COALESCE(NEW.genero, '') || ' ' || COALESCE(NEW.descripcion, '') || ' ' || COALESCE(NEW.elenco, '') || ' ' || COALESCE(NEW.director, '')
+    WHERE NEW.activo;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_contenido_multimedia_fts_del AFTER DELETE ON contenido_multimedia
+BEGIN
+    DELETE FROM busqueda_fts WHERE rowid = OLD.id * 8 + 5;
+END;
+
+-- Carga inicial del índice
+INSERT INTO busqueda_fts (rowid, titulo, contenido)
+SELECT x.id * 8 + 5, x.titulo,
+       COALESCE(x.genero, '') || ' ' || COALESCE(x.descripcion, '') || ' ' || COALESCE(x.elenco, '') || ' ' || COALESCE(x.director, '')
+FROM contenido_multimedia x
+WHERE x.activo AND NOT EXISTS (SELECT 1 FROM busqueda_fts WHERE rowid = x.id * 8 + 5);
+
+-- migración 6: número de valoraciones por entrenamiento
+
+-- rating_promedio es la media de las sesiones valoradas: su peso es el número de
+-- valoraciones, no el de completados (que incluye sesiones sin rating)
+ALTER TABLE entrenamientos ADD COLUMN total_valoraciones INTEGER DEFAULT 0;
+
+-- Los valores iniciales se mantuvieron como si cada completado tuviera valoración;
+-- se descuentan las sesiones completadas sin rating
+UPDATE entrenamientos
+SET total_valoraciones = MAX(COALESCE(total_completados, 0) - COALESCE((
+    SELECT COUNT(*) FROM sesiones_entrenamiento s
+    WHERE s.entrenamiento_id = entrenamientos.id
+      AND s.completado = 1 AND s.rating_usuario IS NULL
+), 0), 0);
@@ -8,6 +8,8 @@ import sqlite3
 import os
 from datetime import datetime, timedelta
 
+from src.app_logic import MigrationError, apply_migrations
+
 def create_database():
     """Create and initialize the SQLite database"""
     
@@ -43,6 +45,15 @@ def create_database():
                     print(f"Line: {line[:100]}...")
     
     conn.commit()
+    
+    # Apply numbered migrations (indexes, derived tables, triggers) and record
+    # them in PRAGMA user_version so the app does not run them again
+    try:
+        applied = apply_migrations(conn)
+        print(f"Applied {applied} migrations")
+    except MigrationError as e:
+        print(f"Error applying migrations: {e}")
+        raise
     print("Database created successfully!")
     
     # Verify tables were created
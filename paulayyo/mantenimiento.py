@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+FitHome Pro - Tareas de Mantenimiento
+Trabajos por lotes sobre la base de datos
+
+Uso:
+    python mantenimiento.py logros [--intervalo SEGUNDOS]
+    python mantenimiento.py acumulados [--usuario ID]
+    python mantenimiento.py popularidad [--intervalo SEGUNDOS]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Permitir importar los módulos de src/ igual que main.py
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.app_logic import SQLiteDatabase, AchievementEngine, UserService, WorkoutService
+
+def reevaluate_achievements(database, interval=None):
+    """Reevaluar los logros de todos los usuarios (una vez o periódicamente)"""
+    engine = AchievementEngine(database)
+    
+    if not interval:
+        start = time.perf_counter()
+        granted = engine.evaluate_all_users()
+        print(f"✅ Logros reevaluados: {granted} nuevos en {time.perf_counter() - start:.2f}s")
+        return
+    
+    print(f"🔁 Reevaluando logros cada {interval}s (Ctrl+C para detener)")
+    engine.start_background_reevaluation(interval)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        engine.stop_background_reevaluation()
+
+def rebuild_rollups(database, user_id=None):
+    """Reconstruir los acumulados de estadísticas desde las sesiones"""
+    start = time.perf_counter()
+    rebuilt = UserService(database).rebuild_stat_rollups(user_id)
+    print(f"✅ Acumulados reconstruidos para {rebuilt} usuarios en {time.perf_counter() - start:.2f}s")
+
+def recompute_popularity(database, interval=None):
+    """Recalcular los contadores de popularidad de los entrenamientos (una vez o periódicamente)"""
+    service = WorkoutService(database)
+    
+    if interval:
+        print(f"🔁 Recalculando popularidad cada {interval}s (Ctrl+C para detener)")
+    
+    try:
+        while True:
+            start = time.perf_counter()
+            updated = service.recompute_popularity()
+            print(f"✅ Popularidad recalculada para {updated} entrenamientos en {time.perf_counter() - start:.2f}s")
+            if not interval:
+                return
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+def main():
+    """Función principal de mantenimiento"""
+    parser = argparse.ArgumentParser(description="Tareas de mantenimiento de FitHome Pro")
+    parser.add_argument('--db', default='fithome_pro.db', help="Ruta de la base de datos")
+    subparsers = parser.add_subparsers(dest='task', required=True)
+    
+    achievements_parser = subparsers.add_parser('logros', help="Reevaluar los logros de todos los usuarios")
+    achievements_parser.add_argument('--intervalo', type=float, default=None,
+                                     help="Repetir cada N segundos en segundo plano")
+    
+    rollups_parser = subparsers.add_parser('acumulados', help="Reconstruir totales y estadísticas diarias")
+    rollups_parser.add_argument('--usuario', type=int, default=None, help="Solo este usuario")
+    
+    popularity_parser = subparsers.add_parser('popularidad', help="Recalcular completados y valoración media")
+    popularity_parser.add_argument('--intervalo', type=float, default=None,
+                                   help="Repetir cada N segundos")
+    
+    args = parser.parse_args()
+    
+    database = SQLiteDatabase(args.db)
+    if not database.connect():
+        print("❌ No se pudo conectar a la base de datos")
+        sys.exit(1)
+    
+    try:
+        if args.task == 'logros':
+            reevaluate_achievements(database, args.intervalo)
+        elif args.task == 'acumulados':
+            rebuild_rollups(database, args.usuario)
+        elif args.task == 'popularidad':
+            recompute_popularity(database, args.intervalo)
+    finally:
+        database.close()
+
+if __name__ == "__main__":
+    main()
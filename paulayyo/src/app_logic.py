@@ -6,26 +6,39 @@ Autor: Equipo FitHome Pro
 Fecha: 2025
 """
 
-import streamlit as st
 import time
 import datetime
 import hashlib
 import json
 import sqlite3
-import pandas as pd
-import matplotlib.pyplot as plt
-import plotly.express as px
-import plotly.graph_objects as go
-from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Tuple
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Any, Callable, Iterable, List, Dict, Optional, Tuple
 from abc import ABC, abstractmethod
+import atexit
+import functools
 import logging
+import re
+import threading
+import weakref
+from collections import deque
+from collections.abc import Mapping
+from contextlib import contextmanager
 from pathlib import Path
 
+from src.cache import CacheStats, FigureCache, TTLCache, cached_figure, data_versions
+
+# streamlit y plotly se importan donde se usan: los scripts de mantenimiento y
+# los servicios no deben pagar su carga al arrancar
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
 # Configuración de logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Migraciones idempotentes que se aplican sobre bases de datos existentes
+MIGRATIONS_PATH = Path(__file__).resolve().parent.parent / 'database' / 'fithome_pro_migrations.sql'
+
 # =============================================================================
 # CLASES DE DATOS
 # =============================================================================
@@ -76,6 +89,7 @@ class Workout:
     rating: float
     completions: int
     created_by: int = 0
+    exercises_loaded: bool = True
 
 @dataclass
 class KidsActivity:
@@ -105,6 +119,17 @@ class Movie:
     cast: List[str]
     is_premium: bool = False
 
+@dataclass
+class MoviePage:
+    """Página de contenido multimedia con el cursor para pedir la siguiente"""
+    movies: List[Movie]
+    next_cursor: Optional[Tuple[float, int, int]] = None
+
+    @property
+    def has_more(self) -> bool:
+        """Hay más contenido después de esta página"""
+        return self.next_cursor is not None
+
 @dataclass
 class NutritionPlan:
     """Plan nutricional"""
@@ -115,6 +140,43 @@ class NutritionPlan:
     proteins_percentage: int
     fats_percentage: int
     meals: List[Dict]
+    meals_loaded: bool = True
+
+@dataclass
+class SearchResult:
+    """Resultado de la búsqueda de texto completo"""
+    kind: str
+    id: int
+    title: str
+    snippet: str
+    score: float
+    icon: str = '🔎'
+    label: str = ''
+
+@dataclass
+class NutritionBatchResult:
+    """Resultado de un registro nutricional por lotes"""
+    success: bool
+    records: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """Filas escritas por segundo"""
+        return round(self.rows / self.seconds, 1) if self.seconds else 0.0
+
+@dataclass
+class HydrationDay:
+    """Vasos de agua de un usuario en un día"""
+    date: str
+    glasses: int = 0
+    goal: int = 8
+
+    @property
+    def progress(self) -> float:
+        """Proporción de la meta cubierta, entre 0 y 1"""
+        return min(1.0, self.glasses / self.goal) if self.goal else 0.0
 
 # =============================================================================
 # INTERFACES ABSTRACTAS
@@ -134,12 +196,17 @@ class DatabaseInterface(ABC):
     @abstractmethod
     def execute_update(self, query: str, params: tuple = ()) -> bool:
         pass
+    
+    @abstractmethod
+    def transaction(self):
+        """Context manager que agrupa varias escrituras en una sola transacción"""
+        pass
 
 class AnalyticsInterface(ABC):
     """Interfaz para análisis de datos"""
     
     @abstractmethod
-    def generate_progress_chart(self, user_id: int) -> go.Figure:
+    def generate_progress_chart(self, user_id: int) -> "go.Figure":
         pass
     
     @abstractmethod
@@ -150,21 +217,203 @@ class AnalyticsInterface(ABC):
 # IMPLEMENTACIONES CONCRETAS
 # =============================================================================
 
+@dataclass
+class PoolMetrics:
+    """Métricas del pool de conexiones"""
+    max_size: int = 0
+    open_connections: int = 0
+    idle_connections: int = 0
+    in_use: int = 0
+    total_checkouts: int = 0
+    total_waits: int = 0
+    total_wait_ms: float = 0.0
+    max_wait_ms: float = 0.0
+    discarded_connections: int = 0
+
+    @property
+    def average_wait_ms(self) -> float:
+        """Tiempo medio de espera por checkout que tuvo que esperar"""
+        return round(self.total_wait_ms / self.total_waits, 3) if self.total_waits else 0.0
+
+class ConnectionPool:
+    """Pool acotado de conexiones SQLite con afinidad por thread"""
+    
+    # PRAGMAs que se aplican una sola vez al abrir cada conexión
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA busy_timeout=5000",
+        "PRAGMA temp_store=MEMORY",
+    )
+    
+    def __init__(self, db_path: str, max_size: int = 5, timeout: float = 10.0,
+                 health_check_interval: float = 30.0):
+        self.db_path = db_path
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle = deque()  # (conexión, instante de último uso)
+        self._open = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._metrics = PoolMetrics(max_size=self.max_size)
+    
+    @contextmanager
+    def connection(self):
+        """Obtener la conexión del thread actual (reentrante) durante el bloque"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            # El thread ya tiene una conexión prestada: reutilizarla
+            yield conn
+            return
+        
+        conn = self._acquire()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._release(conn)
+    
+    def metrics(self) -> PoolMetrics:
+        """Obtener una copia de las métricas actuales del pool"""
+        with self._cond:
+            idle = len(self._idle)
+            return PoolMetrics(
+                max_size=self.max_size,
+                open_connections=self._open,
+                idle_connections=idle,
+                in_use=self._open - idle,
+                total_checkouts=self._metrics.total_checkouts,
+                total_waits=self._metrics.total_waits,
+                total_wait_ms=round(self._metrics.total_wait_ms, 3),
+                max_wait_ms=round(self._metrics.max_wait_ms, 3),
+                discarded_connections=self._metrics.discarded_connections
+            )
+    
+    def close(self):
+        """Cerrar todas las conexiones ociosas y rechazar nuevos checkouts"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._open -= 1
+                self._close_quietly(conn)
+            self._cond.notify_all()
+    
+    def _acquire(self) -> sqlite3.Connection:
+        """Tomar una conexión ociosa, abrir una nueva o esperar a que se libere una"""
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        conn, last_used = None, 0.0
+        
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("El pool de conexiones está cerrado")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._open < self.max_size:
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"No hay conexiones libres tras {self.timeout}s (máximo {self.max_size})")
+                waited = True
+                self._cond.wait(remaining)
+            
+            wait_ms = (time.perf_counter() - start) * 1000
+            self._metrics.total_checkouts += 1
+            if waited:
+                self._metrics.total_waits += 1
+                self._metrics.total_wait_ms += wait_ms
+                self._metrics.max_wait_ms = max(self._metrics.max_wait_ms, wait_ms)
+        
+        try:
+            if conn is None:
+                return self._create_connection()
+            if time.monotonic() - last_used > self.health_check_interval and not self._is_healthy(conn):
+                with self._cond:
+                    self._metrics.discarded_connections += 1
+                self._close_quietly(conn)
+                return self._create_connection()
+            return conn
+        except Exception:
+            # Liberar el hueco reservado si no se pudo abrir la conexión
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+    
+    def _release(self, conn: sqlite3.Connection):
+        """Devolver la conexión al pool"""
+        try:
+            if conn.in_transaction:
+                # Nunca devolver al pool una transacción a medias
+                conn.rollback()
+        except sqlite3.Error:
+            with self._cond:
+                self._open -= 1
+                self._metrics.discarded_connections += 1
+                self._cond.notify()
+            self._close_quietly(conn)
+            return
+        
+        with self._cond:
+            if self._closed:
+                self._open -= 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+    
+    def _create_connection(self) -> sqlite3.Connection:
+        """Abrir una conexión nueva y aplicar los PRAGMAs una sola vez"""
+        # check_same_thread=False: la conexión puede pasar a otro thread entre checkouts
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        """Comprobar que una conexión ociosa sigue siendo utilizable"""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+    
+    @staticmethod
+    def _close_quietly(conn: sqlite3.Connection):
+        """Cerrar una conexión ignorando errores"""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
 class SQLiteDatabase(DatabaseInterface):
     """Implementación de base de datos SQLite"""
     
-    def __init__(self, db_path: str = "fithome_pro.db"):
+    def __init__(self, db_path: str = "fithome_pro.db", pool_size: int = 5,
+                 pool_timeout: float = 10.0):
         self.db_path = db_path
-        self.connection = None
+        self.pool = ConnectionPool(db_path, max_size=pool_size, timeout=pool_timeout)
+        # Consultas fallidas: execute_query devuelve [] y CatalogCache no debe cachearlo
+        self.query_errors = 0
+        self._errors_lock = threading.Lock()
     
     def connect(self) -> bool:
         """Establecer conexión con la base de datos"""
         try:
-            # Usar check_same_thread=False para permitir uso entre threads
-            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
-            self.connection.row_factory = sqlite3.Row
-            # Habilitar WAL mode para mejor concurrencia
-            self.connection.execute("PRAGMA journal_mode=WAL")
+            # Abrir la primera conexión del pool para validar la ruta y los PRAGMAs
+            with self.pool.connection() as conn:
+                apply_migrations(conn)
             return True
         except Exception as e:
             logger.error(f"Error conectando a la base de datos: {e}")
@@ -173,44 +422,415 @@ class SQLiteDatabase(DatabaseInterface):
     def execute_query(self, query: str, params: tuple = ()) -> List[Dict]:
         """Ejecutar consulta SELECT"""
         try:
-            # Crear nueva conexión para cada operación para evitar problemas de threads
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            conn.close()
+            with self.pool.connection() as conn:
+                rows = conn.execute(query, params).fetchall()
             return [dict(row) for row in rows]
         except Exception as e:
             logger.error(f"Error ejecutando consulta: {e}")
+            with self._errors_lock:
+                self.query_errors += 1
             return []
     
     def execute_update(self, query: str, params: tuple = ()) -> bool:
         """Ejecutar consulta INSERT/UPDATE/DELETE"""
         try:
-            # Crear nueva conexión para cada operación para evitar problemas de threads
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            conn.commit()
-            conn.close()
+            with self.pool.connection() as conn:
+                # Dentro de transaction() el commit lo hace la transacción externa
+                in_transaction = conn.in_transaction
+                conn.execute(query, params)
+                if not in_transaction:
+                    conn.commit()
             return True
         except Exception as e:
             logger.error(f"Error ejecutando actualización: {e}")
             return False
     
+    @contextmanager
+    def transaction(self):
+        """Ejecutar un bloque de escrituras en una conexión y con un único commit"""
+        with self.pool.connection() as conn:
+            if conn.in_transaction:
+                # Transacción anidada: se integra en la externa
+                yield conn
+                return
+            
+            # IMMEDIATE toma el bloqueo de escritura al empezar y evita
+            # interbloqueos al promocionar una lectura a escritura
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+    
+    def get_pool_metrics(self) -> PoolMetrics:
+        """Obtener métricas del pool de conexiones"""
+        return self.pool.metrics()
+    
     def close(self):
-        """Cerrar conexión"""
-        if self.connection:
-            self.connection.close()
+        """Cerrar conexiones"""
+        self.pool.close()
+
+class MigrationError(sqlite3.DatabaseError):
+    """Error al leer o aplicar una migración del esquema"""
+
+# Cabecera de cada migración numerada en el fichero de migraciones
+MIGRATION_HEADER = re.compile(r'^--\s*migración\s+(\d+)\b', re.IGNORECASE)
+
+def load_migrations(path: Path = MIGRATIONS_PATH) -> List[Tuple[int, List[str]]]:
+    """Leer las migraciones numeradas del fichero como (versión, sentencias)"""
+    migrations: List[Tuple[int, List[str]]] = []
+    statement = ""
+    for line in path.read_text(encoding='utf-8').splitlines(keepends=True):
+        if not statement:
+            header = MIGRATION_HEADER.match(line.strip())
+            if header:
+                version = int(header.group(1))
+                if migrations and version <= migrations[-1][0]:
+                    raise MigrationError(f"Migración {version} fuera de orden en {path.name}")
+                migrations.append((version, []))
+                continue
+            if not line.strip() or line.lstrip().startswith('--'):
+                continue
+        statement += line
+        if not sqlite3.complete_statement(statement):
+            continue
+        if not migrations:
+            raise MigrationError(f"Sentencia fuera de una migración numerada en {path.name}")
+        migrations[-1][1].append(statement)
+        statement = ""
+    
+    if statement.strip():
+        raise MigrationError(f"Sentencia incompleta al final de {path.name}")
+    return migrations
+
+def apply_migrations(conn: sqlite3.Connection, path: Path = MIGRATIONS_PATH) -> int:
+    """Aplicar las migraciones posteriores a PRAGMA user_version, una sola vez y en orden
+    
+    Cada migración va en su propia transacción junto con el nuevo user_version,
+    así que una migración fallida se deshace entera y lanza MigrationError en
+    lugar de dejar el esquema a medias. Devuelve cuántas migraciones se aplicaron.
+    """
+    if not path.exists():
+        return 0
+    
+    migrations = load_migrations(path)
+    if not migrations or conn.execute("PRAGMA user_version").fetchone()[0] >= migrations[-1][0]:
+        return 0
+    
+    applied = 0
+    for version, statements in migrations:
+        # IMMEDIATE serializa a dos procesos que arrancan a la vez; la versión
+        # se vuelve a leer ya con el bloqueo tomado
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                conn.rollback()
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise MigrationError(f"Error aplicando la migración {version}: {e}") from e
+        applied += 1
+        logger.info(f"Migración {version} aplicada")
+    return applied
+
+# =============================================================================
+# ESCRITURA DIFERIDA
+# =============================================================================
+
+@dataclass
+class WriteQueueMetrics:
+    """Métricas de la cola de escritura diferida"""
+    submitted: int = 0
+    written: int = 0
+    failed: int = 0
+    batches: int = 0
+    pending: int = 0
+    total_batch_ms: float = 0.0
+    max_batch_ms: float = 0.0
+    max_queue_delay_ms: float = 0.0
+
+    @property
+    def average_batch_size(self) -> float:
+        """Eventos escritos por transacción"""
+        return round(self.written / self.batches, 2) if self.batches else 0.0
+
+# Colas abiertas; un único hook de atexit las cierra sin retener las ya descartadas
+_open_write_queues = weakref.WeakSet()
+
+@atexit.register
+def _close_write_queues():
+    """Escribir lo pendiente de las colas abiertas al salir del intérprete"""
+    for queue in list(_open_write_queues):
+        queue.close(5.0)
+
+class WriteBehindQueue:
+    """Cola de escritura diferida con un único thread escritor
+    
+    Los servicios registran un manejador `handler(conn, *args)` por tipo de
+    evento y encolan eventos con `submit`, que vuelve sin tocar el disco. El
+    thread escritor agrupa los eventos pendientes en una sola transacción cuando
+    hay `max_batch` encolados o el más antiguo lleva `max_delay` segundos
+    esperando, así que ese es el máximo que se puede perder si el proceso muere.
+    Tras el commit se llama a `on_commit(*args, resultado)` de cada evento.
+    `flush()` fuerza la escritura de lo encolado y espera a que termine.
+    """
+    
+    def __init__(self, database: DatabaseInterface, max_batch: int = 200,
+                 max_delay: float = 0.5, max_pending: int = 10000):
+        self.db = database
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self.max_pending = max(self.max_batch, max_pending)
+        self._handlers: Dict[str, tuple] = {}
+        self._pending = deque()  # (secuencia, tipo, argumentos, instante de encolado)
+        self._submitted_seq = 0
+        self._written_seq = 0
+        self._flush_requested = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._worker = None
+        self._metrics = WriteQueueMetrics()
+        # El thread escritor es daemon: escribir lo pendiente al salir del intérprete
+        _open_write_queues.add(self)
+    
+    def register(self, kind: str, handler, on_commit=None):
+        """Registrar el manejador de un tipo de evento y su callback tras el commit"""
+        self._handlers[kind] = (handler, on_commit)
+    
+    def submit(self, kind: str, *args) -> bool:
+        """Encolar un evento para escribirlo en el siguiente lote"""
+        if kind not in self._handlers:
+            logger.error(f"Tipo de evento de escritura no registrado: {kind}")
+            return False
+        
+        with self._cond:
+            if not self._closed:
+                # Contrapresión: si el escritor no da abasto, esperar a que haya hueco
+                self._cond.wait_for(lambda: len(self._pending) < self.max_pending or self._closed)
+            if not self._closed:
+                self._submitted_seq += 1
+                self._pending.append((self._submitted_seq, kind, args, time.monotonic()))
+                self._metrics.submitted += 1
+                self._ensure_worker()
+                self._cond.notify_all()
+                return True
+        
+        # Cola cerrada: escribir en el thread que llama para no perder el evento
+        return self._write_batch([(0, kind, args, time.monotonic())]) == 1
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Escribir ya todo lo encolado hasta ahora y esperar al commit"""
+        with self._cond:
+            target = self._submitted_seq
+            if self._written_seq >= target:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written_seq >= target, timeout)
+    
+    def close(self, timeout: Optional[float] = None):
+        """Escribir lo pendiente y detener el thread escritor"""
+        _open_write_queues.discard(self)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+    
+    def metrics(self) -> WriteQueueMetrics:
+        """Obtener una copia de las métricas actuales"""
+        with self._cond:
+            return replace(self._metrics, pending=len(self._pending))
+    
+    def _ensure_worker(self):
+        """Arrancar el thread escritor la primera vez que se encola algo (con el lock tomado)"""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._worker.start()
+    
+    def _next_batch(self) -> Optional[list]:
+        """Esperar a que toque escribir y sacar el siguiente lote (None al cerrar)"""
+        with self._cond:
+            while True:
+                if self._pending:
+                    waited = time.monotonic() - self._pending[0][3]
+                    if (len(self._pending) >= self.max_batch or self._flush_requested
+                            or self._closed or waited >= self.max_delay):
+                        break
+                    self._cond.wait(self.max_delay - waited)
+                elif self._closed:
+                    return None
+                else:
+                    self._flush_requested = False
+                    self._cond.wait()
+            
+            size = min(self.max_batch, len(self._pending))
+            batch = [self._pending.popleft() for _ in range(size)]
+            delay_ms = (time.monotonic() - batch[0][3]) * 1000
+            self._metrics.max_queue_delay_ms = max(self._metrics.max_queue_delay_ms, delay_ms)
+            # Despertar a los productores que esperaban hueco
+            self._cond.notify_all()
+            return batch
+    
+    def _run(self):
+        """Bucle del thread escritor"""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                logger.error(f"Error en el thread de escritura diferida: {e}")
+            with self._cond:
+                self._written_seq = batch[-1][0]
+                self._cond.notify_all()
+    
+    def _write_batch(self, batch: list) -> int:
+        """Aplicar un lote en una transacción; si falla, reintentar evento a evento"""
+        start = time.perf_counter()
+        try:
+            with self.db.transaction() as conn:
+                results = [self._handlers[kind][0](conn, *args) for _, kind, args, _ in batch]
+            written = list(zip(batch, results))
+        except Exception as e:
+            # Un evento defectuoso no debe arrastrar al resto del lote
+            logger.error(f"Error escribiendo lote diferido, reintentando evento a evento: {e}")
+            written = []
+            for event in batch:
+                _, kind, args, _ = event
+                try:
+                    with self.db.transaction() as conn:
+                        written.append((event, self._handlers[kind][0](conn, *args)))
+                except Exception as e:
+                    logger.error(f"Error escribiendo evento diferido '{kind}': {e}")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        for (_, kind, args, _), result in written:
+            on_commit = self._handlers[kind][1]
+            if on_commit is None:
+                continue
+            try:
+                on_commit(*args, result)
+            except Exception as e:
+                logger.error(f"Error tras escribir evento diferido '{kind}': {e}")
+        
+        with self._cond:
+            self._metrics.batches += 1
+            self._metrics.written += len(written)
+            self._metrics.failed += len(batch) - len(written)
+            self._metrics.total_batch_ms += elapsed_ms
+            self._metrics.max_batch_ms = max(self._metrics.max_batch_ms, elapsed_ms)
+        return len(written)
+
+# =============================================================================
+# CACHÉ DE CATÁLOGOS
+# =============================================================================
+
+# Marca de entrada ausente en CatalogCache (un catálogo cacheado puede ser vacío)
+_MISSING = object()
+
+class CatalogCache:
+    """Caché de catálogos (entrenamientos, planes, actividades, multimedia) compartida por el proceso
+    
+    Cada entrada recuerda la versión de las tablas de las que se cargó
+    (versiones_catalogo, mantenida por triggers) y solo se recarga cuando alguna
+    cambia. Las versiones se consultan como mucho una vez cada `check_interval`
+    segundos; `max_age` acota cuánto tiempo se sirven columnas que no invalidan
+    (p. ej. los contadores de popularidad de cada entrenamiento).
+    """
+    
+    VERSIONS_SQL = "SELECT tabla, version FROM versiones_catalogo"
+    
+    def __init__(self, database: DatabaseInterface, check_interval: float = 2.0,
+                 max_age: Optional[float] = 300.0):
+        self.db = database
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self._entries: Dict[str, tuple] = {}
+        self._versions: Dict[str, int] = {}
+        self._checked_at: Optional[float] = None
+        self._lock = threading.RLock()
+        self._stats = CacheStats()
+    
+    def get(self, name: str, tables: Tuple[str, ...], loader):
+        """Devolver el catálogo `name` o cargarlo con `loader` si sus tablas cambiaron"""
+        with self._lock:
+            versions = self._current_versions()
+            table_versions = tuple(versions.get(table, 0) for table in tables)
+            entry = self._entries.get(name, _MISSING)
+            if entry is not _MISSING:
+                entry_versions, loaded_at, value = entry
+                fresh = self.max_age is None or time.monotonic() - loaded_at < self.max_age
+                if entry_versions == table_versions and fresh:
+                    self._stats.hits += 1
+                    return value
+            self._stats.misses += 1
+        
+        # Cargar fuera del lock. Un resultado vacío también se cachea (p. ej. un
+        # filtro sin actividades); solo se descarta si alguna consulta falló,
+        # porque execute_query devuelve [] ante errores
+        errors_before = getattr(self.db, 'query_errors', 0)
+        value = loader()
+        if getattr(self.db, 'query_errors', 0) == errors_before:
+            with self._lock:
+                self._entries[name] = (table_versions, time.monotonic(), value)
+        return value
+    
+    def peek(self, name: str):
+        """Catálogo cargado actualmente, sin comprobar versiones ni contar lecturas"""
+        with self._lock:
+            entry = self._entries.get(name)
+            return entry[2] if entry is not None else None
+    
+    def invalidate(self, name: Optional[str] = None):
+        """Descartar un catálogo o todos"""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+            self._checked_at = None
+    
+    def stats(self) -> CacheStats:
+        """Aciertos, fallos y catálogos cargados"""
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                size=len(self._entries)
+            )
+    
+    def _current_versions(self) -> Dict[str, int]:
+        """Versiones de las tablas de catálogo, consultadas como mucho cada check_interval"""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self._versions
+        
+        try:
+            rows = self.db.execute_query(self.VERSIONS_SQL)
+            self._versions = {row['tabla']: row['version'] for row in rows}
+        except Exception as e:
+            logger.error(f"Error consultando versiones de catálogo: {e}")
+        self._checked_at = now
+        return self._versions
 
 class DataAnalytics(AnalyticsInterface):
     """Implementación de análisis de datos"""
     
-    def __init__(self, database: DatabaseInterface):
+    def __init__(self, database: DatabaseInterface, figure_cache: Optional[FigureCache] = None):
         self.db = database
+        self.figure_cache = figure_cache
     
-    def generate_progress_chart(self, user_id: int) -> go.Figure:
+    @cached_figure('analytics_progress')
+    def generate_progress_chart(self, user_id: int) -> "go.Figure":
         """Generar gráfico de progreso del usuario"""
         try:
             # Obtener datos de progreso de peso
@@ -231,6 +851,7 @@ class DataAnalytics(AnalyticsInterface):
             weights = [row['peso'] for row in weight_data]
             
             # Crear gráfico con Plotly
+            import plotly.graph_objects as go
             fig = go.Figure()
             fig.add_trace(go.Scatter(
                 x=dates,
@@ -278,8 +899,9 @@ class DataAnalytics(AnalyticsInterface):
         
         return recommendations
     
-    def _create_empty_chart(self) -> go.Figure:
+    def _create_empty_chart(self) -> "go.Figure":
         """Crear gráfico vacío cuando no hay datos"""
+        import plotly.graph_objects as go
         fig = go.Figure()
         fig.add_annotation(
             text="No hay datos de progreso disponibles",
@@ -301,6 +923,73 @@ class DataAnalytics(AnalyticsInterface):
 class UserService:
     """Servicio para gestión de usuarios"""
     
+    # Consultas de get_user_stats. Totales acumulados y racha (mantenidos al
+    # completar cada sesión); la racha sigue viva si el último entrenamiento
+    # fue hoy o ayer. Para las rachas, el día de una sesión es la fecha local
+    # de su final (o de su inicio si no terminó), igual que en
+    # FitnessDataAnalyzer.calculate_streaks.
+    STATS_TOTALS_SQL = """
+    SELECT 
+        t.total_entrenamientos as total_workouts,
+        t.total_calorias as total_calories,
+        t.total_minutos as total_minutes,
+        CASE WHEN r.ultima_fecha >= date('now', 'localtime', '-1 day') 
+             THEN r.racha_actual ELSE 0 END as streak_days,
+        r.ultima_fecha as last_workout_date
+    FROM estadisticas_usuario_totales t
+    LEFT JOIN rachas_usuario r ON r.usuario_id = t.usuario_id
+    WHERE t.usuario_id = ?
+    """
+    # Estadísticas del día actual desde el acumulado diario
+    TODAY_STATS_SQL = """
+    SELECT 
+        entrenamientos_completados as today_workouts,
+        calorias_quemadas as today_calories,
+        minutos_entrenamiento as today_minutes
+    FROM estadisticas_usuario 
+    WHERE usuario_id = ? AND fecha = date('now', 'localtime')
+    """
+    WEIGHT_PROGRESS_SQL = """
+    SELECT fecha_registro, peso 
+    FROM progreso_peso 
+    WHERE usuario_id = ? 
+    ORDER BY fecha_registro
+    """
+    ACHIEVEMENTS_SQL = """
+    SELECT l.nombre 
+    FROM logros_usuario lu
+    JOIN logros l ON lu.logro_id = l.id
+    WHERE lu.usuario_id = ?
+    ORDER BY lu.fecha_obtenido DESC
+    """
+    
+    # Rachas desde las sesiones: islas de días consecutivos por usuario
+    STREAKS_REBUILD_SQL = """
+    INSERT INTO rachas_usuario (usuario_id, racha_actual, racha_maxima, ultima_fecha)
+    WITH dias AS (
+        SELECT DISTINCT usuario_id, DATE(COALESCE(fecha_fin, fecha_inicio), 'localtime') AS dia
+        FROM sesiones_entrenamiento
+        WHERE completado = 1 AND usuario_id IS NOT NULL{filter}
+    ),
+    islas AS (
+        SELECT usuario_id, MAX(dia) AS fin, COUNT(*) AS longitud
+        FROM (
+            SELECT usuario_id, dia,
+                   julianday(dia) - ROW_NUMBER() OVER (PARTITION BY usuario_id ORDER BY dia) AS grupo
+            FROM dias
+        )
+        GROUP BY usuario_id, grupo
+    ),
+    ordenadas AS (
+        SELECT usuario_id, fin, longitud,
+               ROW_NUMBER() OVER (PARTITION BY usuario_id ORDER BY fin DESC) AS orden
+        FROM islas
+    )
+    SELECT usuario_id, MAX(CASE WHEN orden = 1 THEN longitud END), MAX(longitud), MAX(fin)
+    FROM ordenadas
+    GROUP BY usuario_id
+    """
+    
     def __init__(self, database: DatabaseInterface):
         self.db = database
     
@@ -380,62 +1069,84 @@ class UserService:
     def get_user_stats(self, user_id: int) -> UserStats:
         """Obtener estadísticas del usuario"""
         try:
-            # Obtener estadísticas generales
-            query = """
-            SELECT 
-                COUNT(*) as total_workouts,
-                COALESCE(SUM(calorias_quemadas), 0) as total_calories,
-                COALESCE(SUM(duracion_real_minutos), 0) as total_minutes
-            FROM sesiones_entrenamiento 
-            WHERE usuario_id = ? AND completado = 1
-            """
-            stats = self.db.execute_query(query, (user_id,))
-            
-            # Obtener estadísticas del día actual
-            today_query = """
-            SELECT 
-                COUNT(*) as today_workouts,
-                COALESCE(SUM(calorias_quemadas), 0) as today_calories,
-                COALESCE(SUM(duracion_real_minutos), 0) as today_minutes
-            FROM sesiones_entrenamiento 
-            WHERE usuario_id = ? AND completado = 1 
-            AND DATE(fecha_inicio) = DATE('now')
-            """
-            today_stats = self.db.execute_query(today_query, (user_id,))
-            
-            # Obtener progreso de peso
-            weight_query = """
-            SELECT fecha_registro, peso 
-            FROM progreso_peso 
-            WHERE usuario_id = ? 
-            ORDER BY fecha_registro
-            """
-            weight_data = self.db.execute_query(weight_query, (user_id,))
-            
-            # Obtener logros
-            achievements_query = """
-            SELECT l.nombre 
-            FROM logros_usuario lu
-            JOIN logros l ON lu.logro_id = l.id
-            WHERE lu.usuario_id = ?
-            ORDER BY lu.fecha_obtenido DESC
-            """
-            achievements = self.db.execute_query(achievements_query, (user_id,))
-            
-            return UserStats(
-                total_workouts=stats[0]['total_workouts'] if stats else 0,
-                total_calories=stats[0]['total_calories'] if stats else 0,
-                total_minutes=stats[0]['total_minutes'] if stats else 0,
-                today_calories=today_stats[0]['today_calories'] if today_stats else 0,
-                today_minutes=today_stats[0]['today_minutes'] if today_stats else 0,
-                weight_progress=[(datetime.datetime.strptime(row['fecha_registro'], '%Y-%m-%d %H:%M:%S').date(), row['peso']) 
-                                for row in weight_data],
-                achievements=[row['nombre'] for row in achievements]
+            params = (user_id,)
+            return self.build_user_stats(
+                self.db.execute_query(self.STATS_TOTALS_SQL, params),
+                self.db.execute_query(self.TODAY_STATS_SQL, params),
+                self.db.execute_query(self.WEIGHT_PROGRESS_SQL, params),
+                self.db.execute_query(self.ACHIEVEMENTS_SQL, params)
             )
         except Exception as e:
             logger.error(f"Error obteniendo estadísticas del usuario: {e}")
             return UserStats()
     
+    def get_achievements(self, user_id: int) -> List[str]:
+        """Nombres de los logros del usuario, del más reciente al más antiguo"""
+        return [row['nombre'] for row in self.db.execute_query(self.ACHIEVEMENTS_SQL, (user_id,))]
+    
+    @staticmethod
+    def build_user_stats(stats: List[Dict], today_stats: List[Dict],
+                         weight_data: List[Dict], achievements: List[Dict]) -> UserStats:
+        """Componer UserStats con los resultados de las cuatro consultas de estadísticas"""
+        last_workout_date = stats[0]['last_workout_date'] if stats else None
+        
+        return UserStats(
+            streak_days=stats[0]['streak_days'] or 0 if stats else 0,
+            last_workout_date=(datetime.datetime.strptime(last_workout_date, '%Y-%m-%d').date()
+                               if last_workout_date else None),
+            total_workouts=stats[0]['total_workouts'] if stats else 0,
+            total_calories=stats[0]['total_calories'] if stats else 0,
+            total_minutes=stats[0]['total_minutes'] if stats else 0,
+            today_calories=today_stats[0]['today_calories'] if today_stats else 0,
+            today_minutes=today_stats[0]['today_minutes'] if today_stats else 0,
+            # fromisoformat sobre la parte de fecha: ~30 veces más rápido que strptime
+            weight_progress=[(datetime.date.fromisoformat(row['fecha_registro'][:10]), row['peso'])
+                             for row in weight_data],
+            achievements=[row['nombre'] for row in achievements]
+        )
+    
+    def rebuild_stat_rollups(self, user_id: Optional[int] = None) -> int:
+        """Reconstruir los acumulados (totales, diarios y rachas) desde las sesiones"""
+        user_filter = "AND usuario_id = :user_id" if user_id is not None else ""
+        params = {'user_id': user_id}
+        
+        with self.db.transaction() as conn:
+            conn.execute(f"DELETE FROM estadisticas_usuario_totales WHERE 1 = 1 {user_filter}", params)
+            rebuilt = conn.execute(f"""
+            INSERT INTO estadisticas_usuario_totales 
+            (usuario_id, total_entrenamientos, total_calorias, total_minutos)
+            SELECT usuario_id, COUNT(*), COALESCE(SUM(calorias_quemadas), 0), 
+                   COALESCE(SUM(duracion_real_minutos), 0)
+            FROM sesiones_entrenamiento
+            WHERE completado = 1 AND usuario_id IS NOT NULL {user_filter}
+            GROUP BY usuario_id
+            """, params).rowcount
+            
+            conn.execute(f"DELETE FROM rachas_usuario WHERE 1 = 1 {user_filter}", params)
+            conn.execute(self.STREAKS_REBUILD_SQL.format(filter=f" {user_filter}" if user_filter else ""),
+                         params)
+            
+            # Solo se sobrescriben los días que tienen sesiones completadas: las
+            # filas diarias que no vienen de sesiones (datos de ejemplo, días solo
+            # de nutrición o hidratación) se conservan tal cual
+            conn.execute(f"""
+            INSERT INTO estadisticas_usuario 
+            (usuario_id, fecha, entrenamientos_completados, minutos_entrenamiento, calorias_quemadas)
+            SELECT usuario_id, DATE(COALESCE(fecha_fin, fecha_inicio), 'localtime') AS dia, COUNT(*),
+                   COALESCE(SUM(duracion_real_minutos), 0), COALESCE(SUM(calorias_quemadas), 0)
+            FROM sesiones_entrenamiento
+            WHERE completado = 1 AND usuario_id IS NOT NULL {user_filter}
+            GROUP BY usuario_id, dia
+            ON CONFLICT(usuario_id, fecha) DO UPDATE SET
+                entrenamientos_completados = excluded.entrenamientos_completados,
+                minutos_entrenamiento = excluded.minutos_entrenamiento,
+                calorias_quemadas = excluded.calorias_quemadas
+            """, params)
+        
+        if user_id is not None:
+            data_versions.bump(user_id)
+        return rebuilt
+    
     def _hash_password(self, password: str) -> str:
         """Hashear contraseña"""
         return hashlib.sha256(password.encode()).hexdigest()
@@ -484,11 +1195,28 @@ class UserService:
                 self._delete_user_goals(user_profile.id)
                 self._insert_user_goals(user_profile.id, user_profile.goals)
             
+            if success:
+                # Los gráficos del perfil (peso actual y objetivo) dependen de estos datos
+                data_versions.bump(user_profile.id)
             return success
         except Exception as e:
             logger.error(f"Error actualizando perfil: {e}")
             return False
     
+    def log_weight(self, user_id: int, weight: float) -> bool:
+        """Registrar el peso de hoy en progreso_peso y como peso actual del usuario"""
+        try:
+            with self.db.transaction() as conn:
+                conn.execute("INSERT INTO progreso_peso (usuario_id, peso) VALUES (?, ?)",
+                             (user_id, weight))
+                conn.execute("UPDATE usuarios SET peso_actual = ? WHERE id = ?", (weight, user_id))
+            # Invalidar los gráficos de peso cacheados del usuario
+            data_versions.bump(user_id)
+            return True
+        except Exception as e:
+            logger.error(f"Error registrando peso: {e}")
+            return False
+    
     def _delete_user_goals(self, user_id: int):
         """Eliminar objetivos existentes del usuario"""
         query = "DELETE FROM objetivos_usuario WHERE usuario_id = ?"
@@ -506,72 +1234,209 @@ class UserService:
 class WorkoutService:
     """Servicio para gestión de entrenamientos"""
     
-    def __init__(self, database: DatabaseInterface):
+    # Máximo de IDs por consulta IN al cargar ejercicios
+    EXERCISE_BATCH_SIZE = 500
+    
+    # Sentencias del inicio y la finalización de sesiones
+    START_SESSION_SQL = """
+    INSERT INTO sesiones_entrenamiento (usuario_id, entrenamiento_id, fecha_inicio)
+    VALUES (?, ?, datetime('now'))
+    """
+    COMPLETE_SESSION_SQL = """
+    UPDATE sesiones_entrenamiento 
+    SET fecha_fin = datetime('now'),
+        duracion_real_minutos = ?,
+        calorias_quemadas = ?,
+        completado = 1,
+        rating_usuario = ?
+    WHERE id = (
+        SELECT MAX(id) FROM sesiones_entrenamiento
+        WHERE usuario_id = ? AND entrenamiento_id = ? AND completado = 0
+    )
+    """
+    INSERT_COMPLETED_SESSION_SQL = """
+    INSERT INTO sesiones_entrenamiento 
+    (usuario_id, entrenamiento_id, fecha_inicio, fecha_fin, 
+     duracion_real_minutos, calorias_quemadas, completado, rating_usuario)
+    VALUES (?, ?, datetime('now', ?), datetime('now'), ?, ?, 1, ?)
+    """
+    # Contadores de popularidad mantenidos de forma incremental; la media solo
+    # cuenta sesiones valoradas (total_valoraciones), igual que AVG(rating_usuario)
+    # en recompute_popularity, que corrige la deriva
+    WORKOUT_COMPLETIONS_SQL = """
+    UPDATE entrenamientos 
+    SET rating_promedio = CASE WHEN ? IS NULL THEN rating_promedio
+            ELSE (COALESCE(rating_promedio, 0) * COALESCE(total_valoraciones, 0) + ?) * 1.0
+                 / (COALESCE(total_valoraciones, 0) + 1) END,
+        total_valoraciones = COALESCE(total_valoraciones, 0) + (? IS NOT NULL),
+        total_completados = COALESCE(total_completados, 0) + 1
+    WHERE id = ?
+    RETURNING total_completados, rating_promedio
+    """
+    RECOMPUTE_POPULARITY_SQL = """
+    UPDATE entrenamientos 
+    SET total_completados = s.completados,
+        total_valoraciones = s.valoraciones,
+        rating_promedio = COALESCE(s.rating, 0)
+    FROM (
+        SELECT entrenamiento_id, COUNT(*) AS completados,
+               COUNT(rating_usuario) AS valoraciones, AVG(rating_usuario) AS rating
+        FROM sesiones_entrenamiento
+        WHERE completado = 1
+        GROUP BY entrenamiento_id
+    ) AS s
+    WHERE s.entrenamiento_id = entrenamientos.id
+    """
+    DAILY_STATS_SQL = """
+    INSERT INTO estadisticas_usuario 
+    (usuario_id, fecha, entrenamientos_completados, minutos_entrenamiento, calorias_quemadas)
+    VALUES (?, date('now', 'localtime'), 1, ?, ?)
+    ON CONFLICT(usuario_id, fecha) DO UPDATE SET
+        entrenamientos_completados = entrenamientos_completados + 1,
+        minutos_entrenamiento = minutos_entrenamiento + ?,
+        calorias_quemadas = calorias_quemadas + ?
+    """
+    TOTAL_STATS_SQL = """
+    INSERT INTO estadisticas_usuario_totales 
+    (usuario_id, total_entrenamientos, total_calorias, total_minutos)
+    VALUES (?, 1, ?, ?)
+    ON CONFLICT(usuario_id) DO UPDATE SET
+        total_entrenamientos = total_entrenamientos + 1,
+        total_calorias = total_calorias + excluded.total_calorias,
+        total_minutos = total_minutos + excluded.total_minutos,
+        fecha_actualizacion = CURRENT_TIMESTAMP
+    """
+    # La sesión termina ahora: su día es la fecha local actual
+    STREAK_SQL = """
+    INSERT INTO rachas_usuario (usuario_id, racha_actual, racha_maxima, ultima_fecha)
+    VALUES (?, 1, 1, date('now', 'localtime'))
+    ON CONFLICT(usuario_id) DO UPDATE SET
+        racha_actual = CASE
+            WHEN ultima_fecha >= date('now', 'localtime') THEN racha_actual
+            WHEN ultima_fecha = date('now', 'localtime', '-1 day') THEN racha_actual + 1
+            ELSE 1 END,
+        racha_maxima = MAX(racha_maxima, CASE
+            WHEN ultima_fecha >= date('now', 'localtime') THEN racha_actual
+            WHEN ultima_fecha = date('now', 'localtime', '-1 day') THEN racha_actual + 1
+            ELSE 1 END),
+        ultima_fecha = MAX(ultima_fecha, date('now', 'localtime'))
+    """
+    
+    def __init__(self, database: DatabaseInterface, catalog: Optional[CatalogCache] = None,
+                 writer: Optional[WriteBehindQueue] = None):
         self.db = database
+        self.catalog = catalog or CatalogCache(database)
+        self.achievements = AchievementEngine(database)
+        # Con una cola de escritura diferida las sesiones se escriben en segundo plano
+        self.writer = writer
+        if writer is not None:
+            writer.register('workout_session_start', self._write_session_start)
+            writer.register('workout_session_complete', self._write_session_completion,
+                            self._on_session_completed)
+        # Número de consultas ejecutadas en la última llamada (útil para pruebas)
+        self.last_query_count = 0
     
-    def get_workouts(self, category: str = None, level: str = None) -> List[Workout]:
+    def get_workouts(self, category: str = None, level: str = None,
+                     include_exercises: bool = True) -> List[Workout]:
         """Obtener lista de entrenamientos"""
+        self.last_query_count = 0
         try:
-            query = """
-            SELECT e.*, 
-                   COUNT(se.id) as completions,
-                   COALESCE(AVG(se.rating_usuario), 0) as avg_rating
-            FROM entrenamientos e
-            LEFT JOIN sesiones_entrenamiento se ON e.id = se.entrenamiento_id
-            WHERE e.activo = 1
-            """
-            params = []
-            
-            if category:
-                query += " AND e.categoria = ?"
-                params.append(category)
-            
-            if level:
-                query += " AND e.nivel = ?"
-                params.append(level)
-            
-            query += " GROUP BY e.id ORDER BY e.rating_promedio DESC"
-            
-            workouts_data = self.db.execute_query(query, tuple(params))
-            workouts = []
-            
-            for workout_data in workouts_data:
-                # Obtener ejercicios del entrenamiento
-                exercises_query = """
-                SELECT * FROM ejercicios 
-                WHERE entrenamiento_id = ? 
-                ORDER BY orden_ejercicio
-                """
-                exercises = self.db.execute_query(exercises_query, (workout_data['id'],))
-                
-                workout = Workout(
-                    id=workout_data['id'],
-                    name=workout_data['nombre'],
-                    duration=f"{workout_data['duracion_minutos']} min",
-                    level=workout_data['nivel'],
-                    calories=f"{workout_data['calorias_estimadas']}",
-                    image=self._get_category_emoji(workout_data['categoria']),
-                    category=workout_data['categoria'],
-                    description=workout_data['descripcion'],
-                    exercises=[dict(exercise) for exercise in exercises],
-                    rating=round(workout_data['avg_rating'], 1),
-                    completions=workout_data['completions']
-                )
-                workouts.append(workout)
+            catalog = self.catalog.get('workouts', ('entrenamientos', 'ejercicios'), self._load_workout_catalog)
             
-            return workouts
+            # Copias: quien recibe la lista puede modificar los entrenamientos
+            return [
+                replace(workout,
+                        exercises=list(workout.exercises) if include_exercises else [],
+                        exercises_loaded=include_exercises)
+                for workout in catalog
+                if (not category or workout.category == category)
+                and (not level or workout.level == level)
+            ]
         except Exception as e:
             logger.error(f"Error obteniendo entrenamientos: {e}")
             return []
     
+    def _load_workout_catalog(self) -> List[Workout]:
+        """Cargar todos los entrenamientos activos con sus ejercicios"""
+        # Los contadores de popularidad están desnormalizados en la propia tabla
+        query = """
+        SELECT * FROM entrenamientos
+        WHERE activo = 1
+        ORDER BY rating_promedio DESC
+        """
+        workouts_data = self.db.execute_query(query)
+        self.last_query_count += 1
+        
+        # Cargar los ejercicios de todo el catálogo en una sola consulta
+        exercises_by_workout = self._load_exercises([row['id'] for row in workouts_data])
+        
+        workouts = []
+        for workout_data in workouts_data:
+            workout = Workout(
+                id=workout_data['id'],
+                name=workout_data['nombre'],
+                duration=f"{workout_data['duracion_minutos']} min",
+                level=workout_data['nivel'],
+                calories=f"{workout_data['calorias_estimadas']}",
+                image=self._get_category_emoji(workout_data['categoria']),
+                category=workout_data['categoria'],
+                description=workout_data['descripcion'],
+                exercises=exercises_by_workout.get(workout_data['id'], []),
+                rating=round(workout_data['rating_promedio'] or 0, 1),
+                completions=workout_data['total_completados'] or 0
+            )
+            workouts.append(workout)
+        
+        return workouts
+    
+    def load_exercises(self, workout: Workout) -> Workout:
+        """Cargar bajo demanda los ejercicios de un entrenamiento"""
+        if not workout.exercises_loaded:
+            self.last_query_count = 0
+            workout.exercises = self._load_exercises([workout.id]).get(workout.id, [])
+            workout.exercises_loaded = True
+        return workout
+    
+    def _load_exercises(self, workout_ids: List[int]) -> Dict[int, List[Dict]]:
+        """Obtener los ejercicios de varios entrenamientos agrupados por entrenamiento"""
+        exercises_by_workout = {workout_id: [] for workout_id in workout_ids}
+        
+        # Trocear para no superar el límite de parámetros de SQLite
+        for start in range(0, len(workout_ids), self.EXERCISE_BATCH_SIZE):
+            batch = workout_ids[start:start + self.EXERCISE_BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            exercises_query = f"""
+            SELECT * FROM ejercicios 
+            WHERE entrenamiento_id IN ({placeholders}) 
+            ORDER BY entrenamiento_id, orden_ejercicio
+            """
+            rows = self.db.execute_query(exercises_query, tuple(batch))
+            self.last_query_count += 1
+            
+            for row in rows:
+                exercises_by_workout[row['entrenamiento_id']].append(self._format_exercise(row))
+        
+        return exercises_by_workout
+    
+    @staticmethod
+    def _format_exercise(row: Dict) -> Dict:
+        """Añadir a la fila del ejercicio los campos que usa la pantalla de entrenamiento"""
+        exercise = dict(row)
+        exercise['name'] = row['nombre']
+        if row.get('duracion_segundos'):
+            exercise['duration'] = f"{row['duracion_segundos']}s"
+        if row.get('series'):
+            exercise['sets'] = f"{row['series']} x {row['repeticiones'] or '-'}"
+        if row.get('descanso_segundos'):
+            exercise['rest'] = f"{row['descanso_segundos']}s"
+        return exercise
+    
     def start_workout_session(self, user_id: int, workout_id: int) -> bool:
         """Iniciar sesión de entrenamiento"""
         try:
-            query = """
-            INSERT INTO sesiones_entrenamiento (usuario_id, entrenamiento_id, fecha_inicio)
-            VALUES (?, ?, datetime('now'))
-            """
-            return self.db.execute_update(query, (user_id, workout_id))
+            if self.writer is not None:
+                return self.writer.submit('workout_session_start', user_id, workout_id)
+            return self.db.execute_update(self.START_SESSION_SQL, (user_id, workout_id))
         except Exception as e:
             logger.error(f"Error iniciando sesión de entrenamiento: {e}")
             return False
@@ -581,50 +1446,99 @@ class WorkoutService:
                                rating: int) -> bool:
         """Completar sesión de entrenamiento"""
         try:
-            # Actualizar sesión de entrenamiento
-            update_query = """
-            UPDATE sesiones_entrenamiento 
-            SET fecha_fin = datetime('now'),
-                duracion_real_minutos = ?,
-                calorias_quemadas = ?,
-                completado = 1,
-                rating_usuario = ?
-            WHERE usuario_id = ? AND entrenamiento_id = ? AND completado = 0
-            """
-            success = self.db.execute_update(update_query, 
-                                           (duration_minutes, calories_burned, rating, user_id, workout_id))
-            
-            if success:
-                # Actualizar estadísticas del entrenamiento
-                stats_query = """
-                UPDATE entrenamientos 
-                SET total_completados = total_completados + 1
-                WHERE id = ?
-                """
-                self.db.execute_update(stats_query, (workout_id,))
-                
-                # Actualizar estadísticas diarias del usuario
-                daily_stats_query = """
-                INSERT INTO estadisticas_usuario 
-                (usuario_id, fecha, entrenamientos_completados, minutos_entrenamiento, calorias_quemadas)
-                VALUES (?, date('now'), 1, ?, ?)
-                ON CONFLICT(usuario_id, fecha) DO UPDATE SET
-                    entrenamientos_completados = entrenamientos_completados + 1,
-                    minutos_entrenamiento = minutos_entrenamiento + ?,
-                    calorias_quemadas = calorias_quemadas + ?
-                """
-                self.db.execute_update(daily_stats_query, 
-                                     (user_id, duration_minutes, calories_burned, 
-                                      duration_minutes, calories_burned))
-                
-                # Verificar logros
-                self._check_achievements(user_id)
+            if self.writer is not None:
+                return self.writer.submit('workout_session_complete', user_id, workout_id,
+                                          duration_minutes, calories_burned, rating)
             
-            return success
+            # Toda la finalización en una transacción: una conexión y un commit
+            with self.db.transaction() as conn:
+                counters = self._write_session_completion(conn, user_id, workout_id,
+                                                          duration_minutes, calories_burned, rating)
+            self._on_session_completed(user_id, workout_id, duration_minutes,
+                                       calories_burned, rating, counters)
+            return True
         except Exception as e:
             logger.error(f"Error completando sesión de entrenamiento: {e}")
             return False
     
+    def _write_session_start(self, conn: sqlite3.Connection, user_id: int, workout_id: int):
+        """Escritura del inicio de sesión (manejador de la cola diferida)"""
+        conn.execute(self.START_SESSION_SQL, (user_id, workout_id))
+    
+    def _write_session_completion(self, conn: sqlite3.Connection, user_id: int, workout_id: int,
+                                  duration_minutes: int, calories_burned: int,
+                                  rating: int) -> Optional[Tuple[int, float]]:
+        """Finalización completa de la sesión, logros incluidos, dentro de la transacción"""
+        counters = self._apply_session_completion(conn, user_id, workout_id,
+                                                  duration_minutes, calories_burned, rating)
+        
+        # Verificar logros
+        self._check_achievements(user_id)
+        return counters
+    
+    def _on_session_completed(self, user_id: int, workout_id: int, duration_minutes: int,
+                              calories_burned: int, rating: int,
+                              counters: Optional[Tuple[int, float]]):
+        """Actualizar cachés una vez confirmada la finalización"""
+        # Invalidar los análisis cacheados del usuario
+        data_versions.bump(user_id)
+        if counters:
+            self._update_cached_counters(workout_id, *counters)
+    
+    def _apply_session_completion(self, conn: sqlite3.Connection, user_id: int, workout_id: int,
+                                  duration_minutes: int, calories_burned: int,
+                                  rating: int) -> Optional[Tuple[int, float]]:
+        """Escrituras de la finalización de una sesión sobre una conexión ya en transacción
+        
+        Devuelve los nuevos (total_completados, rating_promedio) del entrenamiento.
+        """
+        # Las sentencias son constantes para que la caché de sentencias
+        # preparadas de sqlite3 las reutilice entre llamadas
+        cursor = conn.execute(self.COMPLETE_SESSION_SQL,
+                              (duration_minutes, calories_burned, rating, user_id, workout_id))
+        if cursor.rowcount == 0:
+            # Finalizado sin sesión abierta: registrar la sesión ya completada
+            conn.execute(self.INSERT_COMPLETED_SESSION_SQL,
+                         (user_id, workout_id, f"-{int(duration_minutes)} minutes",
+                          duration_minutes, calories_burned, rating))
+        
+        # Actualizar estadísticas del entrenamiento
+        counters = conn.execute(self.WORKOUT_COMPLETIONS_SQL, (rating, rating, rating, workout_id)).fetchone()
+        
+        # Actualizar estadísticas diarias y totales del usuario
+        conn.execute(self.DAILY_STATS_SQL,
+                     (user_id, duration_minutes, calories_burned,
+                      duration_minutes, calories_burned))
+        conn.execute(self.TOTAL_STATS_SQL, (user_id, calories_burned, duration_minutes))
+        
+        # Actualizar la racha de forma incremental
+        conn.execute(self.STREAK_SQL, (user_id,))
+        
+        return tuple(counters) if counters else None
+    
+    def _update_cached_counters(self, workout_id: int, completions: int, rating: float):
+        """Reflejar los nuevos contadores en el catálogo cacheado sin recargarlo"""
+        for workout in self.catalog.peek('workouts') or []:
+            if workout.id == workout_id:
+                workout.completions = completions
+                workout.rating = round(rating or 0, 1)
+                break
+    
+    def recompute_popularity(self) -> int:
+        """Recalcular total_completados, total_valoraciones y rating_promedio desde las sesiones
+        
+        Solo se tocan los entrenamientos con sesiones completadas; el resto
+        conserva sus valores iniciales.
+        """
+        try:
+            with self.db.transaction() as conn:
+                updated = conn.execute(self.RECOMPUTE_POPULARITY_SQL).rowcount
+            self.catalog.invalidate('workouts')
+            return updated
+        except Exception as e:
+            logger.error(f"Error recalculando popularidad de entrenamientos: {e}")
+            return 0
+    
     def _get_category_emoji(self, category: str) -> str:
         """Obtener emoji para categoría"""
         emoji_map = {
@@ -640,178 +1554,499 @@ class WorkoutService:
     def _check_achievements(self, user_id: int):
         """Verificar y otorgar logros"""
         try:
-            # Obtener estadísticas del usuario
-            stats_query = """
-            SELECT 
-                COUNT(*) as total_workouts,
-                COALESCE(SUM(calorias_quemadas), 0) as total_calories
-            FROM sesiones_entrenamiento 
-            WHERE usuario_id = ? AND completado = 1
-            """
-            stats = self.db.execute_query(stats_query, (user_id,))
-            
-            if stats:
-                total_workouts = stats[0]['total_workouts']
-                total_calories = stats[0]['total_calories']
-                
-                # Verificar logros
-                achievements_to_check = [
-                    (1, 'Primer Paso'),
-                    (10, 'Consistencia'),
-                    (50, 'Maratonista'),
-                    (1000, 'Quemador')
-                ]
-                
-                for threshold, achievement_name in achievements_to_check:
-                    if (threshold == 1 and total_workouts >= 1) or \
-                       (threshold == 10 and total_workouts >= 10) or \
-                       (threshold == 50 and total_workouts >= 50) or \
-                       (threshold == 1000 and total_calories >= 1000):
-                        
-                        # Verificar si ya tiene el logro
-                        check_query = """
-                        SELECT lu.id 
-                        FROM logros_usuario lu
-                        JOIN logros l ON lu.logro_id = l.id
-                        WHERE lu.usuario_id = ? AND l.nombre = ?
-                        """
-                        existing = self.db.execute_query(check_query, (user_id, achievement_name))
-                        
-                        if not existing:
-                            # Obtener ID del logro
-                            logro_query = "SELECT id FROM logros WHERE nombre = ?"
-                            logro_result = self.db.execute_query(logro_query, (achievement_name,))
-                            
-                            if logro_result:
-                                logro_id = logro_result[0]['id']
-                                insert_query = """
-                                INSERT INTO logros_usuario (usuario_id, logro_id)
-                                VALUES (?, ?)
-                                """
-                                self.db.execute_update(insert_query, (user_id, logro_id))
+            self.achievements.evaluate_user(user_id)
         except Exception as e:
             logger.error(f"Error verificando logros: {e}")
 
+class AchievementEngine:
+    """Motor de logros basado en los criterios de la tabla logros"""
+    
+    # Métricas por usuario para cada criterio_tipo y concesión en una sola pasada;
+    # los totales y rachas salen de estadisticas_usuario_totales y rachas_usuario.
+    # {sessions_filter}/{weights_filter} restringen la evaluación a un usuario.
+    EVALUATE_SQL = """
+    INSERT OR IGNORE INTO logros_usuario (usuario_id, logro_id)
+    WITH sesiones AS (
+        SELECT usuario_id,
+               total_entrenamientos AS entrenamientos,
+               total_calorias AS calorias,
+               total_minutos AS tiempo
+        FROM estadisticas_usuario_totales
+        WHERE 1 = 1 {sessions_filter}
+    ),
+    rachas AS (
+        SELECT usuario_id, racha_maxima AS racha
+        FROM rachas_usuario
+        WHERE 1 = 1 {sessions_filter}
+    ),
+    pesos AS (
+        SELECT usuario_id,
+               MAX(CASE WHEN primero = 1 THEN peso END) - MAX(CASE WHEN ultimo = 1 THEN peso END) AS peso
+        FROM (
+            SELECT usuario_id, peso,
+                   ROW_NUMBER() OVER (PARTITION BY usuario_id ORDER BY fecha_registro, id) AS primero,
+                   ROW_NUMBER() OVER (PARTITION BY usuario_id ORDER BY fecha_registro DESC, id DESC) AS ultimo
+            FROM progreso_peso
+            WHERE 1 = 1 {weights_filter}
+        )
+        GROUP BY usuario_id
+    ),
+    metricas AS (
+        SELECT usuario_id, 'entrenamientos' AS tipo, entrenamientos AS valor FROM sesiones
+        UNION ALL SELECT usuario_id, 'calorias', calorias FROM sesiones
+        UNION ALL SELECT usuario_id, 'tiempo', tiempo FROM sesiones
+        UNION ALL SELECT usuario_id, 'racha', racha FROM rachas
+        UNION ALL SELECT usuario_id, 'peso', peso FROM pesos
+    )
+    SELECT m.usuario_id, l.id
+    FROM metricas m
+    JOIN logros l ON l.criterio_tipo = m.tipo
+    WHERE l.criterio_valor IS NOT NULL AND m.valor >= l.criterio_valor
+    """
+    
+    def __init__(self, database: DatabaseInterface):
+        self.db = database
+        self._stop_event = None
+        self._worker = None
+    
+    def evaluate_user(self, user_id: int) -> int:
+        """Evaluar todos los criterios de un usuario y devolver los logros nuevos"""
+        query = self.EVALUATE_SQL.format(
+            sessions_filter="AND usuario_id = :user_id",
+            weights_filter="AND usuario_id = :user_id"
+        )
+        with self.db.transaction() as conn:
+            return conn.execute(query, {'user_id': user_id}).rowcount
+    
+    def evaluate_all_users(self) -> int:
+        """Reevaluar los logros de todos los usuarios en una sola sentencia"""
+        query = self.EVALUATE_SQL.format(sessions_filter="", weights_filter="")
+        with self.db.transaction() as conn:
+            granted = conn.execute(query).rowcount
+        logger.info(f"Reevaluación de logros completada: {granted} logros nuevos")
+        return granted
+    
+    def start_background_reevaluation(self, interval_seconds: float = 3600.0):
+        """Reevaluar periódicamente a todos los usuarios en un thread de fondo"""
+        if self._worker and self._worker.is_alive():
+            return
+        
+        self._stop_event = threading.Event()
+        
+        def run():
+            while not self._stop_event.is_set():
+                try:
+                    self.evaluate_all_users()
+                except Exception as e:
+                    logger.error(f"Error en la reevaluación de logros: {e}")
+                self._stop_event.wait(interval_seconds)
+        
+        self._worker = threading.Thread(target=run, name="achievement-reevaluation", daemon=True)
+        self._worker.start()
+    
+    def stop_background_reevaluation(self):
+        """Detener la reevaluación periódica"""
+        if self._stop_event:
+            self._stop_event.set()
+        if self._worker:
+            self._worker.join()
+            self._worker = None
+
 class NutritionService:
     """Servicio para gestión nutricional"""
     
-    def __init__(self, database: DatabaseInterface):
+    # Suma los macros del día a los ya registrados
+    TRACK_NUTRITION_SQL = """
+    INSERT INTO seguimiento_nutricional 
+    (usuario_id, fecha, calorias_consumidas, carbohidratos_g, proteinas_g, grasas_g)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(usuario_id, fecha) DO UPDATE SET
+        calorias_consumidas = calorias_consumidas + excluded.calorias_consumidas,
+        carbohidratos_g = carbohidratos_g + excluded.carbohidratos_g,
+        proteinas_g = proteinas_g + excluded.proteinas_g,
+        grasas_g = grasas_g + excluded.grasas_g
+    """
+    
+    def __init__(self, database: DatabaseInterface, catalog: Optional[CatalogCache] = None,
+                 writer: Optional[WriteBehindQueue] = None):
         self.db = database
+        self.catalog = catalog or CatalogCache(database)
+        self.writer = writer
+        if writer is not None:
+            writer.register('nutrition', self._write_nutrition)
+    
+    # Comidas de los planes activos en una sola consulta, con los nombres de
+    # campo que usa la pestaña (sin los textos de ingredientes e instrucciones)
+    MEALS_SQL = """
+    SELECT m.plan_nutricional_id AS plan_id, m.id, m.nombre AS name, m.tipo AS type,
+           m.calorias AS calories, m.carbohidratos_g AS carbs, m.proteinas_g AS proteins,
+           m.grasas_g AS fats, m.tiempo_preparacion_minutos AS prep_minutes
+    FROM comidas m
+    JOIN planes_nutricionales p ON p.id = m.plan_nutricional_id
+    WHERE p.activo = 1
+    ORDER BY m.plan_nutricional_id, m.id
+    """
     
-    def get_nutrition_plans(self) -> List[NutritionPlan]:
-        """Obtener planes nutricionales"""
+    def get_nutrition_plans(self, include_meals: bool = True) -> List[NutritionPlan]:
+        """Obtener planes nutricionales
+        
+        Con include_meals=False solo se cargan los planes; las comidas se leen
+        aparte y solo cuando alguien las pide.
+        """
         try:
-            query = """
-            SELECT p.*, 
-                   GROUP_CONCAT(m.nombre || '|' || m.calorias || '|' || m.tipo) as meals_data
-            FROM planes_nutricionales p
-            LEFT JOIN comidas m ON p.id = m.plan_nutricional_id
-            WHERE p.activo = 1
-            GROUP BY p.id
-            """
-            plans_data = self.db.execute_query(query)
-            plans = []
-            
-            for plan_data in plans_data:
-                meals = []
-                if plan_data['meals_data']:
-                    for meal_str in plan_data['meals_data'].split(','):
-                        meal_parts = meal_str.split('|')
-                        if len(meal_parts) >= 3:
-                            meals.append({
-                                'name': meal_parts[0],
-                                'calories': int(meal_parts[1]),
-                                'type': meal_parts[2]
-                            })
-                
-                plan = NutritionPlan(
-                    id=plan_data['id'],
-                    name=plan_data['nombre'],
-                    calories_daily=plan_data['calorias_diarias'],
-                    carbs_percentage=plan_data['carbohidratos_porcentaje'],
-                    proteins_percentage=plan_data['proteinas_porcentaje'],
-                    fats_percentage=plan_data['grasas_porcentaje'],
-                    meals=meals
-                )
-                plans.append(plan)
+            plans = self.catalog.get('nutrition_plans', ('planes_nutricionales',),
+                                     self._load_nutrition_plans)
+            if not include_meals:
+                return [replace(plan, meals=[], meals_loaded=False) for plan in plans]
             
-            return plans
+            meals_by_plan = self.catalog.get('nutrition_meals', ('planes_nutricionales', 'comidas'),
+                                             self._load_meals)
+            # Copias: quien recibe la lista puede modificar las comidas
+            return [replace(plan, meals=[dict(meal) for meal in meals_by_plan.get(plan.id, [])],
+                            meals_loaded=True)
+                    for plan in plans]
         except Exception as e:
             logger.error(f"Error obteniendo planes nutricionales: {e}")
             return []
     
+    def _load_nutrition_plans(self) -> List[NutritionPlan]:
+        """Cargar los planes nutricionales activos, sin sus comidas"""
+        plans_query = """
+        SELECT id, nombre, calorias_diarias, carbohidratos_porcentaje,
+               proteinas_porcentaje, grasas_porcentaje
+        FROM planes_nutricionales 
+        WHERE activo = 1
+        ORDER BY id
+        """
+        return [
+            NutritionPlan(
+                id=plan_data['id'],
+                name=plan_data['nombre'],
+                calories_daily=plan_data['calorias_diarias'],
+                carbs_percentage=plan_data['carbohidratos_porcentaje'],
+                proteins_percentage=plan_data['proteinas_porcentaje'],
+                fats_percentage=plan_data['grasas_porcentaje'],
+                meals=[],
+                meals_loaded=False
+            )
+            for plan_data in self.db.execute_query(plans_query)
+        ]
+    
+    def _load_meals(self) -> Dict[int, List[Dict]]:
+        """Comidas de todos los planes activos por plan, con sus macros"""
+        meals_by_plan = {}
+        # execute_query ya devuelve un dict nuevo por fila: se usa tal cual
+        for meal in self.db.execute_query(self.MEALS_SQL):
+            meals_by_plan.setdefault(meal.pop('plan_id'), []).append(meal)
+        return meals_by_plan
+    
     def track_daily_nutrition(self, user_id: int, date: datetime.date, 
                              calories: int, carbs: float, proteins: float, fats: float) -> bool:
         """Registrar nutrición diaria"""
         try:
-            query = """
-            INSERT INTO seguimiento_nutricional 
-            (usuario_id, fecha, calorias_consumidas, carbohidratos_g, proteinas_g, grasas_g)
-            VALUES (?, ?, ?, ?, ?, ?)
-            ON CONFLICT(usuario_id, fecha) DO UPDATE SET
-                calorias_consumidas = calorias_consumidas + ?,
-                carbohidratos_g = carbohidratos_g + ?,
-                proteinas_g = proteinas_g + ?,
-                grasas_g = grasas_g + ?
-            """
-            return self.db.execute_update(query, 
-                                        (user_id, date, calories, carbs, proteins, fats,
-                                         calories, carbs, proteins, fats))
+            params = (user_id, self._normalize_date(date), calories, carbs, proteins, fats)
+            if self.writer is not None:
+                return self.writer.submit('nutrition', *params)
+            return self.db.execute_update(self.TRACK_NUTRITION_SQL, params)
         except Exception as e:
             logger.error(f"Error registrando nutrición diaria: {e}")
             return False
+    
+    def _write_nutrition(self, conn: sqlite3.Connection, *params):
+        """Escritura de un registro de nutrición (manejador de la cola diferida)"""
+        conn.execute(self.TRACK_NUTRITION_SQL, params)
+    
+    def track_nutrition_batch(self, records: Iterable[Tuple]) -> NutritionBatchResult:
+        """Registrar muchos días de nutrición en una sola transacción
+        
+        Cada registro es (usuario_id, fecha, calorías, carbohidratos, proteínas, grasas).
+        Los registros del mismo usuario y día se suman en memoria antes de escribir.
+        """
+        start = time.perf_counter()
+        totals: Dict[Tuple[int, str], List[float]] = {}
+        count = 0
+        try:
+            for user_id, date, calories, carbs, proteins, fats in records:
+                count += 1
+                key = (user_id, self._normalize_date(date))
+                day = totals.get(key)
+                if day is None:
+                    totals[key] = [calories, carbs, proteins, fats]
+                else:
+                    day[0] += calories
+                    day[1] += carbs
+                    day[2] += proteins
+                    day[3] += fats
+            
+            rows = [(user_id, date, *macros) for (user_id, date), macros in totals.items()]
+            with self.db.transaction() as conn:
+                conn.executemany(self.TRACK_NUTRITION_SQL, rows)
+            
+            result = NutritionBatchResult(True, count, len(rows), time.perf_counter() - start)
+            logger.info(f"Nutrición por lotes: {result.records} registros, {result.rows} filas, "
+                        f"{result.rows_per_second} filas/s")
+            return result
+        except Exception as e:
+            logger.error(f"Error registrando nutrición por lotes: {e}")
+            return NutritionBatchResult(False, count, 0, time.perf_counter() - start)
+    
+    @staticmethod
+    def _normalize_date(date) -> str:
+        """Fecha en formato ISO (YYYY-MM-DD) para la clave única (usuario_id, fecha)"""
+        if isinstance(date, datetime.datetime):
+            date = date.date()
+        return date.isoformat() if isinstance(date, datetime.date) else str(date)
+
+# Servicios de hidratación abiertos; se vacían al salir antes de cerrar las colas
+# de escritura, porque su flush encola en ellas (atexit ejecuta en orden inverso)
+_open_hydration_services = weakref.WeakSet()
+
+@atexit.register
+def _close_hydration_services():
+    """Escribir los clics de la última ventana al salir del intérprete"""
+    for service in list(_open_hydration_services):
+        service.close()
+
+class HydrationService:
+    """Servicio de hidratación diaria
+    
+    El contador de cada (usuario, día) se sirve desde una caché en memoria y los
+    clics se aplican sobre ella. El valor resultante se escribe una sola vez por
+    ventana de `debounce_seconds`, así que una ráfaga de clics acaba en un único
+    upsert de hidratacion_diaria y estadisticas_usuario.vasos_agua.
+    """
+    
+    DEFAULT_GOAL = 8
+    MAX_GLASSES = 30
+    
+    LOAD_DAY_SQL = """
+    SELECT vasos_consumidos, meta_vasos FROM hidratacion_diaria
+    WHERE usuario_id = ? AND fecha = ?
+    """
+    # Valores absolutos: reescribir el mismo día es idempotente
+    SAVE_DAY_SQL = """
+    INSERT INTO hidratacion_diaria (usuario_id, fecha, vasos_consumidos)
+    VALUES (?, ?, ?)
+    ON CONFLICT(usuario_id, fecha) DO UPDATE SET
+        vasos_consumidos = excluded.vasos_consumidos
+    """
+    SAVE_DAILY_STATS_SQL = """
+    INSERT INTO estadisticas_usuario (usuario_id, fecha, vasos_agua)
+    VALUES (?, ?, ?)
+    ON CONFLICT(usuario_id, fecha) DO UPDATE SET
+        vasos_agua = excluded.vasos_agua
+    """
+    
+    def __init__(self, database: DatabaseInterface, writer: Optional[WriteBehindQueue] = None,
+                 debounce_seconds: float = 1.0, max_entries: int = 10000):
+        self.db = database
+        self.writer = writer
+        self.debounce_seconds = debounce_seconds
+        self._days = TTLCache(max_entries=max_entries, ttl_seconds=None)
+        self._dirty: Dict[Tuple[int, str], int] = {}
+        self._lock = threading.Lock()
+        self._timer = None
+        self._closed = False
+        if writer is not None:
+            writer.register('hydration', self._write_day)
+        _open_hydration_services.add(self)
+    
+    def get_daily_intake(self, user_id: int, date=None) -> HydrationDay:
+        """Vasos del día (hoy por defecto), desde la caché en memoria"""
+        key = (user_id, self._normalize_date(date))
+        with self._lock:
+            glasses, goal = self._get_day(key)
+        return HydrationDay(key[1], glasses, goal)
+    
+    def add_glasses(self, user_id: int, delta: int = 1, date=None) -> HydrationDay:
+        """Sumar (o restar) vasos y programar su escritura al cerrar la ventana"""
+        key = (user_id, self._normalize_date(date))
+        with self._lock:
+            glasses, goal = self._get_day(key)
+            glasses = max(0, min(self.MAX_GLASSES, glasses + delta))
+            # Las entradas pendientes se quedan en _dirty aunque la caché las desaloje
+            self._days.set(key, (glasses, goal))
+            self._dirty[key] = glasses
+            if self._timer is None and not self._closed:
+                self._timer = threading.Timer(self.debounce_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+            closed = self._closed
+        
+        # Cerrado no hay ventana ni hook de salida: escribir en el momento
+        if closed:
+            self.flush()
+        return HydrationDay(key[1], glasses, goal)
+    
+    def flush(self) -> int:
+        """Escribir ya los días pendientes; devuelve cuántos se enviaron"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._dirty = self._dirty, {}
+        
+        for (user_id, date), glasses in pending.items():
+            try:
+                if self.writer is not None:
+                    self.writer.submit('hydration', user_id, date, glasses)
+                else:
+                    with self.db.transaction() as conn:
+                        self._write_day(conn, user_id, date, glasses)
+            except Exception as e:
+                logger.error(f"Error guardando hidratación: {e}")
+        return len(pending)
+    
+    def close(self) -> int:
+        """Cancelar la ventana en curso y escribir lo pendiente"""
+        _open_hydration_services.discard(self)
+        with self._lock:
+            self._closed = True
+        return self.flush()
+    
+    def _get_day(self, key: Tuple[int, str]) -> Tuple[int, int]:
+        """(vasos, meta) del día, cargándolo la primera vez (con el lock tomado)"""
+        if key in self._dirty:
+            day = self._days.get(key)
+            if day is not None:
+                return day
+            return self._dirty[key], self.DEFAULT_GOAL
+        return self._days.get_or_load(key, lambda: self._load_day(*key))
+    
+    def _load_day(self, user_id: int, date: str) -> Tuple[int, int]:
+        """Leer el día de hidratacion_diaria (0 vasos si no hay fila)"""
+        rows = self.db.execute_query(self.LOAD_DAY_SQL, (user_id, date))
+        if not rows:
+            return 0, self.DEFAULT_GOAL
+        return rows[0]['vasos_consumidos'] or 0, rows[0]['meta_vasos'] or self.DEFAULT_GOAL
+    
+    def _write_day(self, conn: sqlite3.Connection, user_id: int, date: str, glasses: int):
+        """Upsert del día en hidratacion_diaria y estadisticas_usuario (manejador de la cola)"""
+        conn.execute(self.SAVE_DAY_SQL, (user_id, date, glasses))
+        conn.execute(self.SAVE_DAILY_STATS_SQL, (user_id, date, glasses))
+    
+    @staticmethod
+    def _normalize_date(date) -> str:
+        """Fecha ISO del día; None es hoy"""
+        if date is None:
+            return datetime.date.today().isoformat()
+        return NutritionService._normalize_date(date)
 
 class KidsActivityService:
     """Servicio para actividades infantiles"""
     
-    def __init__(self, database: DatabaseInterface):
+    def __init__(self, database: DatabaseInterface, catalog: Optional[CatalogCache] = None,
+                 max_filters: int = 256):
         self.db = database
+        self.catalog = catalog or CatalogCache(database)
+        # IDs por combinación de filtros, acotados con LRU: las edades llegan del usuario
+        self._filter_ids = TTLCache(max_entries=max_filters, ttl_seconds=None)
+    
+    # Filtros tipados sobre índices compuestos; devuelve solo los IDs en el orden de la pestaña
+    FILTER_IDS_SQL = """
+    SELECT id FROM actividades_infantiles 
+    WHERE activo = 1{filters}
+    ORDER BY dificultad, nombre
+    """
     
-    def get_kids_activities(self, activity_type: str = None, age_range: str = None) -> List[KidsActivity]:
-        """Obtener actividades infantiles"""
+    def get_kids_activities(self, activity_type: str = None, age_range: str = None,
+                            difficulty: str = None, min_age: Optional[int] = None,
+                            max_age: Optional[int] = None) -> List[KidsActivity]:
+        """Obtener actividades infantiles
+        
+        El rango de edad puede darse como texto ("6-12 años") o con min_age/max_age;
+        se devuelven las actividades cuyo rango se solapa con el pedido.
+        """
         try:
-            query = """
-            SELECT * FROM actividades_infantiles 
-            WHERE activo = 1
-            """
-            params = []
-            
-            if activity_type:
-                query += " AND tipo = ?"
-                params.append(activity_type)
-            
-            if age_range:
-                # Parsear rango de edad (ej: "6-12 años")
-                if '-' in age_range:
-                    min_age, max_age = age_range.split('-')[0], age_range.split('-')[1].split()[0]
-                    query += " AND edad_minima <= ? AND edad_maxima >= ?"
-                    params.extend([max_age, min_age])
+            if age_range and min_age is None and max_age is None:
+                min_age, max_age = self.parse_age_range(age_range)
             
-            query += " ORDER BY dificultad, nombre"
-            
-            activities_data = self.db.execute_query(query, tuple(params))
-            activities = []
-            
-            for activity_data in activities_data:
-                activity = KidsActivity(
-                    id=activity_data['id'],
-                    name=activity_data['nombre'],
-                    type=activity_data['tipo'],
-                    duration=f"{activity_data['duracion_minutos']} min",
-                    age=f"{activity_data['edad_minima']}-{activity_data['edad_maxima']} años",
-                    image=self._get_type_emoji(activity_data['tipo']),
-                    difficulty=activity_data['dificultad'],
-                    materials=activity_data['materiales'].split(', ') if activity_data['materiales'] else [],
-                    steps=activity_data['instrucciones'].split('\n') if activity_data['instrucciones'] else [],
-                    benefits=activity_data['beneficios'].split(', ') if activity_data['beneficios'] else []
-                )
-                activities.append(activity)
+            # Actividades ya construidas (listas partidas una sola vez) por ID
+            activities = self.catalog.get('kids_activities', ('actividades_infantiles',),
+                                          self._load_kids_activities)
+            if not any(value is not None for value in (activity_type, difficulty, min_age, max_age)):
+                return [self._copy_activity(activity) for activity in activities.values()]
             
-            return activities
+            # Los IDs valen mientras el catálogo cacheado sea el mismo objeto
+            filter_key = (activity_type, difficulty, min_age, max_age)
+            cached = self._filter_ids.get(filter_key)
+            if cached is not None and cached[0] is activities:
+                ids = cached[1]
+            else:
+                ids = self._filter_activity_ids(activity_type, difficulty, min_age, max_age)
+                self._filter_ids.set(filter_key, (activities, ids))
+            return [self._copy_activity(activities[activity_id])
+                    for activity_id in ids if activity_id in activities]
         except Exception as e:
             logger.error(f"Error obteniendo actividades infantiles: {e}")
             return []
     
+    @staticmethod
+    def _copy_activity(activity: KidsActivity) -> KidsActivity:
+        """Copia de la actividad cacheada: quien la recibe puede modificar sus listas"""
+        return replace(activity, materials=list(activity.materials), steps=list(activity.steps),
+                       benefits=list(activity.benefits))
+    
+    @staticmethod
+    def parse_age_range(age_range: str) -> Tuple[Optional[int], Optional[int]]:
+        """Convertir "6-12 años" en (6, 12) y "8 años" en (8, 8)"""
+        ages = [int(age) for age in re.findall(r"\d+", age_range or "")]
+        if not ages:
+            return None, None
+        return ages[0], ages[1] if len(ages) > 1 else ages[0]
+    
+    def _filter_activity_ids(self, activity_type: Optional[str], difficulty: Optional[str],
+                             min_age: Optional[int], max_age: Optional[int]) -> List[int]:
+        """IDs de las actividades que cumplen los filtros, con parámetros enteros"""
+        filters = ""
+        params = []
+        
+        if activity_type:
+            filters += " AND tipo = ?"
+            params.append(activity_type)
+        
+        if difficulty:
+            filters += " AND dificultad = ?"
+            params.append(difficulty)
+        
+        if max_age is not None:
+            filters += " AND edad_minima <= ?"
+            params.append(int(max_age))
+        
+        if min_age is not None:
+            filters += " AND edad_maxima >= ?"
+            params.append(int(min_age))
+        
+        rows = self.db.execute_query(self.FILTER_IDS_SQL.format(filters=filters), tuple(params))
+        return [row['id'] for row in rows]
+    
+    def _load_kids_activities(self) -> Dict[int, KidsActivity]:
+        """Cargar todas las actividades activas por ID, con las listas ya partidas"""
+        query = """
+        SELECT * FROM actividades_infantiles 
+        WHERE activo = 1
+        ORDER BY dificultad, nombre
+        """
+        activities_data = self.db.execute_query(query)
+        activities = {}
+        
+        for activity_data in activities_data:
+            activity = KidsActivity(
+                id=activity_data['id'],
+                name=activity_data['nombre'],
+                type=activity_data['tipo'],
+                duration=f"{activity_data['duracion_minutos']} min",
+                age=f"{activity_data['edad_minima']}-{activity_data['edad_maxima']} años",
+                image=self._get_type_emoji(activity_data['tipo']),
+                difficulty=activity_data['dificultad'],
+                materials=activity_data['materiales'].split(', ') if activity_data['materiales'] else [],
+                steps=activity_data['instrucciones'].split('\n') if activity_data['instrucciones'] else [],
+                benefits=activity_data['beneficios'].split(', ') if activity_data['beneficios'] else []
+            )
+            activities[activity.id] = activity
+        
+        return activities
+    
     def _get_type_emoji(self, activity_type: str) -> str:
         """Obtener emoji para tipo de actividad"""
         emoji_map = {
@@ -826,45 +2061,81 @@ class KidsActivityService:
 class MediaService:
     """Servicio para contenido multimedia"""
     
-    def __init__(self, database: DatabaseInterface):
+    def __init__(self, database: DatabaseInterface, catalog: Optional[CatalogCache] = None):
         self.db = database
+        self.catalog = catalog or CatalogCache(database)
+    
+    # Paginación por clave (keyset) sobre el mismo orden que el catálogo
+    MOVIES_PAGE_SQL = """
+    SELECT * FROM contenido_multimedia 
+    WHERE activo = 1{premium}{after}
+    ORDER BY rating_promedio DESC, año_produccion DESC, id DESC
+    LIMIT ?
+    """
     
     def get_movies(self, is_premium_only: bool = False) -> List[Movie]:
         """Obtener películas y contenido multimedia"""
         try:
-            query = """
-            SELECT * FROM contenido_multimedia 
-            WHERE activo = 1
-            """
+            catalog = self.catalog.get('movies', ('contenido_multimedia',), self._load_movies)
+            return [movie for movie in catalog if movie.is_premium or not is_premium_only]
+        except Exception as e:
+            logger.error(f"Error obteniendo películas: {e}")
+            return []
+    
+    def _load_movies(self) -> List[Movie]:
+        """Cargar todo el contenido multimedia activo"""
+        query = """
+        SELECT * FROM contenido_multimedia 
+        WHERE activo = 1
+        ORDER BY rating_promedio DESC, año_produccion DESC, id DESC
+        """
+        return [self._build_movie(movie_data) for movie_data in self.db.execute_query(query)]
+    
+    def get_movies_page(self, page_size: int = 10, cursor: Optional[Tuple[float, int, int]] = None,
+                        is_premium_only: bool = False) -> MoviePage:
+        """Obtener una página de contenido a partir del cursor de la página anterior
+        
+        El cursor es (rating_promedio, año_produccion, id) del último elemento
+        mostrado, así cada página es una búsqueda por índice sin OFFSET.
+        """
+        try:
             params = []
+            after = ""
+            if cursor is not None:
+                after = " AND (rating_promedio, año_produccion, id) < (?, ?, ?)"
+                params.extend(cursor)
+            params.append(page_size + 1)
             
-            if is_premium_only:
-                query += " AND es_premium = 1"
-            
-            query += " ORDER BY rating_promedio DESC, año_produccion DESC"
-            
+            query = self.MOVIES_PAGE_SQL.format(
+                premium=" AND es_premium = 1" if is_premium_only else "", after=after)
             movies_data = self.db.execute_query(query, tuple(params))
-            movies = []
             
-            for movie_data in movies_data:
-                movie = Movie(
-                    id=movie_data['id'],
-                    title=movie_data['titulo'],
-                    genre=movie_data['genero'],
-                    duration=f"{movie_data['duracion_minutos']} min",
-                    rating=movie_data['rating_promedio'],
-                    image=self._get_genre_emoji(movie_data['genero']),
-                    description=movie_data['descripcion'],
-                    year=movie_data['año_produccion'],
-                    cast=movie_data['elenco'].split(', ') if movie_data['elenco'] else [],
-                    is_premium=movie_data['es_premium']
-                )
-                movies.append(movie)
+            # Se pide una fila de más para saber si hay otra página
+            page_data = movies_data[:page_size]
+            next_cursor = None
+            if len(movies_data) > page_size:
+                last = page_data[-1]
+                next_cursor = (last['rating_promedio'], last['año_produccion'], last['id'])
             
-            return movies
+            return MoviePage([self._build_movie(movie_data) for movie_data in page_data], next_cursor)
         except Exception as e:
-            logger.error(f"Error obteniendo películas: {e}")
-            return []
+            logger.error(f"Error obteniendo página de películas: {e}")
+            return MoviePage([])
+    
+    def _build_movie(self, movie_data: Dict) -> Movie:
+        """Crear un Movie a partir de una fila de contenido_multimedia"""
+        return Movie(
+            id=movie_data['id'],
+            title=movie_data['titulo'],
+            genre=movie_data['genero'],
+            duration=f"{movie_data['duracion_minutos']} min",
+            rating=movie_data['rating_promedio'],
+            image=self._get_genre_emoji(movie_data['genero']),
+            description=movie_data['descripcion'],
+            year=movie_data['año_produccion'],
+            cast=movie_data['elenco'].split(', ') if movie_data['elenco'] else [],
+            is_premium=movie_data['es_premium']
+        )
     
     def _get_genre_emoji(self, genre: str) -> str:
         """Obtener emoji para género"""
@@ -877,6 +2148,71 @@ class MediaService:
         }
         return emoji_map.get(genre, '🎬')
 
+class SearchService:
+    """Búsqueda de texto completo sobre entrenamientos, ejercicios, comidas, actividades y multimedia"""
+    
+    # Código de origen guardado en el rowid del índice: rowid = id * 8 + código
+    SOURCES = {
+        1: ('entrenamiento', '💪', 'Entrenamiento'),
+        2: ('ejercicio', '🏋️', 'Ejercicio'),
+        3: ('comida', '🥗', 'Comida'),
+        4: ('actividad', '🎨', 'Actividad infantil'),
+        5: ('multimedia', '🎬', 'Película'),
+    }
+    
+    # bm25 con más peso para el título; el resultado más relevante tiene la puntuación más baja
+    SEARCH_SQL = """
+    SELECT rowid / 8 AS id, rowid % 8 AS origen, titulo,
+           snippet(busqueda_fts, -1, '**', '**', '…', 12) AS fragmento,
+           bm25(busqueda_fts, 5.0, 1.0) AS puntuacion
+    FROM busqueda_fts
+    WHERE busqueda_fts MATCH ?{kinds}
+    ORDER BY puntuacion
+    LIMIT ?
+    """
+    
+    def __init__(self, database: DatabaseInterface):
+        self.db = database
+    
+    def search(self, text: str, limit: int = 20, kinds: Optional[List[str]] = None) -> List[SearchResult]:
+        """Buscar por palabras (prefijos incluidos) y devolver resultados ordenados por relevancia"""
+        match = self._build_match(text)
+        if not match:
+            return []
+        
+        try:
+            params: List = [match]
+            kinds_filter = ""
+            if kinds:
+                codes = [code for code, (kind, _, _) in self.SOURCES.items() if kind in kinds]
+                kinds_filter = f" AND rowid % 8 IN ({', '.join('?' * len(codes))})"
+                params.extend(codes)
+            params.append(limit)
+            
+            rows = self.db.execute_query(self.SEARCH_SQL.format(kinds=kinds_filter), tuple(params))
+            results = []
+            for row in rows:
+                kind, icon, label = self.SOURCES.get(row['origen'], ('desconocido', '🔎', ''))
+                results.append(SearchResult(
+                    kind=kind,
+                    id=row['id'],
+                    title=row['titulo'],
+                    snippet=row['fragmento'],
+                    score=round(row['puntuacion'], 3),
+                    icon=icon,
+                    label=label
+                ))
+            return results
+        except Exception as e:
+            logger.error(f"Error buscando '{text}': {e}")
+            return []
+    
+    @staticmethod
+    def _build_match(text: str) -> str:
+        """Convertir el texto del usuario en una consulta FTS5 segura (todas las palabras, por prefijo)"""
+        words = re.findall(r"\w+", text or "")
+        return " ".join(f'"{word}"*' for word in words)
+
 # =============================================================================
 # UTILIDADES Y FUNCIONES AUXILIARES
 # =============================================================================
@@ -905,63 +2241,109 @@ class ThemeManager:
             'accent': '#4338CA'
         }
     
+    # Hoja de estilos base; las variantes de tema se añaden detrás
+    CSS_PATH = Path(__file__).resolve().parent / 'css' / 'styles.css'
+    DEFAULT_ACCENT = '#667eea'
+    
+    DARK_MODE_CSS = """
+body { background: #0b1120 !important; }
+.main-header { background: linear-gradient(135deg, #0f172a 0%, #111827 100%) !important; }
+.workout-card, .chart-container, .metric-container { background: rgba(15, 23, 42, 0.92) !important; color: #e5e7eb !important; }
+.kids-card { background: linear-gradient(135deg, #334155 0%, #0f172a 100%) !important; color: #e5e7eb !important; }
+.premium-card { background: linear-gradient(135deg, #1f2937 0%, #111827 100%) !important; }
+.stButton > button { background: linear-gradient(135deg, #4f46e5 0%, #7c3aed 100%) !important; }
+.stTextInput > div > div > input { background: #0b1220 !important; color: #e5e7eb !important; border-color: #374151 !important; }
+.stSelectbox > div > div > select { background: #0b1220 !important; color: #e5e7eb !important; }
+"""
+    
+    ACCENT_CSS_TEMPLATE = """
+:root {{ --accent: {accent}; }}
+.stButton > button {{ box-shadow: 0 8px 20px {accent}55; }}
+.progress-fill {{ background: linear-gradient(90deg, {accent} 0%, #764ba2 100%); }}
+.metric-container:hover {{ box-shadow: 0 15px 35px {accent}33; }}
+.recommendation-card {{ border-image: linear-gradient(135deg, {accent}, #764ba2) 1; }}
+.sidebar-user-info {{ box-shadow: 0 10px 30px {accent}33; }}
+"""
+    
+    # El script copia los estilos al <head> de la página, donde siguen aplicados
+    # aunque el iframe desaparezca en la siguiente ejecución
+    INJECT_CSS_TEMPLATE = """<style id="fithome-theme">
+{css}
+</style>
+<script>
+const doc = window.parent.document;
+let style = doc.getElementById('fithome-theme');
+if (!style) {{
+    style = doc.createElement('style');
+    style.id = 'fithome-theme';
+    doc.head.appendChild(style);
+}}
+style.textContent = document.getElementById('fithome-theme').textContent;
+</script>"""
+    
     @staticmethod
-    def apply_custom_css():
-        """Aplicar estilos CSS personalizados"""
-        st.markdown("""
-        <style>
-            .main-header {
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                padding: 2rem;
-                border-radius: 1rem;
-                color: white;
-                margin-bottom: 2rem;
-            }
-            
-            .workout-card {
-                background: white;
-                padding: 1.5rem;
-                border-radius: 1rem;
-                box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-                margin-bottom: 1rem;
-                border-left: 4px solid #667eea;
-            }
-            
-            .stats-card {
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                padding: 1.5rem;
-                border-radius: 1rem;
-                color: white;
-                text-align: center;
-                margin-bottom: 1rem;
-            }
-            
-            .kids-card {
-                background: linear-gradient(135deg, #ffeaa7 0%, #fab1a0 100%);
-                padding: 1.5rem;
-                border-radius: 1rem;
-                color: #2d3436;
-                margin-bottom: 1rem;
-            }
-            
-            .premium-card {
-                background: linear-gradient(135deg, #fdcb6e 0%, #e17055 100%);
-                padding: 2rem;
-                border-radius: 1rem;
-                color: white;
-                text-align: center;
-                margin-bottom: 2rem;
-            }
-            
-            .metric-container {
-                background: white;
-                padding: 1rem;
-                border-radius: 0.5rem;
-                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-                text-align: center;
-            }
-        </style>
-        """, unsafe_allow_html=True)
+    @functools.lru_cache(maxsize=1)
+    def load_base_css() -> str:
+        """Leer la hoja de estilos base (una vez por proceso)"""
+        return ThemeManager.CSS_PATH.read_text(encoding='utf-8')
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def build_theme_css(accent: str = DEFAULT_ACCENT, dark_mode: bool = False) -> str:
+        """Hoja de estilos completa de un tema: base, modo oscuro y color de acento"""
+        parts = [ThemeManager.load_base_css()]
+        if dark_mode:
+            parts.append(ThemeManager.DARK_MODE_CSS)
+        parts.append(ThemeManager.ACCENT_CSS_TEMPLATE.format(accent=accent))
+        return '\n'.join(parts)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def build_theme_payload(accent: str = DEFAULT_ACCENT, dark_mode: bool = False) -> str:
+        """HTML que instala el tema en la página"""
+        css = ThemeManager.build_theme_css(accent, dark_mode)
+        return ThemeManager.INJECT_CSS_TEMPLATE.format(css=css)
+    
+    @staticmethod
+    def apply_custom_css(accent: str = DEFAULT_ACCENT, dark_mode: bool = False) -> int:
+        """Aplicar estilos CSS personalizados si el navegador aún no tiene este tema
+        
+        Devuelve los bytes enviados en esta ejecución. Los enviados y los que
+        se ahorran al no repetir el envío quedan en st.session_state
+        (css_bytes_sent y css_bytes_saved). El tema
+        se da por entregado con mark_css_delivered() al terminar la ejecución:
+        si un st.rerun() la corta antes, el iframe podría no llegar a cargarse.
+        """
+        import streamlit as st
+        
+        signature = (accent, dark_mode)
+        payload = ThemeManager.build_theme_payload(accent, dark_mode)
+        payload_bytes = len(payload.encode('utf-8'))
+        if st.session_state.get('theme_signature') == signature:
+            st.session_state.css_bytes_sent = 0
+            st.session_state.css_bytes_saved = payload_bytes
+            return 0
+        
+        # Las versiones recientes de Streamlit sustituyen components.html por
+        # st.iframe, que no admite altura 0
+        if hasattr(st, 'iframe'):
+            st.iframe(payload, height=1)
+        else:
+            import streamlit.components.v1 as components
+            components.html(payload, height=0)
+        st.session_state.theme_pending = signature
+        st.session_state.css_bytes_sent = payload_bytes
+        st.session_state.css_bytes_saved = 0
+        return payload_bytes
+    
+    @staticmethod
+    def mark_css_delivered():
+        """Marcar como entregado el tema enviado en la ejecución actual"""
+        import streamlit as st
+        pending = st.session_state.get('theme_pending')
+        if pending is not None:
+            st.session_state.theme_signature = pending
+            st.session_state.theme_pending = None
 
 class ValidationUtils:
     """Utilidades de validación"""
@@ -1036,6 +2418,82 @@ class DataProcessor:
 # CONFIGURACIÓN Y INICIALIZACIÓN
 # =============================================================================
 
+class ServiceRegistry(Mapping):
+    """Registro perezoso de servicios: cada uno se construye en su primer acceso
+    
+    Se usa como el diccionario de servicios de siempre (`services['user_service']`).
+    Las factorías reciben el propio registro para pedir sus dependencias, de modo
+    que todos los servicios comparten la misma base de datos (y su pool), la
+    misma caché de catálogos y el mismo analizador. El tiempo de construcción de
+    cada servicio queda en `timings()`.
+    """
+    
+    def __init__(self):
+        self._factories: Dict[str, Callable[["ServiceRegistry"], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._timings: Dict[str, float] = {}
+        self._nested_ms: List[float] = []
+        self._lock = threading.RLock()
+    
+    def register(self, name: str, factory: Callable[["ServiceRegistry"], Any]):
+        """Registrar la factoría de un servicio sin construirlo"""
+        with self._lock:
+            self._factories[name] = factory
+    
+    def provide(self, name: str, instance: Any):
+        """Registrar un servicio ya construido"""
+        with self._lock:
+            self._factories[name] = lambda registry: instance
+            self._instances[name] = instance
+            self._timings[name] = 0.0
+    
+    def __getitem__(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        
+        # RLock: las factorías piden sus dependencias desde el mismo thread
+        with self._lock:
+            if name in self._instances:
+                return self._instances[name]
+            factory = self._factories[name]
+            # Pila de tiempos de las dependencias construidas dentro de cada factoría
+            self._nested_ms.append(0.0)
+            start = time.perf_counter()
+            try:
+                instance = factory(self)
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                nested = self._nested_ms.pop()
+                if self._nested_ms:
+                    self._nested_ms[-1] += elapsed
+            
+            # Tiempo propio del servicio, sin el de sus dependencias
+            own = elapsed - nested
+            self._instances[name] = instance
+            self._timings[name] = round(own, 3)
+            logger.info(f"Servicio '{name}' creado en {own:.1f} ms")
+            return instance
+    
+    def __contains__(self, name) -> bool:
+        # Sin esto Mapping construiría el servicio para responder
+        return name in self._factories
+    
+    def __iter__(self):
+        return iter(self._factories)
+    
+    def __len__(self) -> int:
+        return len(self._factories)
+    
+    def is_loaded(self, name: str) -> bool:
+        """Indica si el servicio ya se ha construido"""
+        return name in self._instances
+    
+    def timings(self) -> Dict[str, float]:
+        """Milisegundos que tardó en construirse cada servicio, en orden de creación"""
+        with self._lock:
+            return dict(self._timings)
+
 class AppConfig:
     """Configuración de la aplicación"""
     
@@ -1055,83 +2513,3 @@ class AppConfig:
             "🎬 Películas",
             "📊 Progreso"
         ]
-
-def initialize_app():
-    """Inicializar aplicación"""
-    # Configurar página
-    st.set_page_config(
-        page_title=AppConfig().app_title,
-        page_icon=AppConfig().app_icon,
-        layout=AppConfig().layout,
-        initial_sidebar_state=AppConfig().initial_sidebar_state
-    )
-    
-    # Aplicar estilos
-    ThemeManager.apply_custom_css()
-    
-    # Inicializar servicios
-    database = SQLiteDatabase()
-    if not database.connect():
-        st.error("Error conectando a la base de datos")
-        return None
-    
-    return {
-        'database': database, 
-        'user_service': UserService(database),
-        'workout_service': WorkoutService(database),
-        'nutrition_service': NutritionService(database),
-        'kids_service': KidsActivityService(database),
-        'media_service': MediaService(database),
-        'analytics': DataAnalytics(database)
-    }
-
-# =============================================================================
-# FUNCIÓN PRINCIPAL
-# =============================================================================
-
-def main():
-    """Función principal de la aplicación"""
-    try:
-        # Inicializar servicios
-        services = initialize_app()
-        if not services:
-            return
-        
-        # Inicializar estado de sesión
-        if 'current_screen' not in st.session_state:
-            st.session_state.current_screen = 'loading'
-        if 'user' not in st.session_state:
-            st.session_state.user = None
-        if 'user_profile' not in st.session_state:
-            st.session_state.user_profile = UserProfile()
-        if 'user_stats' not in st.session_state:
-            st.session_state.user_stats = UserStats()
-        if 'onboarding_step' not in st.session_state:
-            st.session_state.onboarding_step = 0
-        if 'water_intake' not in st.session_state:
-            st.session_state.water_intake = 0
-        if 'selected_workout' not in st.session_state:
-            st.session_state.selected_workout = None
-        if 'workout_in_progress' not in st.session_state:
-            st.session_state.workout_in_progress = False
-        if 'current_exercise' not in st.session_state:
-            st.session_state.current_exercise = 0
-        if 'exercise_timer' not in st.session_state:
-            st.session_state.exercise_timer = 30
-        
-        # Navegación principal
-        if st.session_state.current_screen == 'loading':
-            show_loading_screen()
-        elif st.session_state.current_screen == 'auth':
-            show_auth_screen(services)
-        elif st.session_state.current_screen == 'onboarding':
-            show_onboarding_screen(services)
-        elif st.session_state.current_screen == 'dashboard':
-            show_dashboard(services)
-        
-    except Exception as e:
-        logger.error(f"Error en función principal: {e}")
-        st.error("Ha ocurrido un error inesperado. Por favor, recarga la página.")
-
-if __name__ == "__main__":
-    main()
@@ -0,0 +1,223 @@
+"""
+FitHome Pro - Servicios Asíncronos
+Variante asíncrona de la capa de servicios para montar páginas con consultas concurrentes
+
+Autor: Equipo FitHome Pro
+Fecha: 2025
+"""
+
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.app_logic import (
+    DatabaseInterface, HydrationDay, KidsActivity, KidsActivityService, MediaService,
+    Movie, MoviePage, NutritionPlan, NutritionService, UserService, UserStats,
+    Workout, WorkoutService
+)
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# BASE DE DATOS ASÍNCRONA
+# =============================================================================
+
+class AsyncDatabaseInterface(ABC):
+    """Contraparte asíncrona de DatabaseInterface"""
+
+    @abstractmethod
+    async def execute_query(self, query: str, params: tuple = ()) -> List[Dict]:
+        pass
+
+    @abstractmethod
+    async def execute_update(self, query: str, params: tuple = ()) -> bool:
+        pass
+
+    @abstractmethod
+    async def run(self, func: Callable, *args) -> Any:
+        pass
+
+class ExecutorDatabase(AsyncDatabaseInterface):
+    """Ejecuta las consultas de una base de datos síncrona en un pool de threads dedicado
+
+    sqlite3 libera el GIL mientras SQLite trabaja, así que las consultas lanzadas
+    a la vez avanzan en paralelo, cada una con su conexión del pool. El número
+    de threads por defecto es el tamaño del pool de conexiones, para que ningún
+    thread se quede esperando una conexión.
+    """
+
+    def __init__(self, database: DatabaseInterface, max_workers: Optional[int] = None):
+        self.db = database
+        pool = getattr(database, 'pool', None)
+        self.max_workers = max_workers or getattr(pool, 'max_size', 4)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="fithome-db")
+
+    async def execute_query(self, query: str, params: tuple = ()) -> List[Dict]:
+        """Ejecutar consulta SELECT en el pool de threads"""
+        return await self.run(self.db.execute_query, query, params)
+
+    async def execute_update(self, query: str, params: tuple = ()) -> bool:
+        """Ejecutar consulta INSERT/UPDATE/DELETE en el pool de threads"""
+        return await self.run(self.db.execute_update, query, params)
+
+    async def run(self, func: Callable, *args) -> Any:
+        """Ejecutar cualquier llamada bloqueante en el pool de threads"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def close(self):
+        """Detener el pool de threads (la base de datos síncrona no se cierra)"""
+        self._executor.shutdown(wait=True)
+
+# =============================================================================
+# SERVICIOS ASÍNCRONOS
+# =============================================================================
+
+class AsyncUserService:
+    """Variante asíncrona de UserService"""
+
+    def __init__(self, database: AsyncDatabaseInterface, service: UserService):
+        self.db = database
+        self.service = service
+
+    async def get_user_stats(self, user_id: int) -> UserStats:
+        """Estadísticas del usuario con sus cuatro consultas lanzadas a la vez"""
+        try:
+            params = (user_id,)
+            results = await asyncio.gather(
+                self.db.execute_query(UserService.STATS_TOTALS_SQL, params),
+                self.db.execute_query(UserService.TODAY_STATS_SQL, params),
+                self.db.execute_query(UserService.WEIGHT_PROGRESS_SQL, params),
+                self.db.execute_query(UserService.ACHIEVEMENTS_SQL, params)
+            )
+            return UserService.build_user_stats(*results)
+        except Exception as e:
+            logger.error(f"Error obteniendo estadísticas del usuario: {e}")
+            return UserStats()
+
+    async def get_achievements(self, user_id: int) -> List[str]:
+        """Nombres de los logros del usuario"""
+        rows = await self.db.execute_query(UserService.ACHIEVEMENTS_SQL, (user_id,))
+        return [row['nombre'] for row in rows]
+
+class AsyncWorkoutService:
+    """Variante asíncrona de WorkoutService (el catálogo sigue en su CatalogCache)"""
+
+    def __init__(self, database: AsyncDatabaseInterface, service: WorkoutService):
+        self.db = database
+        self.service = service
+
+    async def get_workouts(self, category: str = None, level: str = None,
+                           include_exercises: bool = True) -> List[Workout]:
+        """Entrenamientos filtrados"""
+        return await self.db.run(self.service.get_workouts, category, level, include_exercises)
+
+    async def start_workout_session(self, user_id: int, workout_id: int) -> bool:
+        """Iniciar sesión de entrenamiento"""
+        return await self.db.run(self.service.start_workout_session, user_id, workout_id)
+
+    async def complete_workout_session(self, user_id: int, workout_id: int,
+                                       duration_minutes: int, calories_burned: int,
+                                       rating: int) -> bool:
+        """Completar sesión de entrenamiento"""
+        return await self.db.run(self.service.complete_workout_session, user_id, workout_id,
+                                 duration_minutes, calories_burned, rating)
+
+class AsyncNutritionService:
+    """Variante asíncrona de NutritionService"""
+
+    def __init__(self, database: AsyncDatabaseInterface, service: NutritionService):
+        self.db = database
+        self.service = service
+
+    async def get_nutrition_plans(self, include_meals: bool = True) -> List[NutritionPlan]:
+        """Planes nutricionales"""
+        return await self.db.run(self.service.get_nutrition_plans, include_meals)
+
+    async def track_daily_nutrition(self, user_id: int, date, calories: int,
+                                    carbs: float, proteins: float, fats: float) -> bool:
+        """Registrar nutrición diaria"""
+        return await self.db.run(self.service.track_daily_nutrition, user_id, date,
+                                 calories, carbs, proteins, fats)
+
+class AsyncKidsActivityService:
+    """Variante asíncrona de KidsActivityService"""
+
+    def __init__(self, database: AsyncDatabaseInterface, service: KidsActivityService):
+        self.db = database
+        self.service = service
+
+    async def get_kids_activities(self, activity_type: str = None, age_range: str = None,
+                                  difficulty: str = None, min_age: Optional[int] = None,
+                                  max_age: Optional[int] = None) -> List[KidsActivity]:
+        """Actividades infantiles filtradas (mismos filtros que KidsActivityService)"""
+        return await self.db.run(self.service.get_kids_activities, activity_type, age_range,
+                                 difficulty, min_age, max_age)
+
+class AsyncMediaService:
+    """Variante asíncrona de MediaService"""
+
+    def __init__(self, database: AsyncDatabaseInterface, service: MediaService):
+        self.db = database
+        self.service = service
+
+    async def get_movies(self, is_premium_only: bool = False) -> List[Movie]:
+        """Películas del catálogo"""
+        return await self.db.run(self.service.get_movies, is_premium_only)
+
+    async def get_movies_page(self, page_size: int = 10, cursor: Optional[Tuple] = None,
+                              is_premium_only: bool = False) -> MoviePage:
+        """Una página de películas"""
+        return await self.db.run(self.service.get_movies_page, page_size, cursor, is_premium_only)
+
+# =============================================================================
+# MONTAJE DE PÁGINAS
+# =============================================================================
+
+@dataclass
+class DashboardPage:
+    """Datos del dashboard cargados en una sola ronda de consultas"""
+    stats: UserStats = field(default_factory=UserStats)
+    achievements: List[str] = field(default_factory=list)
+    workouts: List[Workout] = field(default_factory=list)
+    hydration: Optional[HydrationDay] = None
+    seconds: float = 0.0
+
+def build_async_services(services: Dict[str, Any], max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """Envolver los servicios síncronos de initialize_services en sus variantes asíncronas"""
+    database = ExecutorDatabase(services['database'], max_workers)
+    return {
+        'database': database,
+        'user_service': AsyncUserService(database, services['user_service']),
+        'workout_service': AsyncWorkoutService(database, services['workout_service']),
+        'nutrition_service': AsyncNutritionService(database, services['nutrition_service']),
+        'kids_service': AsyncKidsActivityService(database, services['kids_service']),
+        'media_service': AsyncMediaService(database, services['media_service']),
+        'hydration_service': services.get('hydration_service')
+    }
+
+async def load_dashboard_page(async_services: Dict[str, Any], user_id: int,
+                              recommended: int = 2) -> DashboardPage:
+    """Lanzar a la vez las consultas de estadísticas, logros y catálogo del dashboard"""
+    start = time.perf_counter()
+    database = async_services['database']
+    hydration_service = async_services.get('hydration_service')
+
+    stats, achievements, workouts, hydration = await asyncio.gather(
+        async_services['user_service'].get_user_stats(user_id),
+        async_services['user_service'].get_achievements(user_id),
+        async_services['workout_service'].get_workouts(include_exercises=False),
+        database.run(hydration_service.get_daily_intake, user_id) if hydration_service
+        else asyncio.sleep(0)
+    )
+    return DashboardPage(stats=stats, achievements=achievements, workouts=workouts[:recommended],
+                         hydration=hydration, seconds=time.perf_counter() - start)
+
+def assemble_dashboard_page(async_services: Dict[str, Any], user_id: int) -> DashboardPage:
+    """Punto de entrada síncrono para el script de Streamlit, que no tiene event loop propio"""
+    return asyncio.run(load_dashboard_page(async_services, user_id))
@@ -0,0 +1,266 @@
+"""
+FitHome Pro - Utilidades de Caché
+Cachés en memoria compartidas por la lógica de la aplicación y el análisis de datos
+
+Autor: Equipo FitHome Pro
+Fecha: 2025
+"""
+
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# =============================================================================
+# ESTADÍSTICAS
+# =============================================================================
+
+@dataclass
+class CacheStats:
+    """Estadísticas de uso de una caché"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    size: int = 0
+    total_bytes: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Proporción de aciertos sobre el total de lecturas"""
+        total = self.hits + self.misses
+        return round(self.hits / total, 4) if total else 0.0
+
+# =============================================================================
+# CACHÉ LRU CON EXPIRACIÓN
+# =============================================================================
+
+class TTLCache:
+    """Caché LRU acotada en número de entradas y con tiempo de vida por entrada"""
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: Optional[float] = 300.0):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._stats = CacheStats()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Obtener un valor; las entradas caducadas cuentan como fallo"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Guardar un valor, desalojando las entradas menos usadas si hace falta"""
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Obtener un valor o calcularlo con `loader` y guardarlo"""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable):
+        """Eliminar una entrada"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]):
+        """Eliminar todas las entradas cuya clave cumpla el predicado"""
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+    def clear(self):
+        """Vaciar la caché"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        """Obtener una copia de las estadísticas actuales"""
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                expirations=self._stats.expirations,
+                size=len(self._entries)
+            )
+
+# =============================================================================
+# VERSIONES DE DATOS POR USUARIO
+# =============================================================================
+
+class DataVersionRegistry:
+    """Versión de los datos de cada usuario, incrementada en cada escritura"""
+
+    def __init__(self):
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> int:
+        """Versión actual de los datos del usuario"""
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def bump(self, user_id: int) -> int:
+        """Marcar que los datos del usuario han cambiado"""
+        with self._lock:
+            version = self._versions.get(user_id, 0) + 1
+            self._versions[user_id] = version
+            return version
+
+# Registro compartido por todo el proceso
+data_versions = DataVersionRegistry()
+
+# =============================================================================
+# CACHÉ DE FIGURAS
+# =============================================================================
+
+class FigureCache:
+    """Caché LRU de figuras Plotly serializadas a JSON, acotada en bytes
+
+    Las claves son (usuario, tipo de gráfico, versión de datos del usuario), así
+    que una escritura que incrementa la versión deja obsoletas sus figuras sin
+    tener que invalidarlas explícitamente.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: Optional[float] = 300.0,
+                 versions: DataVersionRegistry = data_versions):
+        self.max_bytes = max(1, max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self.versions = versions
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self._stats = CacheStats()
+
+    def get_or_build(self, user_id: int, chart_type: str, builder: Callable[[], Any]) -> Any:
+        """Devolver la figura cacheada o construirla, serializarla y guardarla"""
+        key = (user_id, chart_type, self.versions.get(user_id))
+        payload = self._get(key)
+        if payload is None:
+            figure = builder()
+            self._set(key, figure.to_json())
+            return figure
+        return self._deserialize(payload)
+
+    def invalidate_user(self, user_id: int):
+        """Eliminar todas las figuras de un usuario"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == user_id]:
+                self._remove(key)
+
+    def clear(self):
+        """Vaciar la caché"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> CacheStats:
+        """Obtener una copia de las estadísticas actuales"""
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                expirations=self._stats.expirations,
+                size=len(self._entries),
+                total_bytes=self._total_bytes
+            )
+
+    def _get(self, key: Hashable) -> Optional[str]:
+        """JSON de la figura o None si no está o ha caducado"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+
+            payload, expires_at, _ = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                self._remove(key)
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return payload
+
+    def _set(self, key: Hashable, payload: str):
+        """Guardar el JSON y desalojar las figuras menos usadas hasta caber en max_bytes"""
+        # Tamaño en bytes UTF-8: los títulos y etiquetas llevan acentos y emojis
+        size = len(payload.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            # Las versiones anteriores de la misma figura ya no se volverán a pedir
+            user_id, chart_type, _ = key
+            for stale in [k for k in self._entries if k[0] == user_id and k[1] == chart_type]:
+                self._remove(stale)
+
+            self._entries[key] = (payload, expires_at, size)
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats.evictions += 1
+
+    def _remove(self, key: Hashable):
+        """Eliminar una entrada y descontar su tamaño"""
+        _, _, size = self._entries.pop(key)
+        self._total_bytes -= size
+
+    @staticmethod
+    def _deserialize(payload: str) -> Any:
+        """Reconstruir la figura sin volver a validarla (ya se validó al crearla)"""
+        import plotly.graph_objects as go
+        return go.Figure(json.loads(payload), _validate=False)
+
+# Caché de figuras compartida por todo el proceso
+figure_cache = FigureCache()
+
+def cached_figure(chart_type: str):
+    """Decorador para métodos `(self, user_id)` que devuelven una figura
+
+    Usa `self.figure_cache` cuando está configurada; si es None construye la
+    figura sin caché.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, user_id: int, *args, **kwargs):
+            cache = getattr(self, 'figure_cache', None)
+            if cache is None or args or kwargs:
+                return method(self, user_id, *args, **kwargs)
+            return cache.get_or_build(user_id, chart_type, lambda: method(self, user_id))
+        return wrapper
+    return decorator
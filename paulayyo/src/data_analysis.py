@@ -6,31 +6,24 @@ Autor: Equipo FitHome Pro
 Fecha: 2024
 """
 
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import numpy as np
 from datetime import datetime, timedelta, date
-from typing import List, Dict, Tuple, Optional
+from typing import TYPE_CHECKING, List, Dict, Tuple, Optional
 import sqlite3
 import logging
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass
 import warnings
-warnings.filterwarnings('ignore')
 
-# Configurar estilo de matplotlib
-try:
-    plt.style.use('seaborn-v0_8')
-except (OSError, ValueError):
-    try:
-        plt.style.use('seaborn')
-    except (OSError, ValueError):
-        plt.style.use('default')
-sns.set_palette("husl")
+from src.cache import FigureCache, TTLCache, cached_figure, data_versions
+
+# pandas, numpy y plotly se importan en las funciones que los usan: importar este
+# módulo (p. ej. desde mantenimiento.py o los servicios) no los carga
+if TYPE_CHECKING:
+    import pandas as pd
+    import plotly.graph_objects as go
+
+warnings.filterwarnings('ignore')
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +44,13 @@ class FitnessMetrics:
     weight_loss: float
     bmi_change: float
 
+@dataclass
+class StreakSummary:
+    """Rachas de días consecutivos entrenando"""
+    current_streak: int
+    longest_streak: int
+    last_workout_date: Optional[date]
+
 @dataclass
 class WeeklyProgress:
     """Progreso semanal"""
@@ -81,10 +81,18 @@ class MonthlyReport:
 class FitnessDataAnalyzer:
     """Analizador principal de datos de fitness"""
     
-    def __init__(self, database_path: str = "fithome_pro.db"):
+    def __init__(self, database_path: str = "fithome_pro.db",
+                 cache_ttl: float = 300.0, cache_size: int = 128, pool=None):
         self.db_path = database_path
+        # Con un pool (ConnectionPool de app_logic) cada consulta toma una conexión
+        # prestada; sin él se abre una conexión propia en la primera consulta
+        self.pool = pool
         self.connection = None
-        self._connect()
+        self._connection_lock = threading.Lock()
+        # Caché por usuario: (versión de datos, DataFrame de sesiones)
+        self._user_data_cache = TTLCache(max_entries=cache_size, ttl_seconds=cache_ttl)
+        # Caché de agregados SQL por (usuario, tipo): (versión de datos, DataFrame)
+        self._aggregate_cache = TTLCache(max_entries=cache_size * 3, ttl_seconds=cache_ttl)
     
     def _connect(self):
         """Conectar a la base de datos"""
@@ -96,13 +104,51 @@ class FitnessDataAnalyzer:
         except Exception as e:
             logger.error(f"Error conectando a la base de datos: {e}")
     
-    def get_user_data(self, user_id: int) -> pd.DataFrame:
+    @contextmanager
+    def _connection(self):
+        """Conexión para una consulta: del pool si lo hay, si no la propia"""
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+            return
+        
+        # La conexión propia se comparte entre threads: una consulta a la vez
+        with self._connection_lock:
+            if self.connection is None:
+                self._connect()
+            yield self.connection
+    
+    def get_user_data(self, user_id: int) -> "pd.DataFrame":
         """Obtener datos completos del usuario"""
+        import pandas as pd
+        version = data_versions.get(user_id)
+        cached = self._user_data_cache.get(user_id)
+        
+        if cached is None or cached[0] != version:
+            df = self._load_user_data(user_id)
+            if df is None:
+                return pd.DataFrame()
+            self._user_data_cache.set(user_id, (version, df))
+        else:
+            df = cached[1]
+        
+        # Copia superficial: los consumidores añaden columnas sin tocar la caché
+        return df.copy(deep=False)
+    
+    def invalidate_user_data(self, user_id: int):
+        """Descartar los datos cacheados del usuario"""
+        self._user_data_cache.invalidate(user_id)
+        self._aggregate_cache.invalidate_where(lambda key: key[0] == user_id)
+    
+    def _load_user_data(self, user_id: int) -> Optional["pd.DataFrame"]:
+        """Consultar y preparar las sesiones completadas del usuario"""
+        import pandas as pd
         try:
             query = """
             SELECT 
                 se.fecha_inicio,
                 se.fecha_fin,
+                DATE(COALESCE(se.fecha_fin, se.fecha_inicio), 'localtime') as dia,
                 se.duracion_real_minutos,
                 se.calorias_quemadas,
                 se.rating_usuario,
@@ -117,11 +163,13 @@ class FitnessDataAnalyzer:
             ORDER BY se.fecha_inicio
             """
             
-            df = pd.read_sql_query(query, self.connection, params=(user_id,))
+            with self._connection() as conn:
+                df = pd.read_sql_query(query, conn, params=(user_id,))
             
             if not df.empty:
                 df['fecha_inicio'] = pd.to_datetime(df['fecha_inicio'])
                 df['fecha_fin'] = pd.to_datetime(df['fecha_fin'])
+                df['dia'] = pd.to_datetime(df['dia'])
                 df['date'] = df['fecha_inicio'].dt.date
                 df['week'] = df['fecha_inicio'].dt.isocalendar().week
                 df['month'] = df['fecha_inicio'].dt.month
@@ -130,10 +178,93 @@ class FitnessDataAnalyzer:
             return df
         except Exception as e:
             logger.error(f"Error obteniendo datos del usuario: {e}")
+            return None
+    
+    # =========================================================================
+    # AGREGADOS CALCULADOS EN SQLITE
+    # =========================================================================
+    
+    DAILY_AGGREGATES_SQL = """
+    SELECT 
+        date(fecha_inicio) as fecha,
+        SUM(calorias_quemadas) as calorias_quemadas,
+        SUM(duracion_real_minutos) as duracion_real_minutos,
+        AVG(rating_usuario) as rating_usuario,
+        COUNT(*) as entrenamientos
+    FROM sesiones_entrenamiento
+    WHERE usuario_id = ? AND completado = 1
+    GROUP BY date(fecha_inicio)
+    ORDER BY fecha
+    """
+    
+    CATEGORY_AGGREGATES_SQL = """
+    SELECT 
+        e.categoria,
+        SUM(se.calorias_quemadas) as Total_Calorias,
+        AVG(se.calorias_quemadas) as Promedio_Calorias,
+        SUM(se.duracion_real_minutos) as Total_Minutos,
+        AVG(se.duracion_real_minutos) as Promedio_Minutos,
+        AVG(se.rating_usuario) as Rating_Promedio,
+        COUNT(*) as Total_Entrenamientos
+    FROM sesiones_entrenamiento se
+    JOIN entrenamientos e ON se.entrenamiento_id = e.id
+    WHERE se.usuario_id = ? AND se.completado = 1
+    GROUP BY e.categoria
+    ORDER BY e.categoria
+    """
+    
+    CALENDAR_AGGREGATES_SQL = """
+    SELECT 
+        CAST(strftime('%Y', fecha_inicio) AS INTEGER) as year,
+        CAST(strftime('%m', fecha_inicio) AS INTEGER) as month,
+        CAST(strftime('%d', fecha_inicio) AS INTEGER) as day,
+        SUM(calorias_quemadas) as calorias_quemadas
+    FROM sesiones_entrenamiento
+    WHERE usuario_id = ? AND completado = 1
+    GROUP BY year, month, day
+    ORDER BY year, month, day
+    """
+    
+    def get_daily_aggregates(self, user_id: int) -> "pd.DataFrame":
+        """Calorías, minutos, rating medio y entrenamientos por día"""
+        import pandas as pd
+        df = self._get_aggregate(user_id, 'daily', self.DAILY_AGGREGATES_SQL)
+        if not df.empty and 'date' not in df.columns:
+            df['date'] = pd.to_datetime(df['fecha']).dt.date
+        return df
+    
+    def get_category_aggregates(self, user_id: int) -> "pd.DataFrame":
+        """Totales y promedios por categoría de entrenamiento, indexados por categoría"""
+        df = self._get_aggregate(user_id, 'category', self.CATEGORY_AGGREGATES_SQL)
+        if df.empty:
+            return df
+        return df.set_index('categoria').round(2)
+    
+    def get_calendar_aggregates(self, user_id: int) -> "pd.DataFrame":
+        """Calorías quemadas por año, mes y día del mes"""
+        return self._get_aggregate(user_id, 'calendar', self.CALENDAR_AGGREGATES_SQL)
+    
+    def _get_aggregate(self, user_id: int, kind: str, query: str) -> "pd.DataFrame":
+        """Ejecutar una consulta agregada, cacheada por versión de datos del usuario"""
+        import pandas as pd
+        version = data_versions.get(user_id)
+        cached = self._aggregate_cache.get((user_id, kind))
+        if cached is not None and cached[0] == version:
+            return cached[1].copy(deep=False)
+        
+        try:
+            with self._connection() as conn:
+                df = pd.read_sql_query(query, conn, params=(user_id,))
+        except Exception as e:
+            logger.error(f"Error obteniendo agregados '{kind}' del usuario: {e}")
             return pd.DataFrame()
+        
+        self._aggregate_cache.set((user_id, kind), (version, df))
+        return df.copy(deep=False)
     
-    def get_weight_progress(self, user_id: int) -> pd.DataFrame:
+    def get_weight_progress(self, user_id: int) -> "pd.DataFrame":
         """Obtener progreso de peso del usuario"""
+        import pandas as pd
         try:
             query = """
             SELECT fecha_registro, peso
@@ -142,7 +273,8 @@ class FitnessDataAnalyzer:
             ORDER BY fecha_registro
             """
             
-            df = pd.read_sql_query(query, self.connection, params=(user_id,))
+            with self._connection() as conn:
+                df = pd.read_sql_query(query, conn, params=(user_id,))
             
             if not df.empty:
                 df['fecha_registro'] = pd.to_datetime(df['fecha_registro'])
@@ -200,32 +332,45 @@ class FitnessDataAnalyzer:
             logger.error(f"Error calculando métricas de fitness: {e}")
             return FitnessMetrics(0, 0, 0, 0, 0, 0, 0, 0, 0)
     
-    def _calculate_streak(self, df: pd.DataFrame) -> int:
+    def _calculate_streak(self, df: "pd.DataFrame") -> int:
         """Calcular racha de entrenamientos"""
+        return self.calculate_streaks(df).current_streak
+    
+    @staticmethod
+    def calculate_streaks(df: "pd.DataFrame", reference_date: Optional[date] = None) -> StreakSummary:
+        """Calcular racha actual y máxima sobre los ordinales de día ordenados
+        
+        El día de cada sesión es la columna `dia` (fecha local de su final), la
+        misma definición que usan las rachas persistidas en rachas_usuario.
+        """
+        import numpy as np
         if df.empty:
-            return 0
+            return StreakSummary(0, 0, None)
         
-        # Ordenar por fecha
-        df_sorted = df.sort_values('date')
-        dates = df_sorted['date'].unique()
+        # Días únicos ordenados como enteros (días desde la época)
+        days = np.unique(df['dia'].values.astype('datetime64[D]').astype(np.int64))
         
-        if len(dates) == 0:
-            return 0
+        # Cortes donde dos días entrenados no son consecutivos
+        breaks = np.flatnonzero(np.diff(days) != 1)
+        run_starts = np.concatenate(([0], breaks + 1))
+        run_ends = np.concatenate((breaks, [len(days) - 1]))
+        run_lengths = run_ends - run_starts + 1
         
-        # Calcular racha hacia atrás desde hoy
-        today = date.today()
-        streak = 0
+        reference = reference_date or date.today()
+        reference_day = (reference - date(1970, 1, 1)).days
+        last_day = int(days[-1])
         
-        for i in range(len(dates)):
-            check_date = today - timedelta(days=i)
-            if check_date in dates:
-                streak += 1
-            else:
-                break
+        # La racha sigue viva si el último entrenamiento fue hoy o ayer
+        current = int(run_lengths[-1]) if 0 <= reference_day - last_day <= 1 else 0
         
-        return streak
+        return StreakSummary(
+            current_streak=current,
+            longest_streak=int(run_lengths.max()),
+            last_workout_date=date(1970, 1, 1) + timedelta(days=last_day)
+        )
     
-    def generate_weekly_progress(self, user_id: int, weeks: int = 8) -> List[WeeklyProgress]:
+    def generate_weekly_progress(self, user_id: int, weeks: int = 8,
+                                 reference_date: Optional[date] = None) -> List[WeeklyProgress]:
         """Generar progreso semanal"""
         try:
             df = self.get_user_data(user_id)
@@ -233,31 +378,44 @@ class FitnessDataAnalyzer:
             if df.empty:
                 return []
             
-            weekly_data = []
-            
-            for i in range(weeks):
-                week_start = today - timedelta(weeks=i+1)
-                week_end = today - timedelta(weeks=i)
-                
-                week_df = df[(df['date'] >= week_start) & (df['date'] < week_end)]
-                
-                if not week_df.empty:
-                    progress = WeeklyProgress(
-                        week_start=week_start,
-                        week_end=week_end,
-                        workouts_completed=len(week_df),
-                        calories_burned=int(week_df['calorias_quemadas'].sum()),
-                        minutes_trained=int(week_df['duracion_real_minutos'].sum()),
-                        average_rating=round(week_df['rating_usuario'].mean(), 1)
-                    )
-                    weekly_data.append(progress)
-            
-            return weekly_data
+            return self.weekly_progress_from_frame(df, weeks, reference_date or date.today())
         except Exception as e:
             logger.error(f"Error generando progreso semanal: {e}")
             return []
     
-    def generate_monthly_report(self, user_id: int, months: int = 6) -> List[MonthlyReport]:
+    @staticmethod
+    def weekly_progress_from_frame(df: "pd.DataFrame", weeks: int,
+                                   reference_date: date) -> List[WeeklyProgress]:
+        """Agrupar en una pasada por semanas móviles de 7 días que terminan en la fecha de referencia"""
+        import pandas as pd
+        reference = pd.Timestamp(reference_date)
+        days_back = (reference - df['fecha_inicio'].dt.normalize()).dt.days
+        bucket = days_back // 7
+        in_range = (days_back >= 0) & (bucket < weeks)
+        
+        weekly = df.loc[in_range].groupby(bucket[in_range]).agg(
+            workouts=('calorias_quemadas', 'size'),
+            calories=('calorias_quemadas', 'sum'),
+            minutes=('duracion_real_minutos', 'sum'),
+            rating=('rating_usuario', 'mean')
+        ).sort_index()
+        
+        weekly_data = []
+        for week_index, row in weekly.iterrows():
+            week_end = reference_date - timedelta(weeks=int(week_index))
+            weekly_data.append(WeeklyProgress(
+                week_start=week_end - timedelta(days=6),
+                week_end=week_end,
+                workouts_completed=int(row['workouts']),
+                calories_burned=int(row['calories']),
+                minutes_trained=int(row['minutes']),
+                average_rating=round(float(row['rating']), 1)
+            ))
+        
+        return weekly_data
+    
+    def generate_monthly_report(self, user_id: int, months: int = 6,
+                                reference_date: Optional[date] = None) -> List[MonthlyReport]:
         """Generar reporte mensual"""
         try:
             df = self.get_user_data(user_id)
@@ -265,68 +423,91 @@ class FitnessDataAnalyzer:
             if df.empty:
                 return []
             
-            monthly_reports = []
-            
-            for i in range(months):
-                month_date = today - timedelta(days=30*i)
-                month_start = month_date.replace(day=1)
-                
-                if i == 0:
-                    month_end = today
-                else:
-                    next_month = month_start + timedelta(days=32)
-                    month_end = next_month.replace(day=1) - timedelta(days=1)
-                
-                month_df = df[(df['date'] >= month_start) & (df['date'] <= month_end)]
-                
-                if not month_df.empty:
-                    # Calcular categoría favorita
-                    favorite_category = month_df['categoria'].mode().iloc[0] if not month_df['categoria'].mode().empty else "N/A"
-                    
-                    # Calcular áreas de mejora
-                    improvement_areas = self._identify_improvement_areas(month_df)
-                    
-                    report = MonthlyReport(
-                        month=month_start.strftime('%B'),
-                        year=month_start.year,
-                        total_workouts=len(month_df),
-                        total_calories=int(month_df['calorias_quemadas'].sum()),
-                        total_minutes=int(month_df['duracion_real_minutos'].sum()),
-                        weight_change=0,  # Se calculará por separado
-                        achievements_unlocked=0,  # Se calculará por separado
-                        favorite_category=favorite_category,
-                        improvement_areas=improvement_areas
-                    )
-                    monthly_reports.append(report)
-            
-            return monthly_reports
+            return self.monthly_report_from_frame(df, months, reference_date or date.today())
         except Exception as e:
             logger.error(f"Error generando reporte mensual: {e}")
             return []
     
-    def _identify_improvement_areas(self, df: pd.DataFrame) -> List[str]:
-        """Identificar áreas de mejora"""
-        improvements = []
+    @classmethod
+    def monthly_report_from_frame(cls, df: "pd.DataFrame", months: int,
+                                  reference_date: date) -> List[MonthlyReport]:
+        """Agrupar en una pasada por meses naturales hasta la fecha de referencia"""
+        import pandas as pd
+        reference = pd.Timestamp(reference_date)
+        period = df['fecha_inicio'].dt.to_period('M')
+        first_period = reference.to_period('M') - (months - 1)
+        in_range = (df['fecha_inicio'].dt.normalize() <= reference) & (period >= first_period)
         
+        month_df = df.loc[in_range]
+        if month_df.empty:
+            return []
+        month_period = period[in_range]
+        
+        monthly = month_df.groupby(month_period).agg(
+            workouts=('calorias_quemadas', 'size'),
+            calories=('calorias_quemadas', 'sum'),
+            minutes=('duracion_real_minutos', 'sum'),
+            avg_duration=('duracion_real_minutos', 'mean'),
+            categories=('categoria', 'nunique')
+        )
+        
+        # Categoría favorita: la más frecuente del mes (empates por orden alfabético)
+        category_counts = month_df.groupby([month_period, month_df['categoria']]).size()
+        category_counts = category_counts.reset_index(name='count')
+        category_counts.columns = ['period', 'categoria', 'count']
+        favorites = (category_counts
+                     .sort_values(['period', 'count', 'categoria'], ascending=[True, False, True])
+                     .drop_duplicates('period')
+                     .set_index('period')['categoria'])
+        
+        monthly_reports = []
+        for month, row in monthly.sort_index(ascending=False).iterrows():
+            month_start = month.start_time
+            monthly_reports.append(MonthlyReport(
+                month=month_start.strftime('%B'),
+                year=month_start.year,
+                total_workouts=int(row['workouts']),
+                total_calories=int(row['calories']),
+                total_minutes=int(row['minutes']),
+                weight_change=0,  # Se calculará por separado
+                achievements_unlocked=0,  # Se calculará por separado
+                favorite_category=favorites.get(month, "N/A"),
+                improvement_areas=cls._improvement_areas_from_totals(
+                    row['avg_duration'], row['workouts'], row['categories'],
+                    row['calories'], row['minutes'])
+            ))
+        
+        return monthly_reports
+    
+    def _identify_improvement_areas(self, df: "pd.DataFrame") -> List[str]:
+        """Identificar áreas de mejora"""
         if df.empty:
-            return improvements
+            return []
+        
+        return self._improvement_areas_from_totals(
+            df['duracion_real_minutos'].mean(), len(df), df['categoria'].nunique(),
+            df['calorias_quemadas'].sum(), df['duracion_real_minutos'].sum())
+    
+    @staticmethod
+    def _improvement_areas_from_totals(avg_duration: float, workouts: int, categories: int,
+                                       calories: float, minutes: float) -> List[str]:
+        """Áreas de mejora a partir de los agregados de un periodo"""
+        improvements = []
         
         # Análisis de duración promedio
-        avg_duration = df['duracion_real_minutos'].mean()
         if avg_duration < 20:
             improvements.append("Aumentar duración de entrenamientos")
         
         # Análisis de frecuencia
-        if len(df) < 3:
+        if workouts < 3:
             improvements.append("Aumentar frecuencia de entrenamientos")
         
         # Análisis de variedad
-        unique_categories = df['categoria'].nunique()
-        if unique_categories < 2:
+        if categories < 2:
             improvements.append("Variar tipos de entrenamiento")
         
         # Análisis de intensidad (calorías por minuto)
-        calories_per_min = df['calorias_quemadas'].sum() / df['duracion_real_minutos'].sum()
+        calories_per_min = calories / minutes if minutes else 0
         if calories_per_min < 8:
             improvements.append("Aumentar intensidad de entrenamientos")
         
@@ -339,15 +520,71 @@ class FitnessDataAnalyzer:
 class FitnessChartGenerator:
     """Generador de gráficos para análisis de fitness"""
     
-    def __init__(self, analyzer: FitnessDataAnalyzer):
+    def __init__(self, analyzer: FitnessDataAnalyzer, aggregate_in_sql: bool = False,
+                 figure_cache: Optional[FigureCache] = None):
         self.analyzer = analyzer
+        # Figuras cacheadas por (usuario, gráfico, versión de datos) entre reruns
+        self.figure_cache = figure_cache
+        # Con aggregate_in_sql las series llegan ya agregadas desde SQLite:
+        # se transfieren tantas filas como días/categorías, no como sesiones
+        self.aggregate_in_sql = aggregate_in_sql
+    
+    def _daily_series(self, user_id: int) -> "pd.DataFrame":
+        """Calorías, minutos y rating medio por día"""
+        if self.aggregate_in_sql:
+            return self.analyzer.get_daily_aggregates(user_id)
+        
+        df = self.analyzer.get_user_data(user_id)
+        if df.empty:
+            return df
+        return df.groupby('date').agg(
+            calorias_quemadas=('calorias_quemadas', 'sum'),
+            duracion_real_minutos=('duracion_real_minutos', 'sum'),
+            rating_usuario=('rating_usuario', 'mean')
+        ).reset_index()
     
-    def create_progress_overview(self, user_id: int) -> go.Figure:
+    def _category_stats(self, user_id: int) -> "pd.DataFrame":
+        """Totales y promedios por categoría"""
+        if self.aggregate_in_sql:
+            return self.analyzer.get_category_aggregates(user_id)
+        
+        df = self.analyzer.get_user_data(user_id)
+        if df.empty:
+            return df
+        category_stats = df.groupby('categoria').agg({
+            'calorias_quemadas': ['sum', 'mean'],
+            'duracion_real_minutos': ['sum', 'mean'],
+            'rating_usuario': 'mean',
+            'workout_name': 'count'
+        }).round(2)
+        
+        category_stats.columns = ['Total_Calorias', 'Promedio_Calorias', 
+                                'Total_Minutos', 'Promedio_Minutos', 
+                                'Rating_Promedio', 'Total_Entrenamientos']
+        return category_stats
+    
+    def _calendar_series(self, user_id: int) -> "pd.DataFrame":
+        """Calorías por año, mes y día del mes"""
+        if self.aggregate_in_sql:
+            return self.analyzer.get_calendar_aggregates(user_id)
+        
+        df = self.analyzer.get_user_data(user_id)
+        if df.empty:
+            return df
+        df['year'] = df['fecha_inicio'].dt.year
+        df['month'] = df['fecha_inicio'].dt.month
+        df['day'] = df['fecha_inicio'].dt.day
+        return df.groupby(['year', 'month', 'day'])['calorias_quemadas'].sum().reset_index()
+    
+    @cached_figure('progress_overview')
+    def create_progress_overview(self, user_id: int) -> "go.Figure":
         """Crear gráfico de resumen de progreso"""
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
         try:
-            df = self.analyzer.get_user_data(user_id)
+            daily = self._daily_series(user_id)
             
-            if df.empty:
+            if daily.empty:
                 return self._create_empty_chart("No hay datos de entrenamientos")
             
             # Crear subplots
@@ -360,31 +597,28 @@ class FitnessChartGenerator:
             )
             
             # Gráfico 1: Calorías por día
-            daily_calories = df.groupby('date')['calorias_quemadas'].sum().reset_index()
             fig.add_trace(
-                go.Scatter(x=daily_calories['date'], y=daily_calories['calorias_quemadas'],
+                go.Scatter(x=daily['date'], y=daily['calorias_quemadas'],
                           mode='lines+markers', name='Calorías', line=dict(color='#FF6B6B')),
                 row=1, col=1
             )
             
             # Gráfico 2: Duración de entrenamientos
-            daily_duration = df.groupby('date')['duracion_real_minutos'].sum().reset_index()
             fig.add_trace(
-                go.Scatter(x=daily_duration['date'], y=daily_duration['duracion_real_minutos'],
+                go.Scatter(x=daily['date'], y=daily['duracion_real_minutos'],
                           mode='lines+markers', name='Minutos', line=dict(color='#4ECDC4')),
                 row=1, col=2
             )
             
             # Gráfico 3: Rating promedio
-            daily_rating = df.groupby('date')['rating_usuario'].mean().reset_index()
             fig.add_trace(
-                go.Scatter(x=daily_rating['date'], y=daily_rating['rating_usuario'],
+                go.Scatter(x=daily['date'], y=daily['rating_usuario'],
                           mode='lines+markers', name='Rating', line=dict(color='#45B7D1')),
                 row=2, col=1
             )
             
             # Gráfico 4: Distribución por categorías
-            category_counts = df['categoria'].value_counts()
+            category_counts = self._category_stats(user_id)['Total_Entrenamientos'].sort_values(ascending=False)
             fig.add_trace(
                 go.Pie(labels=category_counts.index, values=category_counts.values,
                       name="Categorías"),
@@ -402,8 +636,11 @@ class FitnessChartGenerator:
             logger.error(f"Error creando gráfico de resumen: {e}")
             return self._create_empty_chart("Error generando gráfico")
     
-    def create_weight_progress_chart(self, user_id: int) -> go.Figure:
+    @cached_figure('weight_progress')
+    def create_weight_progress_chart(self, user_id: int) -> "go.Figure":
         """Crear gráfico de progreso de peso"""
+        import numpy as np
+        import plotly.graph_objects as go
         try:
             weight_df = self.analyzer.get_weight_progress(user_id)
             
@@ -447,15 +684,21 @@ class FitnessChartGenerator:
             logger.error(f"Error creando gráfico de peso: {e}")
             return self._create_empty_chart("Error generando gráfico de peso")
     
-    def create_weekly_comparison(self, user_id: int) -> go.Figure:
+    @cached_figure('weekly_comparison')
+    def create_weekly_comparison(self, user_id: int) -> "go.Figure":
         """Crear gráfico de comparación semanal"""
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
         try:
             weekly_data = self.analyzer.generate_weekly_progress(user_id, 8)
             
             if not weekly_data:
                 return self._create_empty_chart("No hay datos semanales disponibles")
             
-            weeks = [f"Semana {i+1}" for i in range(len(weekly_data))]
+            # Las semanas sin sesiones no aparecen: cada barra lleva sus fechas
+            # reales, de la más antigua a la más reciente
+            weekly_data = sorted(weekly_data, key=lambda w: w.week_start)
+            weeks = [f"{w.week_start:%d/%m}–{w.week_end:%d/%m}" for w in weekly_data]
             workouts = [w.workouts_completed for w in weekly_data]
             calories = [w.calories_burned for w in weekly_data]
             minutes = [w.minutes_trained for w in weekly_data]
@@ -494,25 +737,17 @@ class FitnessChartGenerator:
             logger.error(f"Error creando gráfico semanal: {e}")
             return self._create_empty_chart("Error generando gráfico semanal")
     
-    def create_category_analysis(self, user_id: int) -> go.Figure:
+    @cached_figure('category_analysis')
+    def create_category_analysis(self, user_id: int) -> "go.Figure":
         """Crear análisis por categorías de entrenamiento"""
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
         try:
-            df = self.analyzer.get_user_data(user_id)
-            
-            if df.empty:
-                return self._create_empty_chart("No hay datos de entrenamientos")
-            
             # Análisis por categoría
-            category_stats = df.groupby('categoria').agg({
-                'calorias_quemadas': ['sum', 'mean'],
-                'duracion_real_minutos': ['sum', 'mean'],
-                'rating_usuario': 'mean',
-                'workout_name': 'count'
-            }).round(2)
+            category_stats = self._category_stats(user_id)
             
-            category_stats.columns = ['Total_Calorias', 'Promedio_Calorias', 
-                                    'Total_Minutos', 'Promedio_Minutos', 
-                                    'Rating_Promedio', 'Total_Entrenamientos']
+            if category_stats.empty:
+                return self._create_empty_chart("No hay datos de entrenamientos")
             
             # Crear gráfico de barras múltiples
             fig = make_subplots(
@@ -562,22 +797,17 @@ class FitnessChartGenerator:
             logger.error(f"Error creando análisis de categorías: {e}")
             return self._create_empty_chart("Error generando análisis de categorías")
     
-    def create_heatmap_calendar(self, user_id: int) -> go.Figure:
+    @cached_figure('heatmap_calendar')
+    def create_heatmap_calendar(self, user_id: int) -> "go.Figure":
         """Crear mapa de calor del calendario de entrenamientos"""
+        import plotly.graph_objects as go
         try:
-            df = self.analyzer.get_user_data(user_id)
+            # Matriz de calor: calorías por año, mes y día
+            calendar_data = self._calendar_series(user_id)
             
-            if df.empty:
+            if calendar_data.empty:
                 return self._create_empty_chart("No hay datos de entrenamientos")
             
-            # Preparar datos para el calendario
-            df['year'] = df['fecha_inicio'].dt.year
-            df['month'] = df['fecha_inicio'].dt.month
-            df['day'] = df['fecha_inicio'].dt.day
-            
-            # Crear matriz de calor
-            calendar_data = df.groupby(['year', 'month', 'day'])['calorias_quemadas'].sum().reset_index()
-            
             # Crear gráfico de calor
             fig = go.Figure(data=go.Heatmap(
                 z=calendar_data['calorias_quemadas'],
@@ -599,8 +829,9 @@ class FitnessChartGenerator:
             logger.error(f"Error creando mapa de calor: {e}")
             return self._create_empty_chart("Error generando mapa de calor")
     
-    def _create_empty_chart(self, message: str) -> go.Figure:
+    def _create_empty_chart(self, message: str) -> "go.Figure":
         """Crear gráfico vacío con mensaje"""
+        import plotly.graph_objects as go
         fig = go.Figure()
         fig.add_annotation(
             text=message,
@@ -670,8 +901,9 @@ class ReportGenerator:
             logger.error(f"Error generando reporte comprensivo: {e}")
             return {}
     
-    def _analyze_trends(self, df: pd.DataFrame) -> Dict:
+    def _analyze_trends(self, df: "pd.DataFrame") -> Dict:
         """Analizar tendencias en los datos"""
+        import numpy as np
         trends = {}
         
         if df.empty:
@@ -694,7 +926,7 @@ class ReportGenerator:
         
         return trends
     
-    def _analyze_patterns(self, df: pd.DataFrame) -> Dict:
+    def _analyze_patterns(self, df: "pd.DataFrame") -> Dict:
         """Analizar patrones en los datos"""
         patterns = {}
         
@@ -722,7 +954,7 @@ class ReportGenerator:
         return patterns
     
     def _generate_recommendations(self, metrics: FitnessMetrics, 
-                                 df: pd.DataFrame, weight_df: pd.DataFrame) -> List[str]:
+                                 df: "pd.DataFrame", weight_df: "pd.DataFrame") -> List[str]:
         """Generar recomendaciones personalizadas"""
         recommendations = []
         
@@ -760,7 +992,7 @@ class ReportGenerator:
         return recommendations
     
     def _generate_summary(self, metrics: FitnessMetrics, 
-                         df: pd.DataFrame, weight_df: pd.DataFrame) -> str:
+                         df: "pd.DataFrame", weight_df: "pd.DataFrame") -> str:
         """Generar resumen ejecutivo"""
         summary_parts = []
         
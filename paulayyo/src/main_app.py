@@ -7,22 +7,21 @@ Fecha: 2024
 """
 
 import streamlit as st
+import functools
+import math
 import time
 import datetime
 from datetime import date, timedelta
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import sqlite3
 import hashlib
 import json
 from typing import List, Dict, Optional
 import logging
 
-# Importar módulos propios
+# Importar módulos propios. src.data_analysis (pandas, numpy, plotly) se importa
+# al crear el primer servicio de análisis, no al arrancar
 from src.app_logic import *
-from src.data_analysis import FitnessDataAnalyzer, FitnessChartGenerator, ReportGenerator
+from src.cache import figure_cache
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO)
@@ -39,413 +38,6 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Estilos CSS personalizados - Diseño Premium Clase Mundial
-st.markdown("""
-<style>
-    /* Importar fuente moderna */
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600;700;800&display=swap');
-    
-    /* Variables globales */
-    :root {
-        --primary-gradient: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        --secondary-gradient: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
-        --success-gradient: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);
-        --warning-gradient: linear-gradient(135deg, #fa709a 0%, #fee140 100%);
-        --danger-gradient: linear-gradient(135deg, #ff6b6b 0%, #ee5a6f 100%);
-        --dark-gradient: linear-gradient(135deg, #434343 0%, #000000 100%);
-        --gold-gradient: linear-gradient(135deg, #f6d365 0%, #fda085 100%);
-        --shadow-soft: 0 10px 40px rgba(0,0,0,0.08);
-        --shadow-medium: 0 15px 50px rgba(0,0,0,0.12);
-        --shadow-hard: 0 20px 60px rgba(0,0,0,0.16);
-    }
-    
-    /* Reset general */
-    * {
-        margin: 0;
-        padding: 0;
-        box-sizing: border-box;
-    }
-    
-    body {
-        font-family: 'Poppins', sans-serif !important;
-        background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-    }
-    
-    /* Header principal con animación */
-    .main-header {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 3rem 2rem;
-        border-radius: 20px;
-        color: white;
-        margin-bottom: 2rem;
-        text-align: center;
-        box-shadow: var(--shadow-medium);
-        position: relative;
-        overflow: hidden;
-        animation: fadeInDown 0.8s ease-out;
-    }
-    
-    .main-header::before {
-        content: '';
-        position: absolute;
-        top: -50%;
-        left: -50%;
-        width: 200%;
-        height: 200%;
-        background: radial-gradient(circle, rgba(255,255,255,0.1) 1px, transparent 1px);
-        background-size: 50px 50px;
-        animation: drift 20s linear infinite;
-    }
-    
-    @keyframes fadeInDown {
-        from {
-            opacity: 0;
-            transform: translateY(-30px);
-        }
-        to {
-            opacity: 1;
-            transform: translateY(0);
-        }
-    }
-    
-    @keyframes drift {
-        0% { transform: translate(0, 0); }
-        100% { transform: translate(50px, 50px); }
-    }
-    
-    /* Cards de workout modernos con glassmorphism */
-    .workout-card {
-        background: rgba(255, 255, 255, 0.95);
-        backdrop-filter: blur(10px);
-        padding: 2rem;
-        border-radius: 20px;
-        box-shadow: var(--shadow-soft);
-        margin-bottom: 1.5rem;
-        border-left: 5px solid;
-        border-image: linear-gradient(135deg, #667eea, #764ba2) 1;
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .workout-card::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: -100%;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(90deg, transparent, rgba(255,255,255,0.3), transparent);
-        transition: left 0.5s;
-    }
-    
-    .workout-card:hover::before {
-        left: 100%;
-    }
-    
-    .workout-card:hover {
-        transform: translateY(-8px) scale(1.02);
-        box-shadow: var(--shadow-hard);
-        border-left-width: 8px;
-    }
-    
-    /* Cards de estadísticas premium */
-    .stats-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 2.5rem;
-        border-radius: 20px;
-        color: white;
-        text-align: center;
-        margin-bottom: 1.5rem;
-        box-shadow: var(--shadow-medium);
-        position: relative;
-        overflow: hidden;
-        transition: all 0.4s ease;
-    }
-    
-    .stats-card::after {
-        content: '';
-        position: absolute;
-        top: -50%;
-        right: -50%;
-        width: 100%;
-        height: 100%;
-        background: radial-gradient(circle, rgba(255,255,255,0.15) 0%, transparent 70%);
-        border-radius: 50%;
-    }
-    
-    .stats-card:hover {
-        transform: scale(1.05) rotate(2deg);
-        box-shadow: var(--shadow-hard);
-    }
-    
-    /* Card kids divertida */
-    .kids-card {
-        background: linear-gradient(135deg, #ffeaa7 0%, #fab1a0 100%);
-        padding: 2rem;
-        border-radius: 25px;
-        color: #2d3436;
-        margin-bottom: 1.5rem;
-        box-shadow: var(--shadow-medium);
-        animation: bounce 2s infinite;
-    }
-    
-    @keyframes bounce {
-        0%, 20%, 50%, 80%, 100% { transform: translateY(0); }
-        40% { transform: translateY(-10px); }
-        60% { transform: translateY(-5px); }
-    }
-    
-    /* Card premium dorada */
-    .premium-card {
-        background: linear-gradient(135deg, #f6d365 0%, #fda085 100%);
-        padding: 3rem;
-        border-radius: 25px;
-        color: white;
-        text-align: center;
-        margin-bottom: 2rem;
-        box-shadow: var(--shadow-hard);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .premium-card::before {
-        content: '👑';
-        font-size: 4rem;
-        position: absolute;
-        top: -20px;
-        right: -20px;
-        opacity: 0.2;
-        transform: rotate(25deg);
-    }
-    
-    /* Container de métricas moderno */
-    .metric-container {
-        background: rgba(255, 255, 255, 0.9);
-        backdrop-filter: blur(10px);
-        padding: 2rem;
-        border-radius: 15px;
-        box-shadow: var(--shadow-soft);
-        text-align: center;
-        border: 1px solid rgba(255,255,255,0.2);
-        transition: all 0.3s ease;
-    }
-    
-    .metric-container:hover {
-        transform: translateY(-5px);
-        box-shadow: var(--shadow-medium);
-    }
-    
-    /* Badges de logros premium */
-    .achievement-badge {
-        background: linear-gradient(135deg, #ffd700 0%, #ffed4e 100%);
-        color: #2d3436;
-        padding: 1rem 1.5rem;
-        border-radius: 50px;
-        font-weight: 700;
-        margin: 0.5rem;
-        display: inline-block;
-        box-shadow: 0 8px 20px rgba(255, 215, 0, 0.3);
-        transition: all 0.3s ease;
-        text-transform: uppercase;
-        letter-spacing: 1px;
-        font-size: 0.85rem;
-    }
-    
-    .achievement-badge:hover {
-        transform: scale(1.1) rotate(5deg);
-        box-shadow: 0 12px 30px rgba(255, 215, 0, 0.5);
-    }
-    
-    /* Barra de progreso moderna */
-    .progress-bar {
-        background: rgba(0,0,0,0.1);
-        border-radius: 50px;
-        height: 15px;
-        overflow: hidden;
-        margin: 1rem 0;
-        box-shadow: inset 0 2px 4px rgba(0,0,0,0.1);
-    }
-    
-    .progress-fill {
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        height: 100%;
-        border-radius: 50px;
-        transition: width 1s cubic-bezier(0.4, 0, 0.2, 1);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .progress-fill::after {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background: linear-gradient(90deg, transparent, rgba(255,255,255,0.3), transparent);
-        animation: shimmer 2s infinite;
-    }
-    
-    @keyframes shimmer {
-        0% { transform: translateX(-100%); }
-        100% { transform: translateX(100%); }
-    }
-    
-    /* Sidebar con gradiente */
-    .sidebar-user-info {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 2rem;
-        border-radius: 20px;
-        color: white;
-        margin-bottom: 1.5rem;
-        text-align: center;
-        box-shadow: var(--shadow-medium);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    /* Contenedor de gráficos */
-    .chart-container {
-        background: rgba(255, 255, 255, 0.95);
-        backdrop-filter: blur(10px);
-        padding: 2rem;
-        border-radius: 20px;
-        box-shadow: var(--shadow-soft);
-        margin-bottom: 2rem;
-        transition: all 0.3s ease;
-    }
-    
-    .chart-container:hover {
-        box-shadow: var(--shadow-medium);
-        transform: translateY(-3px);
-    }
-    
-    /* Cards de recomendaciones elegantes */
-    .recommendation-card {
-        background: linear-gradient(135deg, #a8edea 0%, #fed6e3 100%);
-        padding: 1.5rem;
-        border-radius: 15px;
-        margin: 1rem 0;
-        border-left: 5px solid;
-        border-image: linear-gradient(135deg, #667eea, #764ba2) 1;
-        box-shadow: var(--shadow-soft);
-        transition: all 0.3s ease;
-    }
-    
-    .recommendation-card:hover {
-        transform: translateX(10px);
-        box-shadow: var(--shadow-medium);
-    }
-    
-    /* Botones modernos premium */
-    .stButton > button {
-        width: 100%;
-        border-radius: 50px;
-        border: none;
-        padding: 1rem 2rem;
-        font-weight: 700;
-        font-size: 1rem;
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        box-shadow: 0 8px 20px rgba(102, 126, 234, 0.3);
-        position: relative;
-        overflow: hidden;
-        text-transform: uppercase;
-        letter-spacing: 1px;
-    }
-    
-    .stButton > button::before {
-        content: '';
-        position: absolute;
-        top: 50%;
-        left: 50%;
-        width: 0;
-        height: 0;
-        border-radius: 50%;
-        background: rgba(255, 255, 255, 0.2);
-        transform: translate(-50%, -50%);
-        transition: width 0.6s, height 0.6s;
-    }
-    
-    .stButton > button:hover::before {
-        width: 300px;
-        height: 300px;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-3px);
-        box-shadow: 0 15px 40px rgba(102, 126, 234, 0.5);
-    }
-    
-    .stButton > button:active {
-        transform: translateY(-1px);
-        box-shadow: 0 5px 15px rgba(102, 126, 234, 0.4);
-    }
-    
-    /* Mensajes de éxito elegantes */
-    .success-message {
-        background: linear-gradient(135deg, #00b894 0%, #00cec9 100%);
-        color: white;
-        padding: 1.5rem;
-        border-radius: 15px;
-        border-left: 5px solid rgba(255,255,255,0.5);
-        margin: 1rem 0;
-        box-shadow: var(--shadow-soft);
-        animation: slideInRight 0.5s ease-out;
-    }
-    
-    @keyframes slideInRight {
-        from {
-            opacity: 0;
-            transform: translateX(-30px);
-        }
-        to {
-            opacity: 1;
-            transform: translateX(0);
-        }
-    }
-    
-    /* Mensajes de advertencia modernos */
-    .warning-message {
-        background: linear-gradient(135deg, #fdcb6e 0%, #e17055 100%);
-        color: white;
-        padding: 1.5rem;
-        border-radius: 15px;
-        border-left: 5px solid rgba(255,255,255,0.5);
-        margin: 1rem 0;
-        box-shadow: var(--shadow-soft);
-        animation: slideInRight 0.5s ease-out;
-    }
-    
-    /* Mejoras adicionales */
-    h1, h2, h3 {
-        font-family: 'Poppins', sans-serif !important;
-        font-weight: 700 !important;
-    }
-    
-    /* Inputs modernos */
-    .stTextInput > div > div > input {
-        border-radius: 15px !important;
-        border: 2px solid #e0e0e0 !important;
-        padding: 12px 20px !important;
-        transition: all 0.3s ease !important;
-    }
-    
-    .stTextInput > div > div > input:focus {
-        border-color: #667eea !important;
-        box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.1) !important;
-    }
-    
-    /* Selectboxes modernos */
-    .stSelectbox > div > div > select {
-        border-radius: 15px !important;
-        padding: 12px 20px !important;
-    }
-</style>
-""", unsafe_allow_html=True)
-
 # =============================================================================
 # INICIALIZACIÓN DE SERVICIOS
 # =============================================================================
@@ -458,21 +50,55 @@ def initialize_services():
         if not database.connect():
             st.error("Error conectando a la base de datos")
             return None
-        
-        return {
-            'database': database,
-            'user_service': UserService(database),
-            'workout_service': WorkoutService(database),
-            'nutrition_service': NutritionService(database),
-            'analytics': DataAnalytics(database),
-            'data_analyzer': FitnessDataAnalyzer(),
-            'chart_generator': FitnessChartGenerator(FitnessDataAnalyzer()),
-            'report_generator': ReportGenerator(FitnessDataAnalyzer())
-        }
+        return build_service_registry(database)
     except Exception as e:
         logger.error(f"Error inicializando servicios: {e}")
         return None
 
+def build_service_registry(database: SQLiteDatabase) -> ServiceRegistry:
+    """Registrar los servicios de la aplicación; cada uno se crea al usarlo por primera vez
+    
+    Todos comparten la misma base de datos y su pool de conexiones, una única
+    caché de catálogos, una única cola de escritura diferida y un único
+    analizador (con su caché de sesiones).
+    """
+    services = ServiceRegistry()
+    services.provide('database', database)
+    services.register('catalog', lambda s: CatalogCache(s['database']))
+    # Las sesiones, la nutrición y la hidratación se escriben en segundo plano, fuera del render
+    services.register('write_queue', lambda s: WriteBehindQueue(s['database']))
+    services.register('user_service', lambda s: UserService(s['database']))
+    services.register('workout_service',
+                      lambda s: WorkoutService(s['database'], s['catalog'], s['write_queue']))
+    services.register('nutrition_service',
+                      lambda s: NutritionService(s['database'], s['catalog'], s['write_queue']))
+    services.register('hydration_service',
+                      lambda s: HydrationService(s['database'], s['write_queue']))
+    services.register('kids_service', lambda s: KidsActivityService(s['database'], s['catalog']))
+    services.register('media_service', lambda s: MediaService(s['database'], s['catalog']))
+    services.register('search_service', lambda s: SearchService(s['database']))
+    services.register('analytics', lambda s: DataAnalytics(s['database'], figure_cache=figure_cache))
+    services.register('data_analyzer', _create_data_analyzer)
+    services.register('chart_generator', _create_chart_generator)
+    services.register('report_generator', _create_report_generator)
+    return services
+
+def _create_data_analyzer(services: ServiceRegistry):
+    """Analizador compartido, sobre el pool de conexiones de la base de datos"""
+    from src.data_analysis import FitnessDataAnalyzer
+    return FitnessDataAnalyzer(services['database'].db_path, pool=services['database'].pool)
+
+def _create_chart_generator(services: ServiceRegistry):
+    """Generador de gráficos con agregación en SQL y caché de figuras"""
+    from src.data_analysis import FitnessChartGenerator
+    return FitnessChartGenerator(services['data_analyzer'], aggregate_in_sql=True,
+                                 figure_cache=figure_cache)
+
+def _create_report_generator(services: ServiceRegistry):
+    """Generador de reportes"""
+    from src.data_analysis import ReportGenerator
+    return ReportGenerator(services['data_analyzer'])
+
 # =============================================================================
 # INICIALIZACIÓN DEL ESTADO DE SESIÓN
 # =============================================================================
@@ -497,18 +123,19 @@ def init_session_state():
         ]
     if 'onboarding_step' not in st.session_state:
         st.session_state.onboarding_step = 0
-    if 'water_intake' not in st.session_state:
-        st.session_state.water_intake = 0
     if 'selected_workout' not in st.session_state:
         st.session_state.selected_workout = None
     if 'workout_in_progress' not in st.session_state:
         st.session_state.workout_in_progress = False
     if 'current_exercise' not in st.session_state:
         st.session_state.current_exercise = 0
-    if 'exercise_timer' not in st.session_state:
-        st.session_state.exercise_timer = 30
+    if 'exercise_deadline' not in st.session_state:
+        # Instante (time.time) en que acaba el ejercicio en curso
+        st.session_state.exercise_deadline = None
     if 'services' not in st.session_state:
-        st.session_state.services = initialize_services()
+        # Los servicios los prepara la pantalla de carga
+        st.session_state.services = None
+        st.session_state.current_screen = 'loading'
     if 'habits' not in st.session_state:
         st.session_state.habits = [
             {"name": "Beber agua", "target_per_week": 14, "completed": 0},
@@ -528,14 +155,102 @@ def init_session_state():
         ]
     if 'shop_cart' not in st.session_state:
         st.session_state.shop_cart = []
+    if 'movies_cursors' not in st.session_state:
+        # Pila de cursores de las páginas de películas visitadas (None = primera)
+        st.session_state.movies_cursors = [None]
+    if 'kids_filter' not in st.session_state:
+        st.session_state.kids_filter = None
+
+# =============================================================================
+# FRAGMENTOS Y TIEMPOS DE RENDERIZADO
+# =============================================================================
+
+def record_render_time(name: str, elapsed_ms: float):
+    """Guardar en la sesión el último tiempo de servidor de una región de la página"""
+    timings = st.session_state.setdefault('render_timings', {})
+    timings[name] = round(elapsed_ms, 2)
+    logger.debug(f"Región '{name}' pintada en {elapsed_ms:.1f} ms")
+
+def timed_fragment(name: str, run_every=None):
+    """st.fragment que mide cuánto tarda cada vez que se vuelve a ejecutar
+    
+    Una interacción con un widget del fragmento vuelve a ejecutar solo la
+    función decorada, no el script entero; el tiempo queda en
+    st.session_state.render_timings[name] junto al de la página completa ('app').
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_render_time(name, (time.perf_counter() - start) * 1000)
+        return st.fragment(wrapper, run_every=run_every)
+    return decorator
 
 # =============================================================================
 # PANTALLAS DE LA APLICACIÓN
 # =============================================================================
 
+# Pantallas y transiciones permitidas desde cada una
+SCREEN_TRANSITIONS = {
+    'loading': ('auth', 'dashboard'),
+    'auth': ('onboarding', 'dashboard'),
+    'onboarding': ('dashboard',),
+    'dashboard': ('dashboard', 'workout', 'auth'),
+    'workout': ('workout', 'dashboard', 'auth'),
+}
+
+# Duración de cada ejercicio en el temporizador (segundos)
+EXERCISE_SECONDS = 30
+
+def go_to(screen: str, **state) -> bool:
+    """Cambiar de pantalla aplicando `state` al estado de sesión
+    
+    Vale como callback de un widget (on_click), que Streamlit ejecuta antes de
+    volver a pintar, o seguida de st.rerun() dentro del propio script.
+    """
+    current = st.session_state.current_screen
+    if screen not in SCREEN_TRANSITIONS.get(current, ()):
+        logger.error(f"Transición de pantalla no permitida: {current} -> {screen}")
+        return False
+    for key, value in state.items():
+        st.session_state[key] = value
+    st.session_state.current_screen = screen
+    return True
+
+def open_workout(workout):
+    """Abrir la vista previa de un entrenamiento"""
+    if workout is not None:
+        go_to('workout', selected_workout=workout, workout_in_progress=False,
+              current_exercise=0, exercise_deadline=None)
+
+def close_workout(**state):
+    """Volver al dashboard desde la pantalla de entrenamiento"""
+    go_to('dashboard', selected_workout=None, workout_in_progress=False,
+          current_exercise=0, exercise_deadline=None, **state)
+
+def start_exercise(index: int):
+    """Empezar el ejercicio `index` con el temporizador completo"""
+    st.session_state.workout_in_progress = True
+    st.session_state.current_exercise = index
+    st.session_state.exercise_deadline = time.time() + EXERCISE_SECONDS
+
+def pause_workout():
+    """Volver a la vista previa parando el temporizador"""
+    st.session_state.workout_in_progress = False
+    st.session_state.exercise_deadline = None
+
+def extend_exercise(seconds: int):
+    """Añadir segundos al ejercicio en curso"""
+    if st.session_state.exercise_deadline is not None:
+        st.session_state.exercise_deadline += seconds
+
 def show_loading_screen():
-    """Pantalla de carga"""
-    st.markdown("""
+    """Pantalla de carga: visible solo mientras se preparan los servicios"""
+    splash = st.empty()
+    splash.markdown("""
     <div style="text-align: center; padding: 4rem 0;">
         <div style="font-size: 4rem; margin-bottom: 2rem;">💪</div>
         <h1 style="color: #667eea; margin-bottom: 1rem;">FitHome Pro</h1>
@@ -548,9 +263,20 @@ def show_loading_screen():
     </div>
     """, unsafe_allow_html=True)
     
-    # Simular carga
-    time.sleep(2)
-    st.session_state.current_screen = 'auth'
+    # Listo cuando los servicios existen (compartidos: solo la primera sesión
+    # del proceso espera) y, con sesión iniciada, sus estadísticas están cargadas
+    services = initialize_services()
+    if not services:
+        splash.empty()
+        st.error("Error inicializando servicios. Por favor, recarga la página.")
+        return
+    st.session_state.services = services
+    
+    if st.session_state.user_profile.id:
+        refresh_user_stats(services)
+        go_to('dashboard')
+    else:
+        go_to('auth')
     st.rerun()
 
 def show_auth_screen(services):
@@ -577,8 +303,8 @@ def show_auth_screen(services):
             # Configurar sesión
             st.session_state.user_profile = user_profile
             st.session_state.user = {"email": user_profile.email, "id": user_profile.id}
-            st.session_state.user_stats = services['user_service'].get_user_stats(user_profile.id)
-            st.session_state.current_screen = 'dashboard'
+            refresh_user_stats(services)
+            go_to('dashboard')
             st.rerun()
     
     with tab2:
@@ -609,8 +335,7 @@ def show_auth_screen(services):
                 
                 if services['user_service'].register_user(user_profile):
                     st.success("¡Registro exitoso! Completa tu perfil.")
-                    st.session_state.user_profile = user_profile
-                    st.session_state.current_screen = 'onboarding'
+                    go_to('onboarding', user_profile=user_profile)
                     st.rerun()
                 else:
                     st.error("Error en el registro. Intenta nuevamente.")
@@ -724,9 +449,8 @@ def show_onboarding_screen(services):
                         # Actualizar perfil en la base de datos
                         if services['user_service'].update_user_profile(st.session_state.user_profile):
                             st.session_state.user = {"email": st.session_state.user_profile.email, "id": user_id}
-                            st.session_state.user_stats = services['user_service'].get_user_stats(user_id)
-                            st.session_state.current_screen = 'dashboard'
-                            st.success("¡Perfil completado! Bienvenido a FitHome Pro.")
+                            refresh_user_stats(services)
+                            go_to('dashboard', flash_message="¡Perfil completado! Bienvenido a FitHome Pro.")
                             st.rerun()
                         else:
                             st.error("Error actualizando perfil. Intenta nuevamente.")
@@ -735,6 +459,13 @@ def show_onboarding_screen(services):
 
 def show_dashboard(services):
     """Dashboard principal"""
+    refresh_user_stats(services)
+    
+    # Avisos de la pantalla anterior: el toast desaparece en el navegador
+    flash_message = st.session_state.pop('flash_message', None)
+    if flash_message:
+        st.toast(flash_message, icon="🎉")
+    
     # Sidebar para navegación
     with st.sidebar:
         # Toggle de Dark Mode, color acento y centro de notificaciones
@@ -778,14 +509,16 @@ def show_dashboard(services):
                 "🎬 Películas",
                 "📊 Progreso",
                 "📈 Análisis Avanzado"
-            ]
+            ],
+            key="nav_page"
         )
         
         # Botón de cerrar sesión
         if st.button("🚪 Cerrar Sesión"):
-            for key in st.session_state.keys():
+            go_to('auth')
+            # Los servicios son compartidos por todas las sesiones: se conservan
+            for key in [k for k in st.session_state.keys() if k not in ('services', 'current_screen')]:
                 del st.session_state[key]
-            st.session_state.current_screen = 'auth'
             st.rerun()
     
     # Contenido principal basado en la página seleccionada
@@ -812,10 +545,35 @@ def show_dashboard(services):
     elif page == "📈 Análisis Avanzado":
         show_advanced_analysis_tab(services)
 
+def show_search_box(services):
+    """Buscador de texto completo sobre los catálogos"""
+    query = st.text_input("🔎 Buscar", key="search_query",
+                          placeholder="Entrenamientos, ejercicios, comidas, actividades o películas")
+    if not query.strip():
+        return
+    
+    results = services['search_service'].search(query, limit=10)
+    if not results:
+        st.caption(f"Sin resultados para «{query}»")
+        return
+    
+    for result in results:
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.markdown(f"{result.icon} **{result.title}** · {result.label}  \n{result.snippet}")
+        with col2:
+            if result.kind == 'entrenamiento' and st.button("▶️ Iniciar", key=f"search_start_{result.id}"):
+                workouts = services['workout_service'].get_workouts(include_exercises=False)
+                open_workout(next((w for w in workouts if w.id == result.id), None))
+                st.rerun()
+
 def show_home_tab(services):
     """Pestaña de inicio"""
     st.title("Dashboard Principal")
     
+    # Buscador global
+    show_search_box(services)
+    
     # Header con estadísticas
     col1, col2, col3, col4 = st.columns(4)
     
@@ -852,27 +610,11 @@ def show_home_tab(services):
         """, unsafe_allow_html=True)
     
     # Hidratación diaria
-    st.subheader("💧 Hidratación Diaria")
-    col1, col2 = st.columns([3, 1])
-    
-    with col1:
-        water_progress = st.session_state.water_intake / 8
-        st.progress(water_progress)
-        st.write(f"{st.session_state.water_intake}/8 vasos")
-    
-    with col2:
-        if st.button("+ Vaso"):
-            if st.session_state.water_intake < 8:
-                st.session_state.water_intake += 1
-                st.rerun()
-        if st.button("- Vaso"):
-            if st.session_state.water_intake > 0:
-                st.session_state.water_intake -= 1
-                st.rerun()
+    show_hydration_widget(services)
     
     # Entrenamientos recomendados
     st.subheader("🔥 Entrenamientos Recomendados")
-    workouts = services['workout_service'].get_workouts()[:2]
+    workouts = services['workout_service'].get_workouts(include_exercises=False)[:2]
     
     for workout in workouts:
         with st.container():
@@ -889,9 +631,8 @@ def show_home_tab(services):
             </div>
             """, unsafe_allow_html=True)
             
-            if st.button(f"▶️ Iniciar {workout.name}", key=f"start_{workout.id}"):
-                st.session_state.selected_workout = workout
-                st.rerun()
+            st.button(f"▶️ Iniciar {workout.name}", key=f"start_{workout.id}",
+                      on_click=open_workout, args=(workout,))
     
     # Logros recientes
     if st.session_state.user_stats.achievements:
@@ -924,18 +665,26 @@ def show_home_tab(services):
                 mime="application/json"
             )
 
-    # Exportar Reporte (JSON)
-    st.subheader("📤 Exportar Reporte")
-    if st.button("Exportar Reporte (JSON)"):
-        report = services['report_generator'].generate_comprehensive_report(st.session_state.user_profile.id)
-        import json as _json
-        data = _json.dumps(report, ensure_ascii=False, indent=2)
-        st.download_button(
-            label="Descargar JSON",
-            data=data,
-            file_name="reporte_fithome.json",
-            mime="application/json"
-        )
+@timed_fragment('hydration')
+def show_hydration_widget(services):
+    """Hidratación diaria: los clics solo vuelven a pintar este bloque
+    
+    Los vasos se aplican en callbacks antes de pintar, así que tampoco hace
+    falta releer la base de datos.
+    """
+    st.subheader("💧 Hidratación Diaria")
+    hydration_service = services['hydration_service']
+    user_id = st.session_state.user_profile.id
+    col1, col2 = st.columns([3, 1])
+    
+    with col2:
+        st.button("+ Vaso", on_click=hydration_service.add_glasses, args=(user_id, 1))
+        st.button("- Vaso", on_click=hydration_service.add_glasses, args=(user_id, -1))
+    
+    with col1:
+        hydration = hydration_service.get_daily_intake(user_id)
+        st.progress(hydration.progress)
+        st.write(f"{hydration.glasses}/{hydration.goal} vasos")
 
 def show_workouts_tab(services):
     """Pestaña de entrenamientos"""
@@ -961,7 +710,7 @@ def show_workouts_tab(services):
     elif filter_flexibility:
         active_filter = "flexibilidad"
     
-    workouts = services['workout_service'].get_workouts(category=active_filter)
+    workouts = services['workout_service'].get_workouts(category=active_filter, include_exercises=False)
     
     for workout in workouts:
         with st.container():
@@ -984,16 +733,15 @@ def show_workouts_tab(services):
             
             col1, col2 = st.columns([3, 1])
             with col2:
-                if st.button(f"▶️ Iniciar", key=f"workout_{workout.id}"):
-                    st.session_state.selected_workout = workout
-                    st.rerun()
+                st.button(f"▶️ Iniciar", key=f"workout_{workout.id}",
+                          on_click=open_workout, args=(workout,))
 
 def show_nutrition_tab(services):
     """Pestaña de nutrición"""
     st.title("🍎 Nutrición")
     
-    # Obtener planes nutricionales
-    nutrition_plans = services['nutrition_service'].get_nutrition_plans()
+    # Obtener planes nutricionales (la cabecera no muestra sus comidas)
+    nutrition_plans = services['nutrition_service'].get_nutrition_plans(include_meals=False)
     
     if nutrition_plans:
         plan = nutrition_plans[0]  # Usar el primer plan disponible
@@ -1079,15 +827,27 @@ def show_kids_tab(services):
     # Filtros
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.button("Todos", key="kids_all")
+        if st.button("Todos", key="kids_all"):
+            st.session_state.kids_filter = None
     with col2:
-        st.button("DIY", key="kids_diy")
+        if st.button("DIY", key="kids_diy"):
+            st.session_state.kids_filter = "diy"
     with col3:
-        st.button("Ejercicio", key="kids_exercise")
+        if st.button("Ejercicio", key="kids_exercise"):
+            st.session_state.kids_filter = "ejercicio"
     with col4:
-        st.button("Manualidades", key="kids_crafts")
+        if st.button("Manualidades", key="kids_crafts"):
+            st.session_state.kids_filter = "manualidad"
+    
+    age_option = st.selectbox("Edad", ["Todas", "3-5 años", "6-8 años", "9-12 años"], key="kids_age")
+    age_range = None if age_option == "Todas" else age_option
     
-    activities = services['kids_service'].get_kids_activities()
+    activities = services['kids_service'].get_kids_activities(
+        activity_type=st.session_state.kids_filter,
+        age_range=age_range
+    )
+    if not activities:
+        st.info("No hay actividades para este filtro")
     
     for activity in activities:
         with st.container():
@@ -1142,9 +902,11 @@ def show_movies_tab(services):
             st.success("¡Bienvenido a Premium! 🎉")
             st.rerun()
     else:
-        movies = services['media_service'].get_movies()
+        # Paginación por cursor: solo se consulta la página visible
+        cursors = st.session_state.movies_cursors
+        page = services['media_service'].get_movies_page(page_size=10, cursor=cursors[-1])
         
-        for movie in movies:
+        for movie in page.movies:
             with st.container():
                 st.markdown(f"""
                 <div class="workout-card">
@@ -1175,6 +937,18 @@ def show_movies_tab(services):
                 with col3:
                     if st.button("📤", key=f"share_{movie.id}"):
                         st.info("Enlace copiado")
+        
+        col_prev, col_page, col_next = st.columns([1, 2, 1])
+        with col_prev:
+            if len(cursors) > 1 and st.button("⬅️ Anterior", key="movies_prev"):
+                cursors.pop()
+                st.rerun()
+        with col_page:
+            st.markdown(f"<p style='text-align: center;'>Página {len(cursors)}</p>", unsafe_allow_html=True)
+        with col_next:
+            if page.has_more and st.button("Siguiente ➡️", key="movies_next"):
+                cursors.append(page.next_cursor)
+                st.rerun()
 
 def show_community_tab(services):
     """Pestaña de comunidad local"""
@@ -1187,25 +961,37 @@ def show_community_tab(services):
             st.success("Publicado")
             st.rerun()
     st.divider()
-    for idx, post in enumerate(st.session_state.community_posts):
-        st.markdown(f"**{post['user']}**: {post['content']}")
-        col1, col2, col3 = st.columns([1,1,6])
-        with col1:
-            if st.button(f"👍 {post['likes']}", key=f"like_{idx}"):
-                st.session_state.community_posts[idx]['likes'] += 1
-                st.rerun()
-        with col2:
-            if st.button("💬", key=f"cmt_btn_{idx}"):
-                st.session_state.notifications.append("Nuevo comentario en tu publicación")
-        with col3:
-            comment = st.text_input("", key=f"cmt_{idx}", placeholder="Escribe un comentario")
-            if comment:
-                st.session_state.community_posts[idx]['comments'].append(comment)
-                st.success("Comentario agregado")
-                st.rerun()
-        if post['comments']:
-            for c in post['comments'][-3:]:
-                st.caption(f"• {c}")
+    for idx in range(len(st.session_state.community_posts)):
+        show_community_post(idx)
+
+def like_post(idx: int):
+    """Sumar un me gusta a una publicación"""
+    st.session_state.community_posts[idx]['likes'] += 1
+
+def add_comment(idx: int):
+    """Guardar el comentario escrito y vaciar el campo"""
+    comment = st.session_state[f"cmt_{idx}"].strip()
+    if comment:
+        st.session_state.community_posts[idx]['comments'].append(comment)
+        st.session_state[f"cmt_{idx}"] = ""
+
+@timed_fragment('community_post')
+def show_community_post(idx: int):
+    """Una publicación con sus me gusta y comentarios, repintada por separado"""
+    post = st.session_state.community_posts[idx]
+    st.markdown(f"**{post['user']}**: {post['content']}")
+    col1, col2, col3 = st.columns([1,1,6])
+    with col1:
+        st.button(f"👍 {post['likes']}", key=f"like_{idx}", on_click=like_post, args=(idx,))
+    with col2:
+        if st.button("💬", key=f"cmt_btn_{idx}"):
+            st.session_state.notifications.append("Nuevo comentario en tu publicación")
+    with col3:
+        st.text_input("Comentario", key=f"cmt_{idx}", placeholder="Escribe un comentario",
+                      label_visibility="collapsed", on_change=add_comment, args=(idx,))
+    if post['comments']:
+        for c in post['comments'][-3:]:
+            st.caption(f"• {c}")
 
 def show_shop_tab(services):
     """Pestaña de tienda mock"""
@@ -1248,9 +1034,9 @@ def show_stats_tab(services):
         </div>
         """, unsafe_allow_html=True)
         
-        if st.button("💪 Empezar Entrenando"):
-            st.session_state.current_screen = 'workouts'
-            st.rerun()
+        # La navegación es un widget: se cambia en el callback, antes de pintarlo
+        st.button("💪 Empezar Entrenando", on_click=go_to, args=('dashboard',),
+                  kwargs={'nav_page': "💪 Entrenamientos"})
     else:
         # Estadísticas generales
         col1, col2 = st.columns(2)
@@ -1288,14 +1074,16 @@ def show_stats_tab(services):
         st.progress(workout_progress / 100)
         st.write(f"{workout_progress:.0f}% completado")
         
-        # Botón para registrar peso
-        if st.button("⚖️ Registrar Peso Actual"):
-            weight = st.number_input("Peso actual (kg):", min_value=0.0, step=0.1)
-            if weight > 0:
-                if weight not in [w[1] for w in st.session_state.user_stats.weight_progress]:
-                    st.session_state.user_stats.weight_progress.append((date.today(), weight))
-                    st.success(f"Peso registrado: {weight} kg")
-                    st.rerun()
+        # Registrar peso: se guarda en progreso_peso e invalida los gráficos de peso
+        weight = st.number_input("Peso actual (kg):", min_value=0.0, step=0.1)
+        if st.button("⚖️ Registrar Peso Actual") and weight > 0:
+            if services['user_service'].log_weight(st.session_state.user_profile.id, weight):
+                st.session_state.user_stats.weight_progress.append((date.today(), weight))
+                st.session_state.user_profile.weight = weight
+                st.success(f"Peso registrado: {weight} kg")
+                st.rerun()
+            else:
+                st.error("No se pudo registrar el peso")
 
 def show_advanced_analysis_tab(services):
     """Pestaña de análisis avanzado"""
@@ -1378,15 +1166,42 @@ def show_calendar_tab(services):
                 st.write(d)
             with col_r:
                 if st.button("▶️", key=f"quick_{d}"):
-                    # Abrir lista de entrenamientos
-                    st.session_state.current_screen = 'dashboard'
-                    st.session_state.selected_workout = services['workout_service'].get_workouts()[:1][0]
+                    # Abrir el entrenamiento mejor valorado
+                    open_workout(next(iter(services['workout_service'].get_workouts(include_exercises=False)), None))
                     st.rerun()
 
 def show_habits_tab(services):
     """Pestaña de hábitos y metas"""
     st.title("🎯 Hábitos y Metas")
 
+    show_habit_tracker()
+    
+    st.divider()
+    with st.expander("Añadir nuevo hábito/meta"):
+        tabh, tabg = st.tabs(["Hábito", "Meta"])
+        with tabh:
+            name = st.text_input("Nombre del hábito")
+            target = st.number_input("Objetivo semanal", min_value=1, value=5)
+            if st.button("Añadir hábito") and name:
+                st.session_state.habits.append({"name": name, "target_per_week": int(target), "completed": 0})
+                st.rerun()
+        with tabg:
+            title = st.text_input("Título de la meta")
+            if st.button("Añadir meta") and title:
+                st.session_state.goals_list.append({"title": title, "done": False})
+                st.rerun()
+
+def update_habit(index: int, delta: Optional[int] = None):
+    """Sumar `delta` al progreso de un hábito, o ponerlo a cero si es None"""
+    habit = st.session_state.habits[index]
+    if delta is None:
+        habit["completed"] = 0
+    else:
+        habit["completed"] = min(habit["target_per_week"], max(0, habit["completed"] + delta))
+
+@timed_fragment('habits')
+def show_habit_tracker():
+    """Hábitos semanales y metas: sus botones solo vuelven a pintar este bloque"""
     st.subheader("Hábitos Semanales")
     for i, habit in enumerate(st.session_state.habits):
         target = habit["target_per_week"]
@@ -1397,16 +1212,10 @@ def show_habits_tab(services):
             st.write(f"{habit['name']} ({done}/{target})")
             st.progress(progress)
         with col_m:
-            if st.button("+1", key=f"inc_{i}"):
-                st.session_state.habits[i]["completed"] = min(target, done+1)
-                st.rerun()
-            if st.button("-1", key=f"dec_{i}"):
-                st.session_state.habits[i]["completed"] = max(0, done-1)
-                st.rerun()
+            st.button("+1", key=f"inc_{i}", on_click=update_habit, args=(i, 1))
+            st.button("-1", key=f"dec_{i}", on_click=update_habit, args=(i, -1))
         with col_r:
-            if st.button("↺", key=f"reset_{i}"):
-                st.session_state.habits[i]["completed"] = 0
-                st.rerun()
+            st.button("↺", key=f"reset_{i}", on_click=update_habit, args=(i,))
 
     st.divider()
     st.subheader("Metas")
@@ -1417,21 +1226,6 @@ def show_habits_tab(services):
         with col_b:
             toggled = st.checkbox("Hecha", value=goal["done"], key=f"goal_{i}")
             st.session_state.goals_list[i]["done"] = toggled
-    
-    st.divider()
-    with st.expander("Añadir nuevo hábito/meta"):
-        tabh, tabg = st.tabs(["Hábito", "Meta"])
-        with tabh:
-            name = st.text_input("Nombre del hábito")
-            target = st.number_input("Objetivo semanal", min_value=1, value=5)
-            if st.button("Añadir hábito") and name:
-                st.session_state.habits.append({"name": name, "target_per_week": int(target), "completed": 0})
-                st.rerun()
-        with tabg:
-            title = st.text_input("Título de la meta")
-            if st.button("Añadir meta") and title:
-                st.session_state.goals_list.append({"title": title, "done": False})
-                st.rerun()
 
 # =============================================================================
 # PANTALLA DE ENTRENAMIENTO
@@ -1439,7 +1233,12 @@ def show_habits_tab(services):
 
 def show_workout_screen(services):
     """Pantalla de entrenamiento en progreso"""
-    workout = st.session_state.selected_workout
+    if st.session_state.selected_workout is None:
+        close_workout()
+        st.rerun()
+    
+    # Los listados no traen ejercicios: cargarlos al abrir el entrenamiento
+    workout = services['workout_service'].load_exercises(st.session_state.selected_workout)
     
     if not st.session_state.workout_in_progress:
         # Vista previa del entrenamiento
@@ -1479,52 +1278,28 @@ def show_workout_screen(services):
                 </div>
                 """, unsafe_allow_html=True)
         
-        # Botones de acción
+        # Botones de acción: los callbacks cambian el estado antes de volver a pintar
         col1, col2 = st.columns([1, 1])
         with col1:
-            if st.button("⬅️ Volver"):
-                st.session_state.selected_workout = None
-                st.rerun()
+            st.button("⬅️ Volver", on_click=close_workout)
         
         with col2:
-            if st.button("▶️ Comenzar Entrenamiento"):
-                st.session_state.workout_in_progress = True
-                st.session_state.current_exercise = 0
-                st.session_state.exercise_timer = 30
-                st.rerun()
+            st.button("▶️ Comenzar Entrenamiento", on_click=start_exercise, args=(0,),
+                      disabled=not workout.exercises)
     
     else:
-        # Entrenamiento en progreso
-        current_ex = workout.exercises[st.session_state.current_exercise]
+        # Entrenamiento en progreso: el temporizador se repinta solo, sin el resto de la página
+        show_exercise_timer(workout)
         
-        st.markdown(f"""
-        <div style="text-align: center; background: #000; color: white; padding: 2rem; border-radius: 1rem;">
-            <h3>Ejercicio {st.session_state.current_exercise + 1}/{len(workout.exercises)}</h3>
-            <h2>{current_ex['name']}</h2>
-            <div style="font-size: 4rem; margin: 2rem 0;">{st.session_state.exercise_timer}</div>
-            <div style="font-size: 2rem; margin-bottom: 2rem;">💪</div>
-            <p>{current_ex.get('duration', current_ex.get('sets', ''))}</p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        col1, col2, col3 = st.columns([1, 1, 1])
+        col1, col3 = st.columns([1, 1])
         
         with col1:
-            if st.button("⏸️ Pausar"):
-                st.session_state.workout_in_progress = False
-                st.rerun()
-        
-        with col2:
-            if st.button("+10s"):
-                st.session_state.exercise_timer += 10
-                st.rerun()
+            st.button("⏸️ Pausar", on_click=pause_workout)
         
         with col3:
             if st.session_state.current_exercise < len(workout.exercises) - 1:
-                if st.button("⏭️ Siguiente"):
-                    st.session_state.current_exercise += 1
-                    st.session_state.exercise_timer = 30
-                    st.rerun()
+                st.button("⏭️ Siguiente", on_click=start_exercise,
+                          args=(st.session_state.current_exercise + 1,))
             else:
                 if st.button("✅ Finalizar"):
                     # Completar entrenamiento
@@ -1539,74 +1314,79 @@ def show_workout_screen(services):
                         4  # Rating por defecto
                     )
                     
-                    st.session_state.workout_in_progress = False
-                    st.session_state.selected_workout = None
-                    st.session_state.current_exercise = 0
-                    st.success(f"¡Felicitaciones! Has completado '{workout.name}'. +{calories_burned} kcal quemadas.")
-                    time.sleep(2)
+                    # Los totales y la racha se refrescan en show_dashboard cuando
+                    # la cola de escritura confirma la sesión; el aviso sale como toast
+                    close_workout(flash_message=f"¡Felicitaciones! Has completado '{workout.name}'. "
+                                                f"+{calories_burned} kcal quemadas.")
                     st.rerun()
 
+@timed_fragment('exercise_timer', run_every=1)
+def show_exercise_timer(workout):
+    """Tarjeta del ejercicio en curso con la cuenta atrás, repintada cada segundo
+    
+    "+10s" está dentro del fragmento: solo cambia la cuenta atrás.
+    """
+    current_ex = workout.exercises[st.session_state.current_exercise]
+    deadline = st.session_state.exercise_deadline
+    remaining = max(0, math.ceil(deadline - time.time())) if deadline else EXERCISE_SECONDS
+    
+    st.markdown(f"""
+    <div style="text-align: center; background: #000; color: white; padding: 2rem; border-radius: 1rem;">
+        <h3>Ejercicio {st.session_state.current_exercise + 1}/{len(workout.exercises)}</h3>
+        <h2>{current_ex['name']}</h2>
+        <div style="font-size: 4rem; margin: 2rem 0;">{remaining if remaining else "¡Tiempo!"}</div>
+        <div style="font-size: 2rem; margin-bottom: 2rem;">💪</div>
+        <p>{current_ex.get('duration', current_ex.get('sets', ''))}</p>
+    </div>
+    """, unsafe_allow_html=True)
+    st.button("+10s", on_click=extend_exercise, args=(10,))
+
+def refresh_user_stats(services):
+    """Releer los totales del usuario si la cola de escritura confirmó cambios suyos"""
+    user_id = st.session_state.user_profile.id
+    version = data_versions.get(user_id)
+    if st.session_state.get('user_stats_version') != version:
+        st.session_state.user_stats = services['user_service'].get_user_stats(user_id)
+        st.session_state.user_stats_version = version
+
 # =============================================================================
 # FUNCIÓN PRINCIPAL
 # =============================================================================
 
+# Pantalla que pinta cada estado (la de carga se atiende antes, sin servicios)
+SCREENS = {
+    'auth': show_auth_screen,
+    'onboarding': show_onboarding_screen,
+    'dashboard': show_dashboard,
+    'workout': show_workout_screen,
+}
+
 def main():
     """Función principal de la aplicación"""
+    start = time.perf_counter()
     try:
         # Inicializar estado de sesión
         init_session_state()
         
+        # Estilos del tema (diseño premium, modo oscuro y color de acento):
+        # solo se envían cuando cambia el tema de la sesión
+        ThemeManager.apply_custom_css(st.session_state.accent_color, st.session_state.dark_mode)
+        
+        # La pantalla de carga prepara los servicios y decide a dónde ir
+        if st.session_state.current_screen == 'loading':
+            show_loading_screen()
+            return
+        
         if not st.session_state.services:
             st.error("Error inicializando servicios. Por favor, recarga la página.")
             return
         
         services = st.session_state.services
 
-        # Tema oscuro dinámico
-        if st.session_state.dark_mode:
-            st.markdown(
-                """
-                <style>
-                body { background: #0b1120 !important; }
-                .main-header { background: linear-gradient(135deg, #0f172a 0%, #111827 100%) !important; }
-                .workout-card, .chart-container, .metric-container { background: rgba(15, 23, 42, 0.92) !important; color: #e5e7eb !important; }
-                .kids-card { background: linear-gradient(135deg, #334155 0%, #0f172a 100%) !important; color: #e5e7eb !important; }
-                .premium-card { background: linear-gradient(135deg, #1f2937 0%, #111827 100%) !important; }
-                .stButton > button { background: linear-gradient(135deg, #4f46e5 0%, #7c3aed 100%) !important; }
-                .stTextInput > div > div > input { background: #0b1220 !important; color: #e5e7eb !important; border-color: #374151 !important; }
-                .stSelectbox > div > div > select { background: #0b1220 !important; color: #e5e7eb !important; }
-                </style>
-                """,
-                unsafe_allow_html=True,
-            )
-        
-        # Aplicar color de acento
-        accent = st.session_state.accent_color
-        st.markdown(f"""
-            <style>
-            :root {{ --accent: {accent}; }}
-            .stButton > button {{ box-shadow: 0 8px 20px {accent}55; }}
-            .progress-fill {{ background: linear-gradient(90deg, {accent} 0%, #764ba2 100%); }}
-            .metric-container:hover {{ box-shadow: 0 15px 35px {accent}33; }}
-            .recommendation-card {{ border-image: linear-gradient(135deg, {accent}, #764ba2) 1; }}
-            .sidebar-user-info {{ box-shadow: 0 10px 30px {accent}33; }}
-            </style>
-        """, unsafe_allow_html=True)
-        
-        # Verificar si hay un entrenamiento seleccionado
-        if st.session_state.selected_workout:
-            show_workout_screen(services)
-            return
-        
         # Navegación principal
-        if st.session_state.current_screen == 'loading':
-            show_loading_screen()
-        elif st.session_state.current_screen == 'auth':
-            show_auth_screen(services)
-        elif st.session_state.current_screen == 'onboarding':
-            show_onboarding_screen(services)
-        elif st.session_state.current_screen == 'dashboard':
-            show_dashboard(services)
+        SCREENS[st.session_state.current_screen](services)
+        ThemeManager.mark_css_delivered()
+        record_render_time('app', (time.perf_counter() - start) * 1000)
         
     except Exception as e:
         logger.error(f"Error en función principal: {e}")
@@ -0,0 +1,31 @@
+"""
+Configuración de pytest: permite importar los módulos de src/ igual que main.py
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCHEMA_PATH = os.path.join(ROOT, 'database', 'fithome_pro_sqlite.sql')
+
+
+@pytest.fixture
+def app_database(tmp_path):
+    """SQLiteDatabase sobre una copia nueva del esquema con sus datos de ejemplo y migraciones"""
+    from src.app_logic import SQLiteDatabase
+
+    path = str(tmp_path / "fithome_test.db")
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        conn.executescript(f.read())
+    conn.close()
+
+    database = SQLiteDatabase(path)
+    assert database.connect()
+    yield database
+    database.close()
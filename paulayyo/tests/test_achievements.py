@@ -0,0 +1,56 @@
+"""
+Pruebas del motor de logros basado en criterios
+"""
+
+from src.app_logic import AchievementEngine, UserService, WorkoutService
+
+
+def granted(database, user_id=1):
+    return sorted(row['nombre'] for row in database.execute_query(
+        "SELECT l.nombre FROM logros_usuario lu JOIN logros l ON l.id = lu.logro_id "
+        "WHERE lu.usuario_id = ?", (user_id,)))
+
+
+def test_completion_grants_reached_achievements(app_database):
+    assert WorkoutService(app_database).complete_workout_session(1, 1, 45, 1200, 5)
+
+    assert granted(app_database) == ['Primer Paso', 'Quemador']
+
+
+def test_evaluate_user_is_idempotent(app_database):
+    WorkoutService(app_database).complete_workout_session(1, 1, 45, 1200, 5)
+    engine = AchievementEngine(app_database)
+    before = granted(app_database)
+
+    # INSERT OR IGNORE: volver a evaluar no duplica ni concede de nuevo
+    assert engine.evaluate_user(1) == 0
+    assert engine.evaluate_user(1) == 0
+    assert engine.evaluate_all_users() == 0
+    assert granted(app_database) == before
+    assert app_database.execute_query(
+        "SELECT COUNT(*) AS n FROM logros_usuario WHERE usuario_id = 1")[0]['n'] == len(before)
+
+
+def test_only_new_achievements_are_counted(app_database):
+    workouts = WorkoutService(app_database)
+    engine = AchievementEngine(app_database)
+    workouts.complete_workout_session(1, 1, 20, 200, 4)
+    assert granted(app_database) == ['Primer Paso']
+
+    # El umbral de calorías se cruza sin que el motor vea la escritura
+    app_database.execute_update(
+        "UPDATE estadisticas_usuario_totales SET total_calorias = 1000 WHERE usuario_id = 1")
+
+    assert engine.evaluate_user(1) == 1
+    assert granted(app_database) == ['Primer Paso', 'Quemador']
+
+
+def test_weight_loss_uses_first_and_last_weigh_in(app_database):
+    engine = AchievementEngine(app_database)
+    # Los pesos de ejemplo van de 76.0 a 75.5 kg
+    assert engine.evaluate_user(1) == 0
+
+    UserService(app_database).log_weight(1, 70.5)
+
+    assert engine.evaluate_user(1) == 1
+    assert granted(app_database) == ['Transformación']
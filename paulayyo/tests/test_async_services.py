@@ -0,0 +1,73 @@
+"""
+Pruebas de la capa de servicios asíncrona
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.app_logic import (CatalogCache, HydrationService, KidsActivityService, MediaService,
+                           NutritionService, UserService, WorkoutService)
+from src.async_services import ExecutorDatabase, build_async_services, load_dashboard_page
+
+
+@pytest.fixture
+def services(app_database):
+    catalog = CatalogCache(app_database)
+    services = {
+        'database': app_database,
+        'user_service': UserService(app_database),
+        'workout_service': WorkoutService(app_database, catalog),
+        'nutrition_service': NutritionService(app_database, catalog),
+        'kids_service': KidsActivityService(app_database, catalog),
+        'media_service': MediaService(app_database, catalog),
+        'hydration_service': HydrationService(app_database)
+    }
+    async_services = build_async_services(services)
+    yield services, async_services
+    async_services['database'].close()
+    services['hydration_service'].close()
+
+
+def test_queries_run_on_the_dedicated_pool(app_database):
+    database = ExecutorDatabase(app_database, max_workers=2)
+
+    async def thread_names():
+        return await asyncio.gather(*(database.run(lambda: threading.current_thread().name)
+                                      for _ in range(4)))
+
+    try:
+        names = asyncio.run(thread_names())
+        assert all(name.startswith("fithome-db") for name in names)
+        assert asyncio.run(database.execute_query("SELECT COUNT(*) AS n FROM usuarios"))[0]['n'] > 0
+    finally:
+        database.close()
+
+
+def test_kids_filters_match_sync_service(services):
+    sync, async_services = services
+    kids = async_services['kids_service']
+    cases = [
+        {},
+        {'activity_type': 'diy'},
+        {'age_range': '6-8 años'},
+        {'difficulty': 'facil', 'min_age': 4, 'max_age': 7},
+    ]
+    for filters in cases:
+        result = asyncio.run(kids.get_kids_activities(**filters))
+        expected = sync['kids_service'].get_kids_activities(**filters)
+        assert [activity.id for activity in result] == [activity.id for activity in expected]
+
+
+def test_dashboard_page_matches_sync_queries(services):
+    sync, async_services = services
+    user_id = 1
+
+    page = asyncio.run(load_dashboard_page(async_services, user_id))
+
+    assert page.stats == sync['user_service'].get_user_stats(user_id)
+    assert page.achievements == sync['user_service'].get_achievements(user_id)
+    expected = sync['workout_service'].get_workouts(include_exercises=False)[:2]
+    assert [workout.id for workout in page.workouts] == [workout.id for workout in expected]
+    assert page.hydration == sync['hydration_service'].get_daily_intake(user_id)
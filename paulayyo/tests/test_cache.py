@@ -0,0 +1,137 @@
+"""
+Pruebas de las cachés en memoria (TTLCache y FigureCache)
+"""
+
+import plotly.graph_objects as go
+import pytest
+
+from src import cache as cache_module
+from src.cache import DataVersionRegistry, FigureCache, TTLCache
+
+
+class FakeClock:
+    """Sustituto de time.monotonic que solo avanza cuando se le pide"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module.time, 'monotonic', fake)
+    return fake
+
+
+def figure(title):
+    return go.Figure(go.Scatter(x=[1, 2], y=[3, 4]), layout=dict(title=title))
+
+
+def payload_bytes(title):
+    return len(figure(title).to_json().encode('utf-8'))
+
+
+# =============================================================================
+# TTLCache
+# =============================================================================
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl_seconds=None)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'a' pasa a ser la más reciente
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats().evictions == 1
+
+
+def test_ttl_cache_expires_entries(clock):
+    cache = TTLCache(max_entries=10, ttl_seconds=5)
+    cache.set('a', 1)
+    clock.now += 4.9
+    assert cache.get('a') == 1
+
+    clock.now += 0.2
+    assert cache.get('a', 'caducada') == 'caducada'
+    stats = cache.stats()
+    assert (stats.expirations, stats.size) == (1, 0)
+
+
+def test_ttl_cache_get_or_load_keeps_falsy_values():
+    cache = TTLCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return []
+
+    assert cache.get_or_load('vacio', loader) == []
+    assert cache.get_or_load('vacio', loader) == []
+    assert len(calls) == 1
+
+
+# =============================================================================
+# FigureCache
+# =============================================================================
+
+def test_figure_cache_counts_utf8_bytes():
+    cache = FigureCache()
+    cache.get_or_build(1, 'peso', lambda: figure("Progreso 💪 año"))
+
+    assert cache.stats().total_bytes == payload_bytes("Progreso 💪 año")
+    assert cache.stats().total_bytes > len(figure("Progreso 💪 año").to_json())
+
+
+def test_figure_cache_evicts_to_stay_within_budget():
+    size = payload_bytes("Gráfico")
+    cache = FigureCache(max_bytes=size * 2, versions=DataVersionRegistry())
+    for user_id in (1, 2):
+        cache.get_or_build(user_id, 'peso', lambda: figure("Gráfico"))
+    cache.get_or_build(1, 'peso', lambda: pytest.fail("la figura 1 debía estar cacheada"))
+    cache.get_or_build(3, 'peso', lambda: figure("Gráfico"))
+
+    # Se desaloja la menos usada (usuario 2) y el total no supera el presupuesto
+    stats = cache.stats()
+    assert (stats.size, stats.evictions) == (2, 1)
+    assert stats.total_bytes <= cache.max_bytes
+    built = []
+    cache.get_or_build(2, 'peso', lambda: built.append(2) or figure("Gráfico"))
+    assert built == [2]
+
+
+def test_figure_cache_skips_payloads_larger_than_budget():
+    cache = FigureCache(max_bytes=payload_bytes("Gráfico") - 1)
+    cache.get_or_build(1, 'peso', lambda: figure("Gráfico"))
+
+    assert cache.stats().size == 0 and cache.stats().total_bytes == 0
+
+
+def test_figure_cache_expires_entries(clock):
+    cache = FigureCache(ttl_seconds=10, versions=DataVersionRegistry())
+    cache.get_or_build(1, 'peso', lambda: figure("A"))
+    clock.now += 11
+    rebuilt = cache.get_or_build(1, 'peso', lambda: figure("B"))
+
+    assert rebuilt.layout.title.text == "B"
+    assert cache.stats().expirations == 1
+
+
+def test_figure_cache_version_bump_replaces_stale_figure():
+    versions = DataVersionRegistry()
+    cache = FigureCache(versions=versions)
+    cache.get_or_build(1, 'peso', lambda: figure("Antes"))
+    cache.get_or_build(2, 'peso', lambda: figure("Otro usuario"))
+    assert cache.get_or_build(1, 'peso', lambda: figure("X")).layout.title.text == "Antes"
+
+    versions.bump(1)
+    assert cache.get_or_build(1, 'peso', lambda: figure("Después")).layout.title.text == "Después"
+
+    # La versión antigua se descarta y la del otro usuario se conserva
+    stats = cache.stats()
+    assert stats.size == 2
+    assert stats.total_bytes == payload_bytes("Después") + payload_bytes("Otro usuario")
@@ -0,0 +1,32 @@
+"""
+Pruebas de la caché de catálogos
+"""
+
+from src.app_logic import CatalogCache
+
+
+def test_empty_result_is_cached(app_database):
+    cache = CatalogCache(app_database)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return []
+
+    assert cache.get('empty', ('actividades_infantiles',), loader) == []
+    assert cache.get('empty', ('actividades_infantiles',), loader) == []
+    assert len(calls) == 1
+    assert cache.stats().hits == 1
+
+
+def test_failed_load_is_not_cached(app_database):
+    cache = CatalogCache(app_database)
+
+    def broken_loader():
+        return app_database.execute_query("SELECT * FROM tabla_inexistente")
+
+    assert cache.get('broken', ('actividades_infantiles',), broken_loader) == []
+    assert cache.peek('broken') is None
+
+    assert cache.get('empty', ('actividades_infantiles',), lambda: []) == []
+    assert cache.peek('empty') == []
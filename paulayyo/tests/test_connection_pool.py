@@ -0,0 +1,152 @@
+"""
+Pruebas del pool de conexiones y de las transacciones de SQLiteDatabase
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from src.app_logic import ConnectionPool, SQLiteDatabase
+
+
+@pytest.fixture
+def database(tmp_path):
+    db = SQLiteDatabase(str(tmp_path / "pool.db"), pool_size=2, pool_timeout=0.2)
+    db.execute_update("CREATE TABLE items (id INTEGER PRIMARY KEY, nombre TEXT)")
+    yield db
+    db.close()
+
+
+def count_items(db):
+    return db.execute_query("SELECT COUNT(*) AS total FROM items")[0]['total']
+
+
+def test_pool_exhausted_times_out(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=2, timeout=0.2)
+    held = threading.Event()
+    done = threading.Event()
+
+    def hold_connection():
+        with pool.connection():
+            held.set()
+            done.wait(5)
+
+    holders = [threading.Thread(target=hold_connection) for _ in range(2)]
+    for thread in holders:
+        held.clear()
+        thread.start()
+        assert held.wait(5)
+
+    try:
+        with pytest.raises(TimeoutError):
+            with pool.connection():
+                pass
+        metrics = pool.metrics()
+        assert metrics.open_connections == 2
+        assert metrics.in_use == 2
+    finally:
+        done.set()
+        for thread in holders:
+            thread.join()
+
+    # Al liberarse, las conexiones vuelven a estar disponibles
+    with pool.connection() as conn:
+        assert conn.execute("SELECT 1").fetchone()[0] == 1
+    assert pool.metrics().open_connections == 2
+    pool.close()
+
+
+def test_waiting_checkout_gets_released_connection(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=1, timeout=5)
+    held = threading.Event()
+    release = threading.Event()
+    seen = {}
+
+    def hold_connection():
+        with pool.connection() as conn:
+            seen['holder'] = conn
+            held.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold_connection)
+    holder.start()
+    assert held.wait(5)
+    threading.Timer(0.05, release.set).start()
+
+    with pool.connection() as conn:
+        assert conn is seen['holder']
+    holder.join()
+    assert pool.metrics().total_waits == 1
+    pool.close()
+
+
+def test_connection_reused_on_same_thread(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=1, timeout=0.2)
+    with pool.connection() as outer:
+        # Un pool de tamaño 1 agotaría el tiempo si el checkout anidado no reutilizara la conexión
+        with pool.connection() as inner:
+            assert inner is outer
+    with pool.connection() as again:
+        assert again is outer
+
+    metrics = pool.metrics()
+    assert metrics.open_connections == 1
+    assert metrics.total_checkouts == 2
+    pool.close()
+
+
+def test_other_thread_gets_its_own_connection(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=2, timeout=0.2)
+    seen = {}
+
+    def use_connection():
+        with pool.connection() as conn:
+            seen['conn'] = conn
+
+    with pool.connection() as main_conn:
+        thread = threading.Thread(target=use_connection)
+        thread.start()
+        thread.join()
+        assert seen['conn'] is not main_conn
+    assert pool.metrics().open_connections == 2
+    pool.close()
+
+
+def test_transaction_commits_once(database):
+    with database.transaction():
+        assert database.execute_update("INSERT INTO items (nombre) VALUES (?)", ("a",))
+        assert database.execute_update("INSERT INTO items (nombre) VALUES (?)", ("b",))
+    assert count_items(database) == 2
+
+
+def test_nested_transaction_rolls_back_outer(database):
+    with pytest.raises(RuntimeError):
+        with database.transaction():
+            database.execute_update("INSERT INTO items (nombre) VALUES (?)", ("externa",))
+            with database.transaction():
+                database.execute_update("INSERT INTO items (nombre) VALUES (?)", ("anidada",))
+                raise RuntimeError("fallo en la transacción anidada")
+    assert count_items(database) == 0
+
+    # La conexión vuelve al pool sin transacción abierta y sigue siendo utilizable
+    with database.pool.connection() as conn:
+        assert not conn.in_transaction
+    database.execute_update("INSERT INTO items (nombre) VALUES (?)", ("después",))
+    assert count_items(database) == 1
+
+
+def test_failed_update_inside_transaction_keeps_outer_open(database):
+    with database.transaction():
+        database.execute_update("INSERT INTO items (nombre) VALUES (?)", ("a",))
+        assert not database.execute_update("INSERT INTO tabla_inexistente VALUES (1)")
+        database.execute_update("INSERT INTO items (nombre) VALUES (?)", ("b",))
+    assert count_items(database) == 2
+
+
+def test_closed_pool_rejects_checkouts(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=1)
+    pool.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        with pool.connection():
+            pass
@@ -0,0 +1,39 @@
+"""
+Pruebas de la invalidación de figuras cacheadas al escribir datos del usuario
+"""
+
+from src.app_logic import DataAnalytics, UserProfile, UserService
+from src.cache import FigureCache
+from src.data_analysis import FitnessChartGenerator, FitnessDataAnalyzer
+
+
+def weights_in(figure):
+    return list(figure.data[0].y)
+
+
+def test_logging_weight_refreshes_cached_charts(app_database):
+    figure_cache = FigureCache()
+    analytics = DataAnalytics(app_database, figure_cache=figure_cache)
+    charts = FitnessChartGenerator(FitnessDataAnalyzer(app_database.db_path, pool=app_database.pool),
+                                   figure_cache=figure_cache)
+    before = weights_in(analytics.generate_progress_chart(1))
+    assert weights_in(charts.create_weight_progress_chart(1)) == before
+
+    assert UserService(app_database).log_weight(1, 71.3)
+
+    # La escritura cambia la versión de datos: ninguna figura antigua se sirve
+    assert weights_in(analytics.generate_progress_chart(1)) == before + [71.3]
+    assert weights_in(charts.create_weight_progress_chart(1)) == before + [71.3]
+    user = app_database.execute_query("SELECT peso_actual FROM usuarios WHERE id = 1")[0]
+    assert user['peso_actual'] == 71.3
+
+
+def test_profile_update_bumps_data_version(app_database):
+    from src.cache import data_versions
+
+    version = data_versions.get(1)
+    profile = UserProfile(id=1, name="Ana", email="ana@example.com", age=30, gender="femenino",
+                          weight=70.0, height=165.0, target_weight=65.0, fitness_level="intermedio")
+
+    assert UserService(app_database).update_user_profile(profile)
+    assert data_versions.get(1) > version
@@ -0,0 +1,92 @@
+"""
+Pruebas de los fragmentos de la interfaz y de su medición de tiempos
+"""
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from src import main_app
+from src.main_app import record_render_time, timed_fragment
+
+
+@pytest.fixture(autouse=True)
+def session_state():
+    # Sin servidor Streamlit el estado de sesión es global al proceso
+    st.session_state.clear()
+    yield st.session_state
+    st.session_state.clear()
+
+
+@pytest.fixture
+def fragments(monkeypatch):
+    """Sustituye st.fragment y guarda con qué se llamó"""
+    calls = []
+
+    def fake_fragment(func, run_every=None):
+        calls.append((func, run_every))
+        return func
+
+    monkeypatch.setattr(main_app.st, 'fragment', fake_fragment)
+    return calls
+
+
+def test_timed_fragment_registers_a_fragment(fragments):
+    @timed_fragment('timer', run_every=1)
+    def paint(value):
+        """Pintar"""
+        return value * 2
+
+    assert [run_every for _, run_every in fragments] == [1]
+    assert (paint.__name__, paint.__doc__) == ('paint', "Pintar")
+    assert paint(21) == 42
+    assert set(st.session_state.render_timings) == {'timer'}
+
+
+def test_render_time_is_recorded_when_the_fragment_fails(fragments):
+    @timed_fragment('broken')
+    def paint():
+        raise RuntimeError("fallo")
+
+    with pytest.raises(RuntimeError):
+        paint()
+    assert 'broken' in st.session_state.render_timings
+
+
+def test_record_render_time_keeps_the_last_value():
+    record_render_time('app', 12.345)
+    record_render_time('app', 3.21)
+    record_render_time('hydration', 1.0)
+
+    assert st.session_state.render_timings == {'app': 3.21, 'hydration': 1.0}
+
+
+def hydration_page(db_path):
+    import streamlit as st
+
+    from src.app_logic import HydrationService, SQLiteDatabase, UserProfile
+    from src.main_app import show_hydration_widget
+
+    if 'hydration' not in st.session_state:
+        database = SQLiteDatabase(db_path)
+        database.connect()
+        st.session_state.hydration = HydrationService(database, debounce_seconds=60)
+        st.session_state.user_profile = UserProfile(id=1)
+    show_hydration_widget({'hydration_service': st.session_state.hydration})
+
+
+def test_hydration_fragment_applies_clicks_in_callbacks(app_database):
+    # AppTest vuelve a ejecutar el script entero tras cada clic; se comprueba
+    # que el fragmento pinta el estado que dejan sus callbacks
+    app = AppTest.from_function(hydration_page, args=(app_database.db_path,)).run()
+    glasses = app.session_state.hydration.get_daily_intake(1).glasses
+
+    app.button[0].click().run()
+    app.button[0].click().run()
+    app.button[1].click().run()
+
+    assert not app.exception
+    assert app.markdown[-1].value.startswith(f"{glasses + 1}/")
+    assert 'hydration' in app.session_state.render_timings
+    app.session_state.hydration.close()
+    app.session_state.hydration.db.close()
@@ -0,0 +1,42 @@
+"""
+Pruebas de la escritura agrupada de la hidratación
+"""
+
+import gc
+
+from src import app_logic
+from src.app_logic import HydrationService
+
+
+def stored_glasses(database, user_id, date):
+    rows = database.execute_query(
+        "SELECT vasos_consumidos FROM hidratacion_diaria WHERE usuario_id = ? AND fecha = ?",
+        (user_id, date))
+    return rows[0]['vasos_consumidos'] if rows else None
+
+
+def test_close_cancels_timer_and_writes_pending(app_database):
+    service = HydrationService(app_database, debounce_seconds=60)
+    service.add_glasses(1, 3, date='2020-01-01')
+    timer = service._timer
+    assert timer is not None and stored_glasses(app_database, 1, '2020-01-01') is None
+
+    assert service.close() == 1
+    timer.join(1.0)
+    assert not timer.is_alive()
+    assert service not in app_logic._open_hydration_services
+    assert stored_glasses(app_database, 1, '2020-01-01') == 3
+
+    # Cerrado ya no hay ventana: cada clic se escribe en el momento
+    service.add_glasses(1, 1, date='2020-01-01')
+    assert service._timer is None
+    assert stored_glasses(app_database, 1, '2020-01-01') == 4
+
+
+def test_discarded_services_are_not_retained(app_database):
+    before = len(app_logic._open_hydration_services)
+    for _ in range(20):
+        HydrationService(app_database)
+    gc.collect()
+
+    assert len(app_logic._open_hydration_services) == before
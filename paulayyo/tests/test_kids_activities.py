@@ -0,0 +1,56 @@
+"""
+Pruebas de los filtros de actividades infantiles
+"""
+
+from src.app_logic import CatalogCache, KidsActivityService
+
+
+def test_filters_overlap_age_range(app_database):
+    service = KidsActivityService(app_database, CatalogCache(app_database))
+
+    result = service.get_kids_activities(age_range="11-12 años")
+    assert result
+    for activity in result:
+        low, high = KidsActivityService.parse_age_range(activity.age)
+        assert low <= 12 and high >= 11
+
+    # Las edades se comparan como enteros, no como texto ("3" > "12")
+    assert {a.id for a in service.get_kids_activities(min_age=3, max_age=3)} == {
+        a.id for a in service.get_kids_activities() if KidsActivityService.parse_age_range(a.age)[0] <= 3}
+
+
+def test_filter_results_are_bounded_lru(app_database):
+    service = KidsActivityService(app_database, CatalogCache(app_database), max_filters=4)
+
+    for age in range(20):
+        service.get_kids_activities(min_age=age)
+    service.get_kids_activities(min_age=90)
+    service.get_kids_activities(min_age=90)
+
+    stats = service._filter_ids.stats()
+    assert stats.size == 4
+    assert stats.evictions == 17
+    # Un resultado vacío también se reutiliza
+    assert stats.hits == 1
+
+
+def test_filter_results_follow_catalog_changes(app_database):
+    service = KidsActivityService(app_database, CatalogCache(app_database, check_interval=0))
+    before = service.get_kids_activities(activity_type='diy')
+
+    app_database.execute_update("UPDATE actividades_infantiles SET tipo = 'juego' WHERE id = ?", (before[0].id,))
+
+    assert [a.id for a in service.get_kids_activities(activity_type='diy')] == [a.id for a in before[1:]]
+
+
+def test_callers_get_copies_of_cached_activities(app_database):
+    service = KidsActivityService(app_database, CatalogCache(app_database))
+
+    for filters in ({}, {'difficulty': 'facil'}):
+        first = service.get_kids_activities(**filters)[0]
+        original_name, original_materials = first.name, list(first.materials)
+        first.name = "Modificada"
+        first.materials.append("Otro material")
+
+        again = service.get_kids_activities(**filters)[0]
+        assert (again.name, again.materials) == (original_name, original_materials)
@@ -0,0 +1,84 @@
+"""
+Pruebas de las migraciones numeradas del esquema
+"""
+
+import sqlite3
+
+import pytest
+
+from src.app_logic import MigrationError, apply_migrations, load_migrations
+
+MIGRATIONS = """-- Migraciones de prueba
+
+-- migración 1: tabla
+CREATE TABLE items (id INTEGER PRIMARY KEY, nombre TEXT);
+
+-- migración 2: carga inicial
+INSERT INTO items (nombre) VALUES ('a');
+INSERT INTO items (nombre) VALUES ('b');
+"""
+
+
+@pytest.fixture
+def conn(tmp_path):
+    connection = sqlite3.connect(str(tmp_path / "migraciones.db"))
+    yield connection
+    connection.close()
+
+
+def write_migrations(tmp_path, text):
+    path = tmp_path / "migraciones.sql"
+    path.write_text(text, encoding='utf-8')
+    return path
+
+
+def user_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def test_load_migrations_groups_statements(tmp_path):
+    path = write_migrations(tmp_path, MIGRATIONS)
+    assert [(version, len(statements)) for version, statements in load_migrations(path)] == [(1, 1), (2, 2)]
+
+
+def test_migrations_run_once(tmp_path, conn):
+    path = write_migrations(tmp_path, MIGRATIONS)
+    assert apply_migrations(conn, path) == 2
+    assert user_version(conn) == 2
+
+    # Las cargas iniciales no se repiten al volver a conectar
+    assert apply_migrations(conn, path) == 0
+    assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 2
+
+
+def test_only_new_migrations_are_applied(tmp_path, conn):
+    apply_migrations(conn, write_migrations(tmp_path, MIGRATIONS))
+    path = write_migrations(tmp_path, MIGRATIONS + "\n-- migración 3: columna\nALTER TABLE items ADD COLUMN nota TEXT;\n")
+    assert apply_migrations(conn, path) == 1
+    assert user_version(conn) == 3
+
+
+def test_failed_migration_rolls_back_and_raises(tmp_path, conn):
+    path = write_migrations(tmp_path, MIGRATIONS + "\n-- migración 3: rota\n"
+                            "CREATE TABLE otra (id INTEGER);\n"
+                            "ALTER TABLE no_existe ADD COLUMN nota TEXT;\n")
+    with pytest.raises(MigrationError):
+        apply_migrations(conn, path)
+    assert user_version(conn) == 2
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'otra'").fetchall() == []
+
+
+def test_statement_outside_migration_is_rejected(tmp_path):
+    path = write_migrations(tmp_path, "CREATE TABLE suelta (id INTEGER);\n" + MIGRATIONS)
+    with pytest.raises(MigrationError):
+        load_migrations(path)
+
+
+def test_project_migrations_apply_on_schema(tmp_path, conn):
+    from src.app_logic import MIGRATIONS_PATH
+    schema = MIGRATIONS_PATH.parent / 'fithome_pro_sqlite.sql'
+    conn.executescript(schema.read_text(encoding='utf-8'))
+    latest = load_migrations()[-1][0]
+    assert apply_migrations(conn) == latest
+    assert user_version(conn) == latest
+    assert apply_migrations(conn) == 0
@@ -0,0 +1,73 @@
+"""
+Pruebas de la paginación por clave (keyset) del contenido multimedia
+"""
+
+from src.app_logic import CatalogCache, MediaService
+
+
+def add_movie(database, title, rating, year, premium=False, active=True):
+    database.execute_update(
+        "INSERT INTO contenido_multimedia (titulo, tipo, genero, duracion_minutos, año_produccion, "
+        "rating_promedio, es_premium, activo) VALUES (?, 'pelicula', 'Película', 90, ?, ?, ?, ?)",
+        (title, year, rating, premium, active)
+    )
+
+
+def all_pages(service, page_size, **kwargs):
+    pages = [service.get_movies_page(page_size, **kwargs)]
+    while pages[-1].has_more:
+        pages.append(service.get_movies_page(page_size, cursor=pages[-1].next_cursor, **kwargs))
+    return pages
+
+
+def titles(pages):
+    return [movie.title for page in pages for movie in page.movies]
+
+
+def test_pages_follow_catalog_order(app_database):
+    for i in range(4):
+        add_movie(app_database, f"Extra {i}", 4.0 + i / 10, 2020 + i)
+    service = MediaService(app_database, CatalogCache(app_database))
+
+    pages = all_pages(service, 2)
+
+    assert [len(page.movies) for page in pages] == [2, 2, 2, 1]
+    assert titles(pages) == [movie.title for movie in service.get_movies()]
+
+
+def test_last_page_has_no_cursor(app_database):
+    service = MediaService(app_database, CatalogCache(app_database))
+
+    # Las 3 películas de ejemplo caben justas en una página
+    page = service.get_movies_page(3)
+    assert len(page.movies) == 3
+    assert page.next_cursor is None and not page.has_more
+
+    # El cursor de la última fila no devuelve nada más
+    last = page.movies[-1]
+    assert service.get_movies_page(3, cursor=(last.rating, last.year, last.id)).movies == []
+
+
+def test_ties_on_the_sort_key_are_neither_skipped_nor_repeated(app_database):
+    app_database.execute_update("DELETE FROM contenido_multimedia")
+    for i in range(7):
+        add_movie(app_database, f"Empate {i}", 4.5, 2023)
+    add_movie(app_database, "Mismo rating, otro año", 4.5, 2022)
+    service = MediaService(app_database, CatalogCache(app_database))
+
+    pages = all_pages(service, 3)
+
+    # Los empates en (rating, año) se desempatan por id descendente
+    assert titles(pages) == [f"Empate {i}" for i in reversed(range(7))] + ["Mismo rating, otro año"]
+    assert pages[0].next_cursor == (4.5, 2023, pages[0].movies[-1].id)
+
+
+def test_premium_and_inactive_filters(app_database):
+    add_movie(app_database, "Premium", 3.0, 2024, premium=True)
+    add_movie(app_database, "Inactiva", 5.0, 2024, premium=True, active=False)
+    service = MediaService(app_database, CatalogCache(app_database))
+
+    premium = titles(all_pages(service, 1, is_premium_only=True))
+
+    assert "Premium" in premium and "Inactiva" not in premium
+    assert premium == [movie.title for movie in service.get_movies(is_premium_only=True)]
@@ -0,0 +1,94 @@
+"""
+Pruebas del servicio de nutrición
+"""
+
+import datetime
+
+from src.app_logic import CatalogCache, NutritionService
+
+
+def add_meal(database, plan_id, name):
+    database.execute_update("""
+    INSERT INTO comidas (plan_nutricional_id, nombre, tipo, calorias, carbohidratos_g, proteinas_g, grasas_g)
+    VALUES (?, ?, 'cena', 420, 35.5, 30.25, 12.0)
+    """, (plan_id, name))
+
+
+def test_meals_keep_names_with_commas_and_macros(app_database):
+    service = NutritionService(app_database, CatalogCache(app_database, check_interval=0))
+    plan_id = service.get_nutrition_plans()[0].id
+    add_meal(app_database, plan_id, "Pollo, arroz y verduras")
+
+    plan = next(plan for plan in service.get_nutrition_plans() if plan.id == plan_id)
+    meal = plan.meals[-1]
+    assert plan.meals_loaded
+    assert (meal['name'], meal['type'], meal['calories']) == ("Pollo, arroz y verduras", 'cena', 420)
+    assert (meal['carbs'], meal['proteins'], meal['fats']) == (35.5, 30.25, 12.0)
+    assert 'ingredientes' not in meal and 'instrucciones' not in meal
+
+
+def test_plans_without_meals_skip_the_meals_query(app_database):
+    service = NutritionService(app_database, CatalogCache(app_database))
+
+    plans = service.get_nutrition_plans(include_meals=False)
+
+    assert plans and all(plan.meals == [] and not plan.meals_loaded for plan in plans)
+    assert service.catalog.peek('nutrition_meals') is None
+    assert [plan.id for plan in service.get_nutrition_plans()] == [plan.id for plan in plans]
+
+
+def test_callers_get_copies_of_cached_meals(app_database):
+    service = NutritionService(app_database, CatalogCache(app_database))
+    add_meal(app_database, 1, "Salmón con quinoa")
+    plan = next(plan for plan in service.get_nutrition_plans() if plan.meals)
+    original = dict(plan.meals[0])
+
+    plan.meals[0]['name'] = "Modificada"
+    plan.meals.clear()
+
+    again = next(p for p in service.get_nutrition_plans() if p.id == plan.id)
+    assert again.meals[0] == original
+
+
+def nutrition_rows(database):
+    return [tuple(row.values()) for row in database.execute_query(
+        "SELECT usuario_id, fecha, calorias_consumidas, carbohidratos_g, proteinas_g, grasas_g "
+        "FROM seguimiento_nutricional ORDER BY usuario_id, fecha")]
+
+
+def test_batch_sums_records_of_the_same_day(app_database):
+    service = NutritionService(app_database)
+    result = service.track_nutrition_batch([
+        (1, '2024-03-01', 500, 60.0, 30.0, 10.0),
+        (1, datetime.date(2024, 3, 1), 700, 80.0, 40.0, 20.0),
+        (1, datetime.datetime(2024, 3, 2, 21, 30), 900, 100.0, 50.0, 30.0),
+    ])
+
+    assert result.success
+    assert (result.records, result.rows) == (3, 2)
+    assert nutrition_rows(app_database) == [
+        (1, '2024-03-01', 1200, 140.0, 70.0, 30.0),
+        (1, '2024-03-02', 900, 100.0, 50.0, 30.0),
+    ]
+
+
+def test_batch_adds_to_days_already_tracked(app_database):
+    service = NutritionService(app_database)
+    service.track_nutrition_batch([(1, '2024-03-01', 500, 60.0, 30.0, 10.0)])
+
+    service.track_nutrition_batch([(1, '2024-03-01', 250, 20.0, 10.0, 5.0)])
+
+    assert nutrition_rows(app_database) == [(1, '2024-03-01', 750, 80.0, 40.0, 15.0)]
+
+
+def test_failed_batch_writes_nothing(app_database):
+    service = NutritionService(app_database)
+
+    # sqlite3 rechaza la segunda fila tras escribir la primera: se deshace todo el lote
+    result = service.track_nutrition_batch([
+        (1, '2024-03-01', 500, 60.0, 30.0, 10.0),
+        (1, '2024-03-02', [500], 60.0, 30.0, 10.0),
+    ])
+
+    assert not result.success
+    assert nutrition_rows(app_database) == []
@@ -0,0 +1,87 @@
+"""
+Pruebas de la navegación entre pantallas (SCREEN_TRANSITIONS y go_to)
+"""
+
+import pytest
+import streamlit as st
+
+from src import main_app
+from src.main_app import SCREEN_TRANSITIONS, SCREENS, close_workout, go_to, open_workout
+
+
+@pytest.fixture(autouse=True)
+def session_state():
+    # Sin servidor Streamlit el estado de sesión es global al proceso
+    st.session_state.clear()
+    yield st.session_state
+    st.session_state.clear()
+
+
+def at(screen):
+    st.session_state.current_screen = screen
+
+
+def test_every_target_screen_can_be_painted():
+    targets = {screen for allowed in SCREEN_TRANSITIONS.values() for screen in allowed}
+
+    assert targets <= set(SCREENS)
+    assert set(SCREEN_TRANSITIONS) == set(SCREENS) | {'loading'}
+
+
+@pytest.mark.parametrize('current, screen', [
+    (current, screen) for current, allowed in SCREEN_TRANSITIONS.items() for screen in allowed
+])
+def test_allowed_transitions_apply_state(current, screen):
+    at(current)
+
+    assert go_to(screen, selected_workout='w')
+
+    assert st.session_state.current_screen == screen
+    assert st.session_state.selected_workout == 'w'
+
+
+@pytest.mark.parametrize('current, screen', [
+    ('loading', 'workout'),
+    ('loading', 'onboarding'),
+    ('auth', 'workout'),
+    ('onboarding', 'auth'),
+    ('onboarding', 'workout'),
+    ('dashboard', 'loading'),
+    ('dashboard', 'onboarding'),
+    ('workout', 'onboarding'),
+    ('unknown', 'dashboard'),
+])
+def test_illegal_transitions_leave_state_untouched(current, screen):
+    at(current)
+
+    assert not go_to(screen, selected_workout='w')
+
+    assert st.session_state.current_screen == current
+    assert 'selected_workout' not in st.session_state
+
+
+def test_open_and_close_workout(monkeypatch):
+    at('dashboard')
+    monkeypatch.setattr(main_app.time, 'time', lambda: 100.0)
+
+    open_workout('hiit')
+    assert st.session_state.current_screen == 'workout'
+    assert st.session_state.selected_workout == 'hiit'
+    assert not st.session_state.workout_in_progress
+
+    main_app.start_exercise(2)
+    assert st.session_state.exercise_deadline == 100.0 + main_app.EXERCISE_SECONDS
+
+    close_workout()
+    assert st.session_state.current_screen == 'dashboard'
+    assert st.session_state.selected_workout is None
+    assert (st.session_state.current_exercise, st.session_state.exercise_deadline) == (0, None)
+
+
+def test_workout_cannot_open_before_login():
+    at('auth')
+
+    open_workout('hiit')
+
+    assert st.session_state.current_screen == 'auth'
+    assert 'selected_workout' not in st.session_state
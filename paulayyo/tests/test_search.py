@@ -0,0 +1,78 @@
+"""
+Pruebas de la búsqueda de texto completo (FTS5) sobre los catálogos
+"""
+
+from src.app_logic import SearchService
+
+
+def found(service, text, **kwargs):
+    return [(result.kind, result.id) for result in service.search(text, **kwargs)]
+
+
+def test_rowid_decodes_to_source_and_id(app_database):
+    app_database.execute_update(
+        "INSERT INTO comidas (plan_nutricional_id, nombre, tipo, calorias) VALUES (1, 'Batido tropical', 'snack', 250)")
+    meal_id = app_database.execute_query("SELECT id FROM comidas WHERE nombre = 'Batido tropical'")[0]['id']
+    movie_id = app_database.execute_query(
+        "SELECT id FROM contenido_multimedia WHERE titulo = 'El Poder de la Mente'")[0]['id']
+    service = SearchService(app_database)
+
+    assert found(service, "HIIT") == [('entrenamiento', 1)]
+    assert found(service, "batido") == [('comida', meal_id)]
+    assert found(service, "poder mente") == [('multimedia', movie_id)]
+    # rowid = id * 8 + origen en el propio índice
+    assert app_database.execute_query(
+        "SELECT rowid FROM busqueda_fts WHERE titulo = 'Batido tropical'")[0]['rowid'] == meal_id * 8 + 3
+
+
+def test_results_carry_source_labels(app_database):
+    result = SearchService(app_database).search("HIIT")[0]
+
+    assert (result.title, result.icon, result.label) == ('Cardio HIIT Matutino', '💪', 'Entrenamiento')
+    assert '**' in result.snippet
+
+
+def test_prefix_and_accent_insensitive_matching(app_database):
+    service = SearchService(app_database)
+
+    assert ('multimedia', 3) in found(service, "meditacion")
+    assert ('entrenamiento', 1) in found(service, "matu")
+
+
+def test_kinds_filter(app_database):
+    service = SearchService(app_database)
+
+    assert found(service, "HIIT", kinds=['ejercicio']) == []
+    assert found(service, "HIIT", kinds=['entrenamiento', 'ejercicio']) == [('entrenamiento', 1)]
+
+
+def test_update_trigger_reindexes_the_row(app_database):
+    service = SearchService(app_database)
+
+    app_database.execute_update("UPDATE entrenamientos SET nombre = 'Tabata Explosivo' WHERE id = 1")
+
+    assert found(service, "HIIT") == []
+    assert found(service, "tabata") == [('entrenamiento', 1)]
+
+
+def test_deactivated_and_deleted_rows_leave_the_index(app_database):
+    service = SearchService(app_database)
+    app_database.execute_update(
+        "INSERT INTO comidas (plan_nutricional_id, nombre, tipo, calorias) VALUES (1, 'Batido tropical', 'snack', 250)")
+
+    app_database.execute_update("UPDATE entrenamientos SET activo = 0 WHERE id = 1")
+    app_database.execute_update("DELETE FROM comidas WHERE nombre = 'Batido tropical'")
+
+    assert found(service, "HIIT") == []
+    assert found(service, "batido") == []
+    app_database.execute_update("UPDATE entrenamientos SET activo = 1 WHERE id = 1")
+    assert found(service, "HIIT") == [('entrenamiento', 1)]
+
+
+def test_user_text_cannot_break_the_match_syntax(app_database):
+    service = SearchService(app_database)
+
+    assert service.search('" * (') == []
+    # Los operadores se buscan como palabras, no se interpretan
+    assert found(service, 'OR') == found(service, 'or')
+    assert found(service, 'hiit" (') == [('entrenamiento', 1)]
@@ -0,0 +1,110 @@
+"""
+Pruebas del registro perezoso de servicios
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.app_logic import ServiceRegistry
+
+
+def counting_factory(calls, name, value=None, delay=0.0):
+    def factory(registry):
+        calls.append(name)
+        time.sleep(delay)
+        return value if value is not None else object()
+    return factory
+
+
+def test_services_are_built_on_first_access_only():
+    calls = []
+    services = ServiceRegistry()
+    services.register('a', counting_factory(calls, 'a'))
+    services.register('b', counting_factory(calls, 'b'))
+
+    # Consultar el registro como diccionario no construye nada
+    assert 'a' in services and 'c' not in services
+    assert sorted(services) == ['a', 'b'] and len(services) == 2
+    assert calls == [] and not services.is_loaded('a')
+
+    assert services['a'] is services['a']
+    assert calls == ['a']
+    assert services.is_loaded('a') and not services.is_loaded('b')
+
+
+def test_unknown_service_raises_key_error():
+    services = ServiceRegistry()
+
+    with pytest.raises(KeyError):
+        services['missing']
+    assert services.get('missing') is None
+
+
+def test_provided_instances_are_returned_as_is():
+    services = ServiceRegistry()
+    instance = object()
+    services.provide('database', instance)
+
+    assert services.is_loaded('database')
+    assert services['database'] is instance
+    assert services.timings() == {'database': 0.0}
+
+
+def test_factories_share_their_dependencies():
+    calls = []
+    services = ServiceRegistry()
+    services.register('shared', counting_factory(calls, 'shared'))
+    services.register('left', lambda s: ('left', s['shared']))
+    services.register('right', lambda s: ('right', s['shared']))
+
+    assert services['left'][1] is services['right'][1]
+    assert calls == ['shared']
+
+
+def test_timings_exclude_dependencies():
+    services = ServiceRegistry()
+    services.register('slow', counting_factory([], 'slow', delay=0.05))
+    services.register('fast', lambda s: s['slow'])
+
+    services['fast']
+
+    timings = services.timings()
+    assert list(timings) == ['slow', 'fast']
+    assert timings['slow'] >= 50
+    assert timings['fast'] < timings['slow']
+
+
+def test_concurrent_first_access_builds_once():
+    calls = []
+    services = ServiceRegistry()
+    services.register('a', counting_factory(calls, 'a', delay=0.05))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(services['a'])) for _ in range(8)]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ['a']
+    assert all(result is results[0] for result in results)
+
+
+def test_app_registry_shares_database_catalog_and_analyzer(app_database):
+    from src.main_app import build_service_registry
+
+    services = build_service_registry(app_database)
+    assert [name for name in services if services.is_loaded(name)] == ['database']
+
+    try:
+        charts = services['chart_generator']
+        assert not services.is_loaded('workout_service')
+        assert charts.analyzer is services['report_generator'].analyzer is services['data_analyzer']
+        assert services['data_analyzer'].pool is app_database.pool
+
+        assert services['workout_service'].catalog is services['kids_service'].catalog
+        assert services['workout_service'].writer is services['nutrition_service'].writer
+    finally:
+        services['write_queue'].close()
@@ -0,0 +1,70 @@
+"""
+Pruebas de los agregados calculados en SQLite frente a los de pandas
+"""
+
+import pandas as pd
+import pytest
+
+from src.data_analysis import FitnessChartGenerator, FitnessDataAnalyzer
+
+# (entrenamiento_id, fecha_inicio, minutos, calorías, rating); 1 cardio, 2 fuerza, 3 yoga
+SESSIONS = [
+    (1, '2024-03-01 07:30:00', 20, 210, 5),
+    (2, '2024-03-01 19:00:00', 35, 300, 4),
+    (1, '2024-03-02 08:00:00', 25, 230, None),
+    (3, '2024-03-05 21:15:00', 30, 115, 3),
+    (2, '2024-04-01 10:00:00', 40, 333, 5),
+    (1, '2024-04-01 18:45:00', 18, 190, 4),
+]
+
+
+@pytest.fixture
+def analyzer(app_database):
+    for workout_id, started, minutes, calories, rating in SESSIONS:
+        app_database.execute_update(
+            "INSERT INTO sesiones_entrenamiento (usuario_id, entrenamiento_id, fecha_inicio, fecha_fin, "
+            "duracion_real_minutos, calorias_quemadas, completado, rating_usuario) "
+            "VALUES (1, ?, ?, datetime(?, '+' || ? || ' minutes'), ?, ?, 1, ?)",
+            (workout_id, started, started, minutes, minutes, calories, rating)
+        )
+    # Una sesión sin completar no cuenta en ningún modo
+    app_database.execute_update(
+        "INSERT INTO sesiones_entrenamiento (usuario_id, entrenamiento_id, fecha_inicio) "
+        "VALUES (1, 1, '2024-03-01 12:00:00')")
+    return FitnessDataAnalyzer(app_database.db_path, pool=app_database.pool)
+
+
+def both_modes(analyzer, method):
+    pandas_frame = getattr(FitnessChartGenerator(analyzer, aggregate_in_sql=False), method)(1)
+    sql_frame = getattr(FitnessChartGenerator(analyzer, aggregate_in_sql=True), method)(1)
+    return pandas_frame, sql_frame
+
+
+def test_daily_series_matches_pandas(analyzer):
+    pandas_frame, sql_frame = both_modes(analyzer, '_daily_series')
+    columns = ['date', 'calorias_quemadas', 'duracion_real_minutos', 'rating_usuario']
+
+    pd.testing.assert_frame_equal(sql_frame[columns], pandas_frame[columns], check_dtype=False)
+    assert list(sql_frame['entrenamientos']) == [2, 1, 1, 2]
+
+
+def test_category_stats_match_pandas(analyzer):
+    pandas_frame, sql_frame = both_modes(analyzer, '_category_stats')
+
+    pd.testing.assert_frame_equal(sql_frame, pandas_frame, check_dtype=False, check_names=False)
+    # El rating nulo no cuenta en la media, igual que en pandas
+    assert sql_frame.loc['cardio', 'Rating_Promedio'] == 4.5
+
+
+def test_calendar_series_matches_pandas(analyzer):
+    pandas_frame, sql_frame = both_modes(analyzer, '_calendar_series')
+
+    pd.testing.assert_frame_equal(sql_frame, pandas_frame, check_dtype=False)
+
+
+def test_empty_user_gives_empty_frames(analyzer):
+    sql_charts = FitnessChartGenerator(analyzer, aggregate_in_sql=True)
+
+    assert sql_charts._daily_series(99).empty
+    assert sql_charts._category_stats(99).empty
+    assert sql_charts._calendar_series(99).empty
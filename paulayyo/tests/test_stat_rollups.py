@@ -0,0 +1,46 @@
+"""
+Pruebas de la reconstrucción de los acumulados de estadísticas
+"""
+
+from src.app_logic import UserService
+
+
+def daily_rows(database, user_id):
+    return {
+        row['fecha']: (row['entrenamientos_completados'], row['minutos_entrenamiento'],
+                       row['calorias_quemadas'], row['vasos_agua'])
+        for row in database.execute_query(
+            "SELECT * FROM estadisticas_usuario WHERE usuario_id = ?", (user_id,))
+    }
+
+
+def test_rebuild_keeps_daily_rows_without_sessions(app_database):
+    before = daily_rows(app_database, 1)
+    assert before
+
+    UserService(app_database).rebuild_stat_rollups(1)
+
+    # Los datos de ejemplo no vienen de sesiones y no deben perderse
+    assert daily_rows(app_database, 1) == before
+
+
+def test_rebuild_overwrites_days_with_sessions(app_database):
+    app_database.execute_update("""
+    INSERT INTO sesiones_entrenamiento
+    (usuario_id, entrenamiento_id, fecha_inicio, fecha_fin, duracion_real_minutos, calorias_quemadas, completado)
+    VALUES (1, 1, '2020-01-01 10:00:00', '2020-01-01 10:30:00', 30, 300, 1),
+           (1, 2, '2020-01-01 18:00:00', '2020-01-01 18:20:00', 20, 150, 1)
+    """)
+    app_database.execute_update("""
+    INSERT INTO estadisticas_usuario (usuario_id, fecha, entrenamientos_completados, vasos_agua)
+    VALUES (1, '2020-01-01', 9, 7)
+    """)
+
+    UserService(app_database).rebuild_stat_rollups(1)
+
+    # Se recalculan las columnas de entrenamiento; la hidratación del día se conserva
+    assert daily_rows(app_database, 1)['2020-01-01'] == (2, 50, 450, 7)
+    totals = app_database.execute_query(
+        "SELECT * FROM estadisticas_usuario_totales WHERE usuario_id = 1")[0]
+    assert totals['total_entrenamientos'] == 2
+    assert totals['total_calorias'] == 450
@@ -0,0 +1,104 @@
+"""
+Las rachas persistidas (SQL) y las del análisis (pandas) cuentan los mismos días
+"""
+
+import os
+import sqlite3
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from src.app_logic import UserService, apply_migrations
+from src.data_analysis import FitnessDataAnalyzer
+
+USER_ID = 2
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'database', 'fithome_pro_sqlite.sql')
+
+
+@pytest.fixture
+def utc_minus_5(monkeypatch):
+    """Zona horaria local UTC-5 (sin horario de verano) para SQLite y Python"""
+    monkeypatch.setenv('TZ', 'Etc/GMT+5')
+    time.tzset()
+    yield timezone(timedelta(hours=-5))
+    monkeypatch.undo()
+    time.tzset()
+
+
+def utc_text(local_dt, tz):
+    """Marca de tiempo como la guarda la app: datetime('now') en UTC"""
+    return local_dt.replace(tzinfo=tz).astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def add_session(database, tz, start, end):
+    database.execute_update("""
+    INSERT INTO sesiones_entrenamiento
+    (usuario_id, entrenamiento_id, fecha_inicio, fecha_fin, duracion_real_minutos, calorias_quemadas, completado)
+    VALUES (?, 1, ?, ?, 20, 100, 1)
+    """, (USER_ID, utc_text(start, tz), utc_text(end, tz)))
+
+
+def test_sql_and_pandas_streaks_agree(app_database, utc_minus_5):
+    today = date.today()
+    midnight = datetime.combine(today, datetime.min.time())
+    # Sesión que cruza la medianoche de anteayer a ayer y otra a última hora de hoy
+    # (ya es mañana en UTC)
+    add_session(app_database, utc_minus_5, midnight - timedelta(days=1, minutes=10),
+                midnight - timedelta(hours=23, minutes=50))
+    add_session(app_database, utc_minus_5, midnight + timedelta(hours=21),
+                          midnight + timedelta(hours=21, minutes=30))
+
+    service = UserService(app_database)
+    service.rebuild_stat_rollups(USER_ID)
+    stats = service.get_user_stats(USER_ID)
+
+    analyzer = FitnessDataAnalyzer(app_database.db_path, pool=app_database.pool)
+    summary = analyzer.calculate_streaks(analyzer.get_user_data(USER_ID))
+
+    assert summary.current_streak == 2
+    assert summary.last_workout_date == today
+    assert stats.streak_days == summary.current_streak
+    row = app_database.execute_query("SELECT * FROM rachas_usuario WHERE usuario_id = ?", (USER_ID,))[0]
+    assert row['ultima_fecha'] == today.isoformat()
+    assert row['racha_maxima'] == summary.longest_streak
+
+
+def test_today_totals_use_the_streak_day(app_database, utc_minus_5):
+    today = date.today()
+    midnight = datetime.combine(today, datetime.min.time())
+    # A las 21:00 locales ya es mañana en UTC: la sesión cuenta para hoy en todo
+    add_session(app_database, utc_minus_5, midnight + timedelta(hours=21),
+                midnight + timedelta(hours=21, minutes=20))
+
+    service = UserService(app_database)
+    service.rebuild_stat_rollups(USER_ID)
+    stats = service.get_user_stats(USER_ID)
+
+    assert stats.last_workout_date == today
+    assert stats.streak_days >= 1
+    assert (stats.today_minutes, stats.today_calories) == (20, 100)
+
+
+def test_migrated_streaks_use_local_days(tmp_path, utc_minus_5):
+
+    today = date.today()
+    midnight = datetime.combine(today, datetime.min.time())
+    conn = sqlite3.connect(str(tmp_path / "migrated.db"))
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        conn.executescript(f.read())
+    conn.execute("""
+    INSERT INTO sesiones_entrenamiento
+    (usuario_id, entrenamiento_id, fecha_inicio, fecha_fin, duracion_real_minutos, calorias_quemadas, completado)
+    VALUES (?, 1, ?, ?, 20, 100, 1)
+    """, (USER_ID, utc_text(midnight + timedelta(hours=21), utc_minus_5),
+          utc_text(midnight + timedelta(hours=21, minutes=20), utc_minus_5)))
+    conn.commit()
+
+    apply_migrations(conn)
+
+    ultima_fecha = conn.execute("SELECT ultima_fecha FROM rachas_usuario WHERE usuario_id = ?",
+                                (USER_ID,)).fetchone()[0]
+    conn.close()
+    assert ultima_fecha == today.isoformat()
@@ -0,0 +1,87 @@
+"""
+Pruebas del envío de estilos del tema (ThemeManager)
+"""
+
+import pytest
+import streamlit as st
+
+from src.app_logic import ThemeManager
+
+
+@pytest.fixture(autouse=True)
+def session_state():
+    # Sin servidor Streamlit el estado de sesión es global al proceso
+    st.session_state.clear()
+    yield st.session_state
+    st.session_state.clear()
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Payloads que llegan al navegador"""
+    payloads = []
+    monkeypatch.setattr(st, 'iframe', lambda payload, height: payloads.append(payload))
+    return payloads
+
+
+def run(accent=ThemeManager.DEFAULT_ACCENT, dark_mode=False, delivered=True):
+    """Una ejecución del script: aplicar el tema y, si termina, marcarlo entregado"""
+    sent_bytes = ThemeManager.apply_custom_css(accent, dark_mode)
+    if delivered:
+        ThemeManager.mark_css_delivered()
+    return sent_bytes
+
+
+def test_theme_is_sent_once_per_signature(sent):
+    payload_bytes = len(ThemeManager.build_theme_payload().encode('utf-8'))
+
+    assert run() == payload_bytes
+    assert run() == 0
+    assert run() == 0
+
+    assert len(sent) == 1
+    assert st.session_state.theme_signature == (ThemeManager.DEFAULT_ACCENT, False)
+    assert (st.session_state.css_bytes_sent, st.session_state.css_bytes_saved) == (0, payload_bytes)
+
+
+def test_changing_the_theme_sends_it_again(sent):
+    run()
+    run(dark_mode=True)
+    run('#ff0000', dark_mode=True)
+    run('#ff0000', dark_mode=True)
+
+    assert len(sent) == 3
+    assert ThemeManager.DARK_MODE_CSS in sent[1] and ThemeManager.DARK_MODE_CSS not in sent[0]
+    assert '--accent: #ff0000' in sent[2]
+
+
+def test_interrupted_run_resends_the_theme(sent):
+    # Un st.rerun() corta la ejecución antes de mark_css_delivered()
+    run(delivered=False)
+    assert st.session_state.theme_pending == (ThemeManager.DEFAULT_ACCENT, False)
+    assert 'theme_signature' not in st.session_state
+
+    run()
+    run()
+
+    assert len(sent) == 2
+    assert st.session_state.theme_pending is None
+
+
+def test_mark_delivered_without_pending_theme_keeps_signature(sent):
+    run()
+
+    ThemeManager.mark_css_delivered()
+
+    assert st.session_state.theme_signature == (ThemeManager.DEFAULT_ACCENT, False)
+
+
+def test_theme_css_is_built_once_per_theme():
+    ThemeManager.build_theme_css.cache_clear()
+
+    first = ThemeManager.build_theme_css('#123456', True)
+    again = ThemeManager.build_theme_css('#123456', True)
+
+    assert first is again
+    assert first.startswith(ThemeManager.load_base_css())
+    assert ThemeManager.build_theme_css.cache_info().hits == 1
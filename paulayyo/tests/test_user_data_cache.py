@@ -0,0 +1,99 @@
+"""
+Pruebas de la caché por usuario de sesiones en FitnessDataAnalyzer
+"""
+
+import pytest
+
+from src import cache as cache_module
+from src.app_logic import WorkoutService
+from src.data_analysis import FitnessDataAnalyzer
+
+
+class FakeClock:
+    """Sustituto de time.monotonic que solo avanza cuando se le pide"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module.time, 'monotonic', fake)
+    return fake
+
+
+def counting_analyzer(app_database, monkeypatch, **kwargs):
+    """Analizador que cuenta las cargas reales de sesiones por usuario"""
+    analyzer = FitnessDataAnalyzer(app_database.db_path, pool=app_database.pool, **kwargs)
+    loads = []
+    load = analyzer._load_user_data
+
+    def counted(user_id):
+        loads.append(user_id)
+        return load(user_id)
+
+    monkeypatch.setattr(analyzer, '_load_user_data', counted)
+    return analyzer, loads
+
+
+def test_repeated_reads_hit_the_cache(app_database, monkeypatch):
+    analyzer, loads = counting_analyzer(app_database, monkeypatch)
+    WorkoutService(app_database).complete_workout_session(1, 1, 30, 250, 4)
+
+    first = analyzer.get_user_data(1)
+    second = analyzer.get_user_data(1)
+
+    assert loads == [1]
+    assert len(first) == len(second) == 1
+
+
+def test_returned_frame_does_not_alter_cache(app_database, monkeypatch):
+    analyzer, _ = counting_analyzer(app_database, monkeypatch)
+    WorkoutService(app_database).complete_workout_session(1, 1, 30, 250, 4)
+
+    df = analyzer.get_user_data(1)
+    df['extra'] = 1
+
+    assert 'extra' not in analyzer.get_user_data(1).columns
+
+
+def test_entries_expire_after_ttl(app_database, monkeypatch, clock):
+    analyzer, loads = counting_analyzer(app_database, monkeypatch, cache_ttl=60.0)
+
+    analyzer.get_user_data(1)
+    clock.now += 59
+    analyzer.get_user_data(1)
+    clock.now += 2
+    analyzer.get_user_data(1)
+
+    assert loads == [1, 1]
+
+
+def test_least_recently_used_user_is_evicted(app_database, monkeypatch):
+    analyzer, loads = counting_analyzer(app_database, monkeypatch, cache_size=2)
+
+    analyzer.get_user_data(1)
+    analyzer.get_user_data(2)
+    analyzer.get_user_data(1)
+    analyzer.get_user_data(3)  # Desaloja al 2, el menos usado
+    analyzer.get_user_data(1)
+    analyzer.get_user_data(2)
+
+    assert loads == [1, 2, 3, 2]
+
+
+def test_completing_a_workout_invalidates_cached_sessions(app_database, monkeypatch):
+    analyzer, loads = counting_analyzer(app_database, monkeypatch)
+    workouts = WorkoutService(app_database)
+    workouts.complete_workout_session(1, 1, 30, 250, 4)
+    assert len(analyzer.get_user_data(1)) == 1
+
+    assert workouts.complete_workout_session(1, 2, 20, 180, 5)
+
+    df = analyzer.get_user_data(1)
+    assert loads == [1, 1]
+    assert sorted(df['calorias_quemadas']) == [180, 250]
@@ -0,0 +1,41 @@
+"""
+Pruebas del progreso semanal y de su gráfico de comparación
+"""
+
+from datetime import date, timedelta
+
+import pandas as pd
+
+from src.data_analysis import FitnessChartGenerator, FitnessDataAnalyzer
+
+REFERENCE = date(2024, 3, 31)
+
+
+def sessions_frame(days_back):
+    return pd.DataFrame({
+        'fecha_inicio': pd.to_datetime([REFERENCE - timedelta(days=d) for d in days_back]),
+        'calorias_quemadas': [100] * len(days_back),
+        'duracion_real_minutos': [20] * len(days_back),
+        'rating_usuario': [4] * len(days_back),
+    })
+
+
+def test_weeks_end_on_reference_day():
+    weekly = FitnessDataAnalyzer.weekly_progress_from_frame(sessions_frame([0, 6, 7]), 8, REFERENCE)
+    # La semana 0 es (referencia - 6, referencia], con el día de referencia incluido
+    assert [(w.week_start, w.week_end, w.workouts_completed) for w in weekly] == [
+        (REFERENCE - timedelta(days=6), REFERENCE, 2),
+        (REFERENCE - timedelta(days=13), REFERENCE - timedelta(days=7), 1),
+    ]
+
+
+def test_weekly_comparison_labels_use_real_weeks(monkeypatch):
+    # Sin sesiones en la semana intermedia
+    weekly = FitnessDataAnalyzer.weekly_progress_from_frame(sessions_frame([1, 15]), 8, REFERENCE)
+    analyzer = FitnessDataAnalyzer(":memory:")
+    monkeypatch.setattr(analyzer, 'generate_weekly_progress', lambda user_id, weeks=8: weekly)
+
+    fig = FitnessChartGenerator(analyzer).create_weekly_comparison(1)
+
+    assert list(fig.data[0].x) == ["11/03–17/03", "25/03–31/03"]
+    assert list(fig.data[0].y) == [1, 1]
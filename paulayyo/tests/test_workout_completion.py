@@ -0,0 +1,79 @@
+"""
+Pruebas de la finalización de sesiones en una única transacción
+"""
+
+from src.app_logic import WorkoutService
+
+
+def completed_sessions(database, user_id=1):
+    return database.execute_query(
+        "SELECT entrenamiento_id, duracion_real_minutos, calorias_quemadas, rating_usuario "
+        "FROM sesiones_entrenamiento WHERE usuario_id = ? AND completado = 1 ORDER BY id",
+        (user_id,)
+    )
+
+
+def test_completion_writes_session_counters_and_stats(app_database):
+    before = app_database.execute_query(
+        "SELECT total_completados FROM entrenamientos WHERE id = 1")[0]['total_completados'] or 0
+    workouts = WorkoutService(app_database)
+
+    assert workouts.start_workout_session(1, 1)
+    assert workouts.complete_workout_session(1, 1, 30, 250, 4)
+
+    assert completed_sessions(app_database) == [
+        {'entrenamiento_id': 1, 'duracion_real_minutos': 30, 'calorias_quemadas': 250, 'rating_usuario': 4}
+    ]
+    # La sesión abierta se completa, no se duplica
+    assert app_database.execute_query(
+        "SELECT COUNT(*) AS n FROM sesiones_entrenamiento WHERE usuario_id = 1")[0]['n'] == 1
+    workout = app_database.execute_query(
+        "SELECT total_completados FROM entrenamientos WHERE id = 1")[0]
+    assert workout['total_completados'] == before + 1
+    totals = app_database.execute_query(
+        "SELECT total_entrenamientos, total_calorias, total_minutos "
+        "FROM estadisticas_usuario_totales WHERE usuario_id = 1")[0]
+    assert (totals['total_entrenamientos'], totals['total_calorias'], totals['total_minutos']) == (1, 250, 30)
+
+
+def test_completion_without_open_session_records_it(app_database):
+    assert WorkoutService(app_database).complete_workout_session(1, 2, 20, 180, 5)
+
+    assert completed_sessions(app_database) == [
+        {'entrenamiento_id': 2, 'duracion_real_minutos': 20, 'calorias_quemadas': 180, 'rating_usuario': 5}
+    ]
+
+
+def test_completion_commits_once(app_database):
+    statements = []
+    with app_database.pool.connection() as conn:
+        conn.set_trace_callback(statements.append)
+    try:
+        assert WorkoutService(app_database).complete_workout_session(1, 1, 30, 250, 4)
+    finally:
+        with app_database.pool.connection() as conn:
+            conn.set_trace_callback(None)
+
+    keywords = [s.split()[0].upper() for s in statements]
+    assert keywords.count('BEGIN') == 1
+    assert keywords.count('COMMIT') == 1
+    assert keywords[0] == 'BEGIN' and keywords[-1] == 'COMMIT'
+
+
+def test_failed_completion_rolls_back_every_write(app_database, monkeypatch):
+    workouts = WorkoutService(app_database)
+    workouts.start_workout_session(1, 1)
+    before = app_database.execute_query(
+        "SELECT total_completados FROM entrenamientos WHERE id = 1")[0]['total_completados']
+
+    # Falla tras actualizar la sesión y los contadores del entrenamiento
+    monkeypatch.setattr(WorkoutService, 'TOTAL_STATS_SQL', "INSERT INTO tabla_inexistente VALUES (?, ?, ?)")
+
+    assert not workouts.complete_workout_session(1, 1, 30, 250, 4)
+
+    assert completed_sessions(app_database) == []
+    assert app_database.execute_query(
+        "SELECT total_completados FROM entrenamientos WHERE id = 1")[0]['total_completados'] == before
+    assert app_database.execute_query(
+        "SELECT COUNT(*) AS n FROM estadisticas_usuario WHERE usuario_id = 1 "
+        "AND fecha = date('now', 'localtime') AND minutos_entrenamiento = 30")[0]['n'] == 0
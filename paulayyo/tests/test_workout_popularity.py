@@ -0,0 +1,34 @@
+"""
+Pruebas de los contadores de popularidad de los entrenamientos
+"""
+
+import pytest
+
+from src.app_logic import CatalogCache, WorkoutService
+
+
+def counters(database, workout_id):
+    row = database.execute_query(
+        "SELECT total_completados, total_valoraciones, rating_promedio FROM entrenamientos WHERE id = ?",
+        (workout_id,))[0]
+    return row['total_completados'], row['total_valoraciones'], row['rating_promedio']
+
+
+def test_incremental_rating_matches_recompute(app_database):
+    # Entrenamiento sin sesiones previas ni valores iniciales
+    app_database.execute_update(
+        "UPDATE entrenamientos SET total_completados = 0, total_valoraciones = 0, rating_promedio = 0 WHERE id = 1")
+    app_database.execute_update("DELETE FROM sesiones_entrenamiento WHERE entrenamiento_id = 1")
+    service = WorkoutService(app_database, CatalogCache(app_database))
+
+    for rating in (5, None, 3):
+        service.start_workout_session(2, 1)
+        assert service.complete_workout_session(2, 1, 20, 150, rating)
+
+    # Las sesiones sin valoración cuentan como completadas pero no mueven la media
+    completions, ratings, average = counters(app_database, 1)
+    assert (completions, ratings) == (3, 2)
+    assert average == pytest.approx(4.0)
+
+    service.recompute_popularity()
+    assert counters(app_database, 1) == (completions, ratings, pytest.approx(average))
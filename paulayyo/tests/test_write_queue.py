@@ -0,0 +1,39 @@
+"""
+Pruebas de la cola de escritura diferida
+"""
+
+import gc
+
+from src import app_logic
+from src.app_logic import WriteBehindQueue
+
+
+def write_glasses(conn, user_id, glasses):
+    conn.execute("""
+    INSERT INTO hidratacion_diaria (usuario_id, fecha, vasos_consumidos) VALUES (?, '2020-01-01', ?)
+    ON CONFLICT(usuario_id, fecha) DO UPDATE SET vasos_consumidos = excluded.vasos_consumidos
+    """, (user_id, glasses))
+
+
+def test_close_writes_pending_and_leaves_exit_hook(app_database):
+    queue = WriteBehindQueue(app_database, max_delay=60)
+    queue.register('glasses', write_glasses)
+    assert queue in app_logic._open_write_queues
+
+    assert queue.submit('glasses', 1, 4)
+    queue.close(5.0)
+
+    assert queue not in app_logic._open_write_queues
+    rows = app_database.execute_query(
+        "SELECT vasos_consumidos FROM hidratacion_diaria WHERE usuario_id = 1 AND fecha = '2020-01-01'")
+    assert rows[0]['vasos_consumidos'] == 4
+
+
+def test_discarded_queues_are_not_retained(app_database):
+    before = len(app_logic._open_write_queues)
+    for _ in range(20):
+        WriteBehindQueue(app_database)
+    gc.collect()
+
+    # Las colas sin thread escritor ni referencias no quedan vivas por el hook de salida
+    assert len(app_logic._open_write_queues) == before